@@ -6,6 +6,11 @@ A desktop application for optimal workshop allocation for students.
 """
 
 if __name__ == "__main__":
+    import multiprocessing
+
+    # Worker processes of the optimization start from this script in a frozen .exe
+    multiprocessing.freeze_support()
+
     from views import MainWindow
 
     app = MainWindow()
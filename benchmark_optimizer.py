@@ -0,0 +1,115 @@
+"""
+Benchmark of the day-indexed optimizer with and without the class term.
+Run this to see how keep_classes_together affects solve time and class groups.
+"""
+import argparse
+import random
+import time
+from typing import Dict, List
+
+from services.optimizer import WorkshopOptimizer
+
+
+def generate_students(num_students: int, num_workshops: int, class_size: int = 25,
+                      seed: int = 0) -> List[Dict]:
+    """
+    Generate students with four distinct random wishes in classes of class_size.
+
+    Args:
+        num_students: Number of students
+        num_workshops: Number of workshops, named "Workshop 0", "Workshop 1", ...
+        class_size: Students per class
+        seed: Random seed
+    """
+    rng = random.Random(seed)
+    workshops = [f"Workshop {i}" for i in range(num_workshops)]
+    students = []
+    for i in range(num_students):
+        wishes = rng.sample(workshops, 4)
+        students.append({
+            'id': i,
+            'vorname': f"Vorname{i}",
+            'nachname': f"Nachname{i}",
+            'klasse': f"K{i // class_size}",
+            'wunsch1': wishes[0],
+            'wunsch2': wishes[1],
+            'wunsch3': wishes[2],
+            'wunsch4': wishes[3]
+        })
+    return students
+
+
+def count_class_groups(students: List[Dict], assignments: Dict[int, List[str]]) -> int:
+    """Count the (class, workshop, day) combinations with at least one student."""
+    groups = set()
+    for student in students:
+        for day, workshop in enumerate(assignments.get(student['id'], [])):
+            groups.add((student['klasse'], workshop, day))
+    return len(groups)
+
+
+def run(num_students: int, keep_classes_together: str, time_limit: float,
+        num_days: int = 3, class_size: int = 25, max_participants: int = 30) -> Dict:
+    """Solve one instance and collect the figures of the benchmark table."""
+    num_workshops = max(12, num_students // class_size)
+    students = generate_students(num_students, num_workshops, class_size)
+    workshops = [f"Workshop {i}" for i in range(num_workshops)]
+    config = {
+        'num_days': num_days,
+        'max_participants_per_workshop': max_participants,
+        'keep_classes_together': keep_classes_together,
+        'time_limit': time_limit
+    }
+
+    start_time = time.time()
+    result = WorkshopOptimizer(students, workshops, config).optimize()
+    elapsed = time.time() - start_time
+
+    solver = result.statistics.get('solver', {})
+    objective, bound = solver.get('objective'), solver.get('bound')
+    gap = None
+    if objective is not None and bound is not None and objective:
+        gap = abs(bound - objective) / abs(objective)
+    num_classes = -(-num_students // class_size)
+    return {
+        'students': num_students,
+        'workshops': num_workshops,
+        'mode': keep_classes_together,
+        'success': result.success,
+        'time': elapsed,
+        'optimal': solver.get('optimal', False),
+        'variables': result.statistics.get('model_size', {}).get('variables'),
+        'constraints': result.statistics.get('model_size', {}).get('constraints'),
+        'gap': gap,
+        'groups_per_class_day': (
+            count_class_groups(students, result.assignments) / (num_classes * num_days)
+            if result.success else None
+        )
+    }
+
+
+def main():
+    """Run the benchmark table."""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--students', type=int, nargs='+', default=[500, 2000, 10000])
+    parser.add_argument('--modes', nargs='+', default=['egal', 'ja', 'nein'])
+    parser.add_argument('--time-limit', type=float, default=120,
+                        help="Seconds per solve; the best solution found is used afterwards")
+    args = parser.parse_args()
+
+    print(f"{'Schüler':>8} {'Workshops':>9} {'Modus':>7} {'Variablen':>10} {'Zeilen':>8} "
+          f"{'Zeit [s]':>9} {'Optimal':>7} {'Lücke':>7} {'Gruppen/Klasse/Tag':>18}")
+    for num_students in args.students:
+        for mode in args.modes:
+            row = run(num_students, mode, args.time_limit)
+            gap = f"{row['gap']:.2%}" if row['gap'] is not None else '-'
+            groups = (f"{row['groups_per_class_day']:.2f}"
+                      if row['groups_per_class_day'] is not None else '-')
+            print(f"{row['students']:>8} {row['workshops']:>9} {row['mode']:>7} "
+                  f"{row['variables'] or '-':>10} {row['constraints'] or '-':>8} "
+                  f"{row['time']:>9.1f} {'ja' if row['optimal'] else 'nein':>7} {gap:>7} "
+                  f"{groups:>18}", flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,11 @@
 """Main application controller - orchestrates the workflow."""
-from typing import Dict, Optional
+import threading
+from dataclasses import replace
+from typing import Callable, Dict, Optional
 from pathlib import Path
 
 from services import DataService, OptimizationService, ValidationService, ConfigService
+from services.result_cache import ResultCache
 from models import ImportResult, OptimizationResult, ValidationResult
 from .app_state import AppState
 from utils import STEP_IMPORT, STEP_PARAMETERS, STEP_REVIEW, STEP_OPTIMIZE, STEP_RESULTS
@@ -13,13 +16,23 @@ class AppController:
 
     def __init__(self):
         # Services
+        self.config_service = ConfigService()
         self.data_service = DataService()
-        self.optimization_service = OptimizationService()
+        self.optimization_service = OptimizationService(cache=self._create_cache())
         self.validation_service = ValidationService()
-        self.config_service = ConfigService()
 
         # State
         self.state = AppState()
+        self._stop_event = threading.Event()
+
+    def _create_cache(self) -> Optional[ResultCache]:
+        """Create the result cache configured in the settings."""
+        if not self.config_service.get('result_cache', True):
+            return None
+        return ResultCache(
+            self.config_service.get('result_cache_dir', 'result_cache'),
+            int(self.config_service.get('result_cache_max_mb', 50) * 1024 * 1024)
+        )
 
     # ===== Data Import =====
 
@@ -38,6 +51,9 @@ class AppController:
             self.state.import_result = result
             self.state.students = result.students
             self.state.workshops = result.workshops
+            # Capacities of the workshop sheet replace those of an earlier file
+            self.config_service.set('workshop_capacities', result.workshop_capacities)
+            self.config_service.set('workshop_minimums', result.workshop_minimums)
 
             # Save last import path
             self.config_service.set('last_import_path', str(Path(file_path).parent))
@@ -62,8 +78,14 @@ class AppController:
         """Set optimization parameters.
 
         Args:
-            params: Parameter dictionary
+            params: Parameter dictionary; workshop_capacities and
+                workshop_minimums default to the imported ones
         """
+        params = {
+            'workshop_capacities': self.config_service.get('workshop_capacities', {}),
+            'workshop_minimums': self.config_service.get('workshop_minimums', {}),
+            **params
+        }
         self.state.parameters = params
         self.config_service.update_parameters(params)
 
@@ -103,9 +125,12 @@ class AppController:
 
     # ===== Optimization =====
 
-    def run_optimization(self) -> OptimizationResult:
+    def run_optimization(self, on_incumbent: Optional[Callable] = None) -> OptimizationResult:
         """Run the optimization.
 
+        Args:
+            on_incumbent: Called with every improved solution (from the solver thread)
+
         Returns:
             OptimizationResult
         """
@@ -121,12 +146,15 @@ class AppController:
             self.state.parameters = self.get_default_parameters()
 
         self.state.is_optimizing = True
+        self._stop_event = threading.Event()
 
         try:
             result = self.optimization_service.optimize(
                 students=self.state.students,
                 workshops=self.state.workshops,
-                config=self.state.parameters
+                config=self.state.parameters,
+                on_incumbent=on_incumbent,
+                stop_event=self._stop_event
             )
 
             self.state.optimization_result = result
@@ -135,6 +163,10 @@ class AppController:
         finally:
             self.state.is_optimizing = False
 
+    def accept_current_solution(self):
+        """Stop the running optimization and keep its best solution so far."""
+        self._stop_event.set()
+
     def is_optimizing(self) -> bool:
         """Check if optimization is currently running."""
         return self.state.is_optimizing
@@ -145,6 +177,26 @@ class AppController:
         """Get optimization result."""
         return self.state.optimization_result
 
+    def select_frontier_point(self, index: int) -> Optional[OptimizationResult]:
+        """Use another point of the Pareto frontier as result.
+
+        Args:
+            index: Position in statistics['pareto']
+
+        Returns:
+            The result with the assignments of that point, or None without a frontier
+        """
+        result = self.state.optimization_result
+        if not result or 'pareto' not in result.statistics:
+            return None
+
+        point = result.statistics['pareto'][index]
+        statistics = {**result.statistics, **point['statistics'], 'pareto_selected': index}
+        self.state.optimization_result = replace(
+            result, assignments=point['assignments'], statistics=statistics
+        )
+        return self.state.optimization_result
+
     def export_results(self, file_path: str) -> bool:
         """Export results to Excel.
 
@@ -58,6 +58,10 @@ class ImportResult:
     workshops: List[str] = field(default_factory=list)
     warnings: List[str] = field(default_factory=list)
     errors: List[str] = field(default_factory=list)
+    # Per workshop, its entry of the workshop_capacities setting
+    workshop_capacities: Dict = field(default_factory=dict)
+    # Per workshop, its entry of the workshop_minimums setting
+    workshop_minimums: Dict = field(default_factory=dict)
 
     def has_warnings(self) -> bool:
         """Check if import has warnings."""
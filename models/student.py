@@ -1,5 +1,5 @@
 """Student data model."""
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List, Optional
 
 
@@ -15,6 +15,8 @@ class Student:
     wunsch2: str
     wunsch3: str
     wunsch4: str
+    # IDs of the students this student wants to attend with
+    partners: List[int] = field(default_factory=list)
 
     @property
     def full_name(self) -> str:
@@ -56,7 +58,8 @@ class Student:
             wunsch1=data.get('wunsch1', ''),
             wunsch2=data.get('wunsch2', ''),
             wunsch3=data.get('wunsch3', ''),
-            wunsch4=data.get('wunsch4', '')
+            wunsch4=data.get('wunsch4', ''),
+            partners=list(data.get('partners') or [])
         )
 
     def to_dict(self) -> dict:
@@ -69,5 +72,6 @@ class Student:
             'wunsch1': self.wunsch1,
             'wunsch2': self.wunsch2,
             'wunsch3': self.wunsch3,
-            'wunsch4': self.wunsch4
+            'wunsch4': self.wunsch4,
+            'partners': list(self.partners)
         }
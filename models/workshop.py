@@ -1,6 +1,6 @@
 """Workshop data model."""
 from dataclasses import dataclass, field
-from typing import List, Set
+from typing import Dict, List, Optional, Set, Union
 
 
 @dataclass
@@ -10,6 +10,43 @@ class Workshop:
     name: str
     max_participants: int = None  # None = unlimited
     current_participants: int = 0
+    # Participants on single days (0-based) where they differ from
+    # max_participants; 0 = the workshop does not take place that day
+    day_capacities: Dict[int, Optional[int]] = field(default_factory=dict)
+    # Fewest participants for the workshop to take place on a day, 0 = no minimum
+    min_participants: int = 0
+
+    @classmethod
+    def from_setting(cls, name: str, setting: Union[int, None, List[Optional[int]]],
+                     default: Optional[int] = None) -> 'Workshop':
+        """Create a workshop from its entry in the workshop_capacities setting.
+
+        Args:
+            name: Workshop name
+            setting: Participants on every day (None = unlimited), or a list
+                with one entry per day; None entries and days after the list
+                keep the default
+            default: Participants per day for days the setting leaves open
+        """
+        if isinstance(setting, (list, tuple)):
+            return cls(name=name, max_participants=default, day_capacities={
+                day: capacity for day, capacity in enumerate(setting) if capacity is not None
+            })
+        return cls(name=name, max_participants=setting)
+
+    def to_setting(self) -> Union[int, None, List[Optional[int]]]:
+        """Entry of the workshop in the workshop_capacities setting."""
+        if not self.day_capacities:
+            return self.max_participants
+        return [self.capacity(day) for day in range(max(self.day_capacities) + 1)]
+
+    def capacity(self, day: int) -> Optional[int]:
+        """Participants on a day, None = unlimited, 0 = not offered."""
+        return self.day_capacities.get(day, self.max_participants)
+
+    def is_offered(self, day: int) -> bool:
+        """Check whether the workshop takes place on a day."""
+        return self.capacity(day) != 0
 
     def is_full(self) -> bool:
         """Check if workshop is at capacity."""
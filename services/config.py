@@ -14,7 +14,28 @@ class Config:
         "num_days": 3,
         "num_workshops": 12,
         "max_participants_per_workshop": None,  # None = unlimited
+        # Per workshop: participants per day, or a list per day; 0 = does not take place
+        "workshop_capacities": {},
+        # Per workshop: fewest participants on a day, otherwise it is cancelled that day
+        "workshop_minimums": {},
         "keep_classes_together": "egal",  # "ja" / "nein" / "egal"
+        "class_weight": 1,  # Penalty ("ja") or bonus ("nein") per class in a workshop on a day
+        # Students who named each other as partners attend the same workshops every day
+        "keep_partners_together": True,
+        # "weighted" / "lexicographic" (first wishes first) / "maxmin" (lowest score first)
+        "objective": "weighted",
+        # "auto" / "mip" / "two_phase" / "flow" / "heuristic" / "lagrangian" / "pareto" /
+        # "deferred_acceptance" / "serial_dictatorship"
+        "engine": "auto",
+        "tie_breaking": "random",  # Order of the mechanisms: "random" (lottery) / "priority" (list order)
+        "solver": "auto",  # "auto" / "cbc" / "highs" / "cpsat"
+        "threads": None,  # None = solver default
+        "time_limit": None,  # Seconds, None = unlimited
+        "mip_gap": None,  # Relative gap at which to stop, None = optimal
+        "decompose": True,  # Solve independent groups of students and workshops in parallel
+        "result_cache": True,  # Reuse results of identical students and parameters
+        "result_cache_dir": "result_cache",
+        "result_cache_max_mb": 50,  # Least recently used results are deleted beyond this size
         "wish_weights": {
             "wunsch1": 10,
             "wunsch2": 5,
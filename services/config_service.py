@@ -42,7 +42,18 @@ class ConfigService:
             'num_days': self.get('num_days', 3),
             'num_workshops': self.get('num_workshops', 12),
             'max_participants_per_workshop': self.get('max_participants_per_workshop'),
+            'workshop_capacities': self.get('workshop_capacities', {}),
+            'workshop_minimums': self.get('workshop_minimums', {}),
             'keep_classes_together': self.get('keep_classes_together', 'egal'),
+            'class_weight': self.get('class_weight', 1),
+            'keep_partners_together': self.get('keep_partners_together', True),
+            'objective': self.get('objective', 'weighted'),
+            'engine': self.get('engine', 'auto'),
+            'solver': self.get('solver', 'auto'),
+            'threads': self.get('threads'),
+            'time_limit': self.get('time_limit'),
+            'mip_gap': self.get('mip_gap'),
+            'decompose': self.get('decompose', True),
             'wish_weights': self.get('wish_weights', {
                 'wunsch1': 10,
                 'wunsch2': 5,
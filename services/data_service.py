@@ -1,19 +1,25 @@
 """Data service - handles Excel import/export operations."""
-from typing import List, Tuple
+import re
+from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 import pandas as pd
 
-from models import Student, ImportResult, OptimizationResult
+from models import Student, ImportResult, OptimizationResult, Workshop
 
 
 class DataService:
     """Service for data import/export operations."""
 
     REQUIRED_COLUMNS = ['vorname', 'nachname', 'klasse', 'wunsch1', 'wunsch2', 'wunsch3', 'wunsch4']
+    # Optional sheet with capacities: workshop, max_teilnehmer, min_teilnehmer, tag 1, tag 2, ...
+    WORKSHOP_SHEET = 'workshops'
+    # Optional column with the names of wished partners, separated by comma or semicolon
+    PARTNER_COLUMN = 'partner'
 
     def __init__(self):
         self._students: List[Student] = []
         self._workshops: List[str] = []
+        self._workshop_details: List[Workshop] = []
         self._raw_data: pd.DataFrame = None
 
     def import_excel(self, file_path: str) -> ImportResult:
@@ -35,8 +41,14 @@ class DataService:
                     workshops=[]
                 )
 
-            # Read Excel file
-            self._raw_data = pd.read_excel(file_path)
+            # Read Excel file: students on the first sheet, optionally capacities
+            with pd.ExcelFile(file_path) as excel:
+                self._raw_data = excel.parse(excel.sheet_names[0])
+                workshop_sheet = next((
+                    name for name in excel.sheet_names[1:]
+                    if name.lower().strip() == self.WORKSHOP_SHEET
+                ), None)
+                workshop_data = excel.parse(workshop_sheet) if workshop_sheet else None
 
             # Normalize column names (lowercase, strip whitespace)
             self._raw_data.columns = [col.lower().strip() for col in self._raw_data.columns]
@@ -53,8 +65,13 @@ class DataService:
 
             # Validate and process data
             warnings = self._validate_data()
+            self._workshop_details = []
+            if workshop_data is not None:
+                warnings += self._read_workshop_details(workshop_data)
             self._extract_workshops()
             self._prepare_student_list()
+            if self.PARTNER_COLUMN in self._raw_data.columns:
+                warnings += self._link_partners()
 
             success_msg = f"✓ {len(self._students)} Schüler erfolgreich eingelesen"
             if warnings:
@@ -65,7 +82,9 @@ class DataService:
                 message=success_msg,
                 students=self._students,
                 workshops=self._workshops,
-                warnings=warnings
+                warnings=warnings,
+                workshop_capacities=self.get_workshop_capacities(),
+                workshop_minimums=self.get_workshop_minimums()
             )
 
         except Exception as e:
@@ -107,13 +126,62 @@ class DataService:
 
         return warnings
 
+    def _read_workshop_details(self, data: pd.DataFrame) -> List[str]:
+        """Read the capacities of the workshop sheet into Workshop objects.
+
+        Column max_teilnehmer holds the participants per day, columns
+        "tag 1", "tag 2", ... those of single days; 0 means the workshop
+        does not take place that day. Empty cells keep the value of
+        max_teilnehmer, or the global maximum if that is empty too.
+        Column min_teilnehmer holds the fewest participants for the
+        workshop to take place on a day.
+
+        Returns:
+            Warnings about rows that could not be read
+        """
+        warnings = []
+        data.columns = [str(col).lower().strip() for col in data.columns]
+        if 'workshop' not in data.columns:
+            return [f"Tabelle '{self.WORKSHOP_SHEET}': Spalte 'workshop' fehlt"]
+        day_columns = []
+        for col in data.columns:
+            match = re.fullmatch(r'tag\s*(\d+)', col)
+            if match:
+                day_columns.append((int(match.group(1)) - 1, col))
+
+        def capacity(row, col, row_num) -> Optional[int]:
+            if col not in data.columns or pd.isna(row[col]):
+                return None
+            value = row[col]
+            if isinstance(value, str) or value < 0 or value != int(value):
+                warnings.append(f"Workshops Zeile {row_num}: Ungültige Kapazität '{value}'")
+                return None
+            return int(value)
+
+        for idx, row in data.iterrows():
+            row_num = idx + 2  # Excel row (accounting for header)
+            if pd.isna(row['workshop']) or not str(row['workshop']).strip():
+                continue
+            workshop = Workshop(
+                name=str(row['workshop']).strip(),
+                max_participants=capacity(row, 'max_teilnehmer', row_num),
+                min_participants=capacity(row, 'min_teilnehmer', row_num) or 0
+            )
+            for day, col in day_columns:
+                value = capacity(row, col, row_num)
+                if value is not None and day >= 0:
+                    workshop.day_capacities[day] = value
+            self._workshop_details.append(workshop)
+        return warnings
+
     def _extract_workshops(self):
-        """Extract unique workshop names from wishes."""
+        """Extract unique workshop names from wishes and the workshop sheet."""
         workshops = set()
         wish_cols = ['wunsch1', 'wunsch2', 'wunsch3', 'wunsch4']
 
         for col in wish_cols:
             workshops.update(self._raw_data[col].dropna().unique())
+        workshops.update(workshop.name for workshop in self._workshop_details)
 
         self._workshops = sorted([str(w).strip() for w in workshops if str(w).strip()])
 
@@ -134,6 +202,48 @@ class DataService:
             )
             self._students.append(student)
 
+    def _link_partners(self) -> List[str]:
+        """Resolve the names of the partner column into the partners of every student.
+
+        Names are matched with "vorname nachname", ignoring case and extra
+        spaces. Only mutual wishes keep students together, so one-sided
+        ones are reported.
+
+        Returns:
+            Warnings about unknown, ambiguous and one-sided partners
+        """
+        def normalise(name: str) -> str:
+            return ' '.join(name.split()).casefold()
+
+        by_name = {}
+        for student in self._students:
+            by_name.setdefault(normalise(student.full_name), []).append(student)
+
+        warnings = []
+        names = {}
+        for student, (idx, row) in zip(self._students, self._raw_data.iterrows()):
+            value = row[self.PARTNER_COLUMN]
+            if pd.isna(value):
+                continue
+            row_num = idx + 2  # Excel row (accounting for header)
+            for name in re.split(r'[,;]', str(value)):
+                if not name.strip():
+                    continue
+                matches = by_name.get(normalise(name), [])
+                if not matches:
+                    warnings.append(f"Zeile {row_num}: Partner '{name.strip()}' nicht gefunden")
+                elif len(matches) > 1:
+                    warnings.append(f"Zeile {row_num}: Partner '{name.strip()}' ist nicht eindeutig")
+                elif matches[0].id != student.id and matches[0].id not in student.partners:
+                    student.partners.append(matches[0].id)
+                    names[student.id, matches[0].id] = (row_num, name.strip())
+
+        by_id = {student.id: student for student in self._students}
+        for (student_id, partner_id), (row_num, name) in names.items():
+            if student_id not in by_id[partner_id].partners:
+                warnings.append(f"Zeile {row_num}: Partnerwunsch '{name}' ist nicht gegenseitig")
+        return warnings
+
     def export_results(
         self,
         result: OptimizationResult,
@@ -234,6 +344,20 @@ class DataService:
         """Get list of workshop names."""
         return self._workshops.copy()
 
+    def get_workshop_capacities(self) -> Dict[str, object]:
+        """Get the capacities of the workshop sheet as workshop_capacities setting."""
+        return {
+            workshop.name: workshop.to_setting() for workshop in self._workshop_details
+            if workshop.max_participants is not None or workshop.day_capacities
+        }
+
+    def get_workshop_minimums(self) -> Dict[str, int]:
+        """Get the minimum sizes of the workshop sheet as workshop_minimums setting."""
+        return {
+            workshop.name: workshop.min_participants for workshop in self._workshop_details
+            if workshop.min_participants
+        }
+
     def has_data(self) -> bool:
         """Check if data has been loaded."""
         return len(self._students) > 0
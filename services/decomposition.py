@@ -0,0 +1,133 @@
+"""
+Decomposition of workshop allocation problems.
+Splits students and workshops into groups that can be optimized independently,
+and finds the friend groups that attend together.
+"""
+from typing import Dict, List, Optional, Tuple
+
+
+def _has_spare_seats(num_students: int, num_workshops: int, num_days: int,
+                     capacity: Optional[int]) -> bool:
+    """Check whether a group can always take back its own students.
+
+    With (num_days - 1) * capacity + 1 free seats per day, the free seats
+    lie in at least num_days workshops, so a student who attends at most
+    num_days - 1 other workshops always finds one of them.
+    """
+    if not capacity:
+        return num_workshops >= num_days
+    return capacity * num_workshops - num_students >= (num_days - 1) * capacity + 1
+
+
+def split_components(
+    students: List[Dict],
+    workshops: List[str],
+    num_days: int,
+    capacity: Optional[int]
+) -> List[Tuple[List[Dict], List[str]]]:
+    """Split an allocation into connected components of the wish graph.
+
+    Students and workshops are nodes, every valid wish is an edge. A
+    student placed outside their component earns nothing there, so if every
+    component has enough spare seats to take its students back (see
+    _has_spare_seats), some optimal allocation keeps all students within
+    their component and the components can be solved on their own.
+    Components without spare seats are merged, together with the workshops
+    nobody wished; if that rest still lacks spare seats, the problem is not
+    split. This only holds without class term.
+
+    Args:
+        students: Student dictionaries with wunsch1 .. wunsch4
+        workshops: Workshop names
+        num_days: Number of days
+        capacity: Participants per workshop and day, None = unlimited
+
+    Returns:
+        (students, workshops) per component, in input order; a single
+        component if the problem does not split
+    """
+    index = {workshop: i for i, workshop in enumerate(workshops)}
+    parent = list(range(len(workshops) + len(students)))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for position, student in enumerate(students):
+        node = len(workshops) + position
+        for i in range(1, 5):
+            workshop = student.get(f'wunsch{i}')
+            if workshop in index:
+                parent[find(node)] = find(index[workshop])
+
+    groups = {}
+    for position, student in enumerate(students):
+        groups.setdefault(find(len(workshops) + position), ([], []))[0].append(student)
+    for workshop, i in index.items():
+        if find(i) in groups:
+            groups[find(i)][1].append(workshop)
+
+    components = []
+    rest_students, rest_workshops = [], []
+    for component_students, component_workshops in groups.values():
+        if _has_spare_seats(len(component_students), len(component_workshops), num_days, capacity):
+            components.append((component_students, component_workshops))
+        else:
+            rest_students.extend(component_students)
+            rest_workshops.extend(component_workshops)
+
+    if rest_students:
+        wished = {workshop for _, component_workshops in groups.values()
+                  for workshop in component_workshops}
+        rest_workshops.extend(workshop for workshop in workshops if workshop not in wished)
+        if not _has_spare_seats(len(rest_students), len(rest_workshops), num_days, capacity):
+            return [(students, workshops)]
+        components.append((rest_students, rest_workshops))
+    if len(components) < 2:
+        return [(students, workshops)]
+
+    # Keep the input order within every component
+    order = {id(student): position for position, student in enumerate(students)}
+    return [
+        (sorted(component_students, key=lambda student: order[id(student)]),
+         sorted(component_workshops, key=index.get))
+        for component_students, component_workshops in components
+    ]
+
+
+def friend_groups(students: List[Dict]) -> List[List[Dict]]:
+    """Find the groups of students who asked for each other as partners.
+
+    Students and mutual partner wishes form a graph: A and B are linked
+    only if B is among the partners of A and A among those of B. One-sided
+    wishes are ignored. Every connected component of two or more students
+    is a group, so chains of mutual wishes end up in one group.
+
+    Args:
+        students: Student dictionaries, optionally with 'partners' (ids)
+
+    Returns:
+        Groups of student dictionaries, in input order
+    """
+    position = {student['id']: index for index, student in enumerate(students)}
+    parent = list(range(len(students)))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for index, student in enumerate(students):
+        for partner in student.get('partners') or ():
+            other = position.get(partner)
+            if other is not None and other != index and student['id'] in (
+                    students[other].get('partners') or ()):
+                parent[find(index)] = find(other)
+
+    groups = {}
+    for index, student in enumerate(students):
+        groups.setdefault(find(index), []).append(student)
+    return [members for members in groups.values() if len(members) > 1]
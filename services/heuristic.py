@@ -0,0 +1,376 @@
+"""
+Heuristic engine for workshop allocation.
+Greedy filling plus local search for instant results on large events.
+"""
+import itertools
+import random
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from services.optimizer import WorkshopOptimizer, OptimizationResult
+
+
+def capacity_upper_bound(
+    wish_columns: np.ndarray,
+    wish_weights: np.ndarray,
+    num_workshops: int,
+    per_student: int,
+    seats: Optional[np.ndarray],
+    iterations: int = 100
+) -> float:
+    """Upper bound on the total weight from a Lagrangian relaxation.
+
+    Dropping the days leaves each student with per_student distinct
+    workshops and each workshop with its seats over all days. Relaxing the
+    seat rows with prices mu >= 0 splits the problem per student: pick the
+    per_student best values of weight - mu. Every mu gives a valid bound;
+    subgradient steps search for a small one.
+
+    Args:
+        wish_columns: Students x wishes matrix of workshop indices, -1 = none
+        wish_weights: Weights matching wish_columns
+        num_workshops: Number of workshops
+        per_student: Number of distinct workshops every student attends
+        seats: Seats per workshop over all days, None = unlimited
+        iterations: Number of subgradient steps
+
+    Returns:
+        Upper bound on the objective of every feasible assignment
+    """
+    # Students with the same wishes have the same subproblem
+    profiles, counts = np.unique(
+        np.concatenate([wish_columns, wish_weights], axis=1), axis=0, return_counts=True
+    )
+    width = wish_columns.shape[1]
+    wish_columns = profiles[:, :width].astype(int)
+    wish_weights = profiles[:, width:]
+    has_wish = wish_columns >= 0
+    rows = np.arange(len(profiles))[:, None]
+    wishes_workshop = np.zeros((len(profiles), num_workshops), dtype=bool)
+    wishes_workshop[np.nonzero(has_wish)[0], wish_columns[has_wish]] = True
+    prices = np.zeros(num_workshops)
+
+    def best_values():
+        # Besides its wishes, a student only needs the cheapest workshops
+        cheapest = np.argsort(prices, kind='stable')[:per_student + width]
+        columns = np.concatenate(
+            [wish_columns, np.broadcast_to(cheapest, (len(profiles), len(cheapest)))], axis=1
+        )
+        values = np.concatenate([
+            np.where(has_wish, wish_weights - prices[wish_columns], -np.inf),
+            np.where(wishes_workshop[:, cheapest], -np.inf, -prices[cheapest])
+        ], axis=1)
+        top = np.argpartition(-values, per_student - 1, axis=1)[:, :per_student]
+        return counts @ values[rows, top].sum(axis=1), columns[rows, top]
+
+    if seats is None:
+        return float(best_values()[0])
+
+    best_bound = np.inf
+    step = max(float(wish_weights.max(initial=0)), 1.0)
+    for _ in range(iterations):
+        value, chosen = best_values()
+        best_bound = min(best_bound, value + prices @ seats)
+        # Over-subscribed workshops get more expensive, idle ones cheaper
+        demand = np.bincount(
+            chosen.ravel(), weights=np.repeat(counts, per_student), minlength=num_workshops
+        )
+        subgradient = seats - demand
+        if not subgradient.any():
+            break
+        prices = np.maximum(prices - step * subgradient / np.abs(subgradient).sum(), 0)
+        step *= 0.95
+    return float(best_bound)
+
+
+class HeuristicOptimizer(WorkshopOptimizer):
+    """Greedy allocation improved by local search.
+
+    Wishes are filled rank by rank in random student order, open slots get
+    the least crowded free workshop (moving placed students aside if they
+    do not fit otherwise), and a local search then moves or swaps
+    students while the total satisfaction increases. Workshop-days below
+    their minimum size are cancelled at the end. The result is not
+    guaranteed to be optimal; the statistics report the gap to an upper
+    bound. Class composition and friend groups are not considered.
+    """
+
+    # Participants examined per workshop, day and lost weight in one move
+    SCAN_LIMIT = 8
+
+    def __init__(self, students: List[Dict], workshops: set, config: Dict):
+        super().__init__(students, workshops, config)
+        self.seed = config.get('seed', 0)
+        # Seconds until the local search stops, None = until no move improves
+        self.time_limit = config.get('time_limit')
+
+    def optimize(self) -> OptimizationResult:
+        """
+        Run the optimization algorithm.
+
+        Returns:
+            OptimizationResult with assignments and statistics
+        """
+        try:
+            start = time.time()
+            self._wishes = [self._wished_workshops(student) for student in self.students]
+            self._max_weight = max(
+                [weight for wished in self._wishes for weight in wished.values()], default=0
+            )
+            self._reset()
+
+            self._fill_wishes()
+            assignments = None
+            if self._fill_open_slots():
+                self._improve(start)
+                # Local search ignores minimum sizes; they are enforced afterwards
+                assignments = self._cancel_small_workshops({
+                    student['id']: list(schedule)
+                    for student, schedule in zip(self.students, self._schedule)
+                })
+            if assignments is None:
+                return OptimizationResult(
+                    assignments={},
+                    statistics={},
+                    success=False,
+                    message="Heuristik fand keine zulässige Zuteilung"
+                )
+
+            statistics = self._calculate_statistics(assignments)
+            objective = sum(
+                wished.get(workshop, 0)
+                for wished, student in zip(self._wishes, self.students)
+                for workshop in assignments[student['id']]
+            )
+            upper_bound = self._upper_bound()
+            statistics['objective'] = objective
+            statistics['upper_bound'] = upper_bound
+            statistics['gap'] = (upper_bound - objective) / upper_bound if upper_bound > 0 else 0.0
+            return OptimizationResult(
+                assignments=assignments,
+                statistics=statistics,
+                success=True,
+                message="Optimierung erfolgreich abgeschlossen"
+            )
+
+        except Exception as e:
+            return OptimizationResult(
+                assignments={},
+                statistics={},
+                success=False,
+                message=f"Fehler bei der Optimierung: {str(e)}"
+            )
+
+    def _reset(self):
+        """Start from an empty schedule."""
+        self._schedule = [[None] * self.num_days for _ in self.students]
+        self._attended = [set() for _ in self.students]
+        # Participants per workshop and day, grouped by the weight they would lose
+        self._occupants = {
+            (workshop, day): {} for workshop in self.workshops for day in range(self.num_days)
+        }
+        self._load = {key: 0 for key in self._occupants}
+        # Number of the last move that changed each workshop
+        self._moves = 0
+        self._changed = {workshop: 0 for workshop in self.workshops}
+
+    def _has_room(self, workshop: str, day: int) -> bool:
+        """Check whether a workshop has a free seat on a day."""
+        return self._fits(workshop, day, self._load[workshop, day])
+
+    def _place(self, student: int, workshop: Optional[str], day: int):
+        """Put a student into a workshop on a day, replacing the previous one."""
+        previous = self._schedule[student][day]
+        wished = self._wishes[student]
+        self._moves += 1
+        if previous is not None:
+            self._changed[previous] = self._moves
+            self._occupants[previous, day][wished.get(previous, 0)].discard(student)
+            self._load[previous, day] -= 1
+            self._attended[student].discard(previous)
+        self._schedule[student][day] = workshop
+        if workshop is not None:
+            self._changed[workshop] = self._moves
+            self._occupants[workshop, day].setdefault(wished.get(workshop, 0), set()).add(student)
+            self._load[workshop, day] += 1
+            self._attended[student].add(workshop)
+
+    def _fill_wishes(self):
+        """Place wishes rank by rank on the least crowded day with room."""
+        rng = random.Random(self.seed)
+        order = list(range(len(self.students)))
+        ranks = sorted(self.wish_weights, key=self.wish_weights.get, reverse=True)
+        for wish_key in ranks:
+            rng.shuffle(order)
+            for student in order:
+                workshop = self.students[student].get(wish_key)
+                if workshop not in self._wishes[student] or workshop in self._attended[student]:
+                    continue
+                days = [
+                    day for day in range(self.num_days)
+                    if self._schedule[student][day] is None and self._has_room(workshop, day)
+                ]
+                if days:
+                    day = min(days, key=lambda d: self._load[workshop, d])
+                    self._place(student, workshop, day)
+
+    def _fill_open_slots(self) -> bool:
+        """Give every open slot a workshop; False if that is impossible.
+
+        The placed wishes stay where they are if the open slots fit around
+        them; otherwise _free_seat moves participants to make room.
+        """
+        slots = [
+            (student, day)
+            for student, schedule in enumerate(self._schedule)
+            for day, workshop in enumerate(schedule) if workshop is None
+        ]
+        if not slots:
+            return True
+        capacity = dict(self.capacities)
+        seats = self._seat_fallback_students(
+            slots, dict(enumerate(self._attended)), dict(self._load), capacity
+        )
+        if seats is None:
+            return all(self._free_seat(student, day) for student, day in slots)
+        for (student, day), workshop in zip(slots, seats):
+            self._place(student, workshop, day)
+        return True
+
+    def _free_seat(self, student: int, day: int) -> bool:
+        """Seat a student on an open day, moving other participants of that day.
+
+        A breadth-first search over the workshops of the day looks for a
+        chain: the student takes a seat in a new workshop, a participant
+        there moves to a workshop new to them, and so on until a workshop
+        with a free seat is reached. Everybody keeps a seat on that day, so
+        the chain exists whenever the day can seat all its students given
+        their other days. Participants who lose least are tried first.
+        """
+        # Workshop -> (workshop the mover leaves, mover), None for the student's own options
+        parent = {
+            workshop: None for workshop in self.workshops if workshop not in self._attended[student]
+        }
+        queue = deque(parent)
+        while queue:
+            workshop = queue.popleft()
+            if self._has_room(workshop, day):
+                while parent[workshop] is not None:
+                    previous, mover = parent[workshop]
+                    self._place(mover, workshop, day)
+                    workshop = previous
+                self._place(student, workshop, day)
+                return True
+            occupants = self._occupants[workshop, day]
+            for loss in sorted(occupants):
+                for other in occupants[loss]:
+                    for target in self.workshops:
+                        if target not in parent and target not in self._attended[other]:
+                            parent[target] = (workshop, other)
+                            queue.append(target)
+        return False
+
+    def _improve(self, start: float):
+        """Move and swap students while the total satisfaction increases.
+
+        A wish that could not be improved is only tried again once its
+        workshop has changed participants.
+        """
+        failed = {}
+        improved = True
+        while improved:
+            improved = False
+            for student, wished in enumerate(self._wishes):
+                if self.time_limit is not None and time.time() - start > self.time_limit:
+                    return
+                if self.stop_event is not None and self.stop_event.is_set():
+                    return
+                for workshop in sorted(wished, key=wished.get, reverse=True):
+                    if workshop in self._attended[student]:
+                        continue
+                    if failed.get((student, workshop), -1) >= self._changed[workshop]:
+                        continue
+                    if self._improve_wish(student, workshop):
+                        improved = True
+                    else:
+                        failed[student, workshop] = self._changed[workshop]
+
+    def _improve_wish(self, student: int, workshop: str) -> bool:
+        """Try to get a student into a wished workshop on some day.
+
+        Candidate moves per day: take a free seat, swap with a participant
+        who can use the freed slot, or push a participant into one of their
+        own wishes or any free seat. Participants are scanned by the weight
+        they would lose, so hopeless ones are skipped. The best move with a
+        positive gain is applied.
+        """
+        wished = self._wishes[student]
+        best_gain, best_move = 0, None
+        for day in range(self.num_days):
+            current = self._schedule[student][day]
+            own_gain = wished[workshop] - wished.get(current, 0)
+            if own_gain <= best_gain:
+                continue
+            if self._has_room(workshop, day):
+                best_gain, best_move = own_gain, (day, None, None)
+                continue
+
+            free = None
+            occupants = self._occupants[workshop, day]
+            for loss in sorted(occupants):
+                if own_gain - loss + self._max_weight <= best_gain:
+                    break
+                for other in itertools.islice(occupants[loss], self.SCAN_LIMIT):
+                    other_wished = self._wishes[other]
+                    attended = self._attended[other]
+                    if current not in attended:
+                        gain = own_gain + other_wished.get(current, 0) - loss
+                        if gain > best_gain:
+                            best_gain, best_move = gain, (day, other, current)
+                    for target, weight in other_wished.items():
+                        if (own_gain + weight - loss > best_gain and target not in attended and
+                                target != workshop and self._has_room(target, day)):
+                            best_gain, best_move = own_gain + weight - loss, (day, other, target)
+                    if own_gain - loss > best_gain:
+                        if free is None:
+                            free = [w for w in self.workshops if self._has_room(w, day)]
+                        target = next((w for w in free if w not in attended), None)
+                        if target is not None:
+                            best_gain, best_move = own_gain - loss, (day, other, target)
+
+        if best_move is None:
+            return False
+        day, other, target = best_move
+        current = self._schedule[student][day]
+        if other is None:
+            self._place(student, workshop, day)
+        elif target == current:
+            # Swap the two students; free the seats first
+            self._place(student, None, day)
+            self._place(other, current, day)
+            self._place(student, workshop, day)
+        else:
+            self._place(other, target, day)
+            self._place(student, workshop, day)
+        return True
+
+    def _upper_bound(self) -> float:
+        """Bound the optimal objective for the gap report."""
+        index = {workshop: i for i, workshop in enumerate(self.workshops)}
+        width = max([len(wished) for wished in self._wishes], default=0)
+        wish_columns = np.full((len(self.students), width), -1)
+        wish_weights = np.zeros((len(self.students), width))
+        for row, wished in enumerate(self._wishes):
+            for column, (workshop, weight) in enumerate(wished.items()):
+                wish_columns[row, column] = index[workshop]
+                wish_weights[row, column] = weight
+        seats = None
+        if self._is_limited():
+            # Nobody attends a workshop twice, so all students stand for unlimited
+            seats = self._capacity_array(len(self.students)).sum(axis=1)
+        return capacity_upper_bound(
+            wish_columns, wish_weights, len(self.workshops), self.num_days, seats
+        )
@@ -0,0 +1,220 @@
+"""
+Lagrangian engine for workshop allocation.
+Relaxes the no-repeat rule so that every day becomes an independent assignment problem.
+"""
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.heuristic import HeuristicOptimizer
+from services.optimizer import OptimizationResult
+
+
+def day_relaxation(
+    wish_columns: np.ndarray,
+    wish_weights: np.ndarray,
+    counts: np.ndarray,
+    num_workshops: int,
+    num_days: int,
+    seats: Optional[np.ndarray],
+    iterations: int = 200,
+    time_limit: Optional[float] = None,
+    target: float = 0.0
+) -> Tuple[float, np.ndarray, np.ndarray, int]:
+    """Upper bound from relaxing the no-repeat rule of the day-indexed model.
+
+    Multipliers lambda >= 0 on "a student attends a wished workshop at most
+    once" leave one assignment problem per day: every student takes the
+    workshop with the best weight - lambda. These are transportation
+    problems, so relaxing their seat rows with prices mu >= 0 as well gives
+    the same bound and splits every day per student; all days are evaluated
+    together as one array operation. Every (lambda, mu) gives a valid
+    bound; Polyak steps towards target search for a small one, halving the
+    step length whenever the bound stalls. Dropping the no-repeat rule for
+    non-wished workshops only weakens the bound.
+
+    Args:
+        wish_columns: Profiles x wishes matrix of workshop indices, -1 = none
+        wish_weights: Weights matching wish_columns
+        counts: Number of students per profile
+        num_workshops: Number of workshops
+        num_days: Number of days
+        seats: Seats per workshop and day (num_workshops x num_days), None = unlimited
+        iterations: Maximum number of subgradient steps
+        time_limit: Seconds after which the steps stop
+        target: Objective value known to be reachable, e.g. 0 without negative weights
+
+    Returns:
+        Best bound, its multipliers lambda (profiles x wishes) and prices mu
+        (workshops x days), and the number of steps taken
+    """
+    started = time.time()
+    num_profiles, width = wish_columns.shape
+    has_wish = wish_columns >= 0
+    columns = np.where(has_wish, wish_columns, 0)
+    rows = np.arange(num_profiles)[:, None]
+    wishes_workshop = np.zeros((num_profiles, num_workshops), dtype=bool)
+    wishes_workshop[np.nonzero(has_wish)[0], wish_columns[has_wish]] = True
+    multipliers = np.zeros((num_profiles, width))
+    prices = np.zeros((num_workshops, num_days))
+
+    best_bound, best = np.inf, (multipliers, prices)
+    step, stalled = 1.0, 0
+    steps = 0
+    for steps in range(1, iterations + 1):
+        # Value of every wish on every day, profiles x wishes x days
+        wish_values = np.where(
+            has_wish[:, :, None],
+            (wish_weights - multipliers)[:, :, None] - prices[columns],
+            -np.inf
+        )
+        # Best non-wished workshop per day: the cheapest one not wished
+        cheapest = np.argsort(prices, axis=0, kind='stable')[:width + 1]
+        other_values = np.where(
+            wishes_workshop[:, cheapest], -np.inf, -prices[cheapest, np.arange(num_days)]
+        )
+        other_best = other_values.argmax(axis=1)
+        other_value = np.take_along_axis(other_values, other_best[:, None, :], axis=1)[:, 0, :]
+        wish_best = wish_values.argmax(axis=1)
+        wish_value = np.take_along_axis(wish_values, wish_best[:, None, :], axis=1)[:, 0, :]
+        takes_wish = wish_value >= other_value
+
+        value = counts @ np.maximum(wish_value, other_value).sum(axis=1)
+        value += counts @ multipliers.sum(axis=1)
+        if seats is not None:
+            value += float((prices * seats).sum())
+        if value < best_bound - 1e-9:
+            best_bound, best = value, (multipliers.copy(), prices.copy())
+            stalled = 0
+        else:
+            stalled += 1
+            if stalled >= 10:
+                step, stalled = step / 2, 0
+
+        # Wishes taken on too many days get more expensive, unused ones cheaper
+        days_taken = np.zeros((num_profiles, width))
+        profile, day = np.nonzero(takes_wish)
+        np.add.at(days_taken, (profile, wish_best[profile, day]), 1)
+        wish_gradient = np.where(has_wish, counts[:, None] * (1 - days_taken), 0)
+        gradient_norm = float((wish_gradient ** 2).sum())
+        if seats is not None:
+            chosen = np.where(
+                takes_wish, wish_columns[rows, wish_best], cheapest[other_best, np.arange(num_days)]
+            )
+            demand = np.zeros((num_workshops, num_days))
+            np.add.at(demand, (chosen, np.broadcast_to(np.arange(num_days), chosen.shape)),
+                      counts[:, None])
+            seat_gradient = seats - demand
+            gradient_norm += float((seat_gradient ** 2).sum())
+        if not gradient_norm or (time_limit is not None and time.time() - started > time_limit):
+            break
+        length = step * max(value - target, 0.0) / gradient_norm
+        multipliers = np.maximum(multipliers - length * wish_gradient, 0)
+        if seats is not None:
+            prices = np.maximum(prices - length * seat_gradient, 0)
+    return float(best_bound), best[0], best[1], steps
+
+
+class LagrangianOptimizer(HeuristicOptimizer):
+    """Allocation guided by the Lagrangian relaxation of the no-repeat rule.
+
+    The subgradient method of day_relaxation yields a proven upper bound and
+    multipliers that price every wish and seat. Wishes are then placed in
+    the order of their priced value, open slots filled and the local search
+    of HeuristicOptimizer repairs and improves the result. If the open slots
+    cannot be seated after the priced placement, the wishes are placed again
+    in the plain order of HeuristicOptimizer. The statistics report the gap
+    to the bound. Class composition and friend groups are not considered.
+    """
+
+    # Subgradient steps of the relaxation
+    ITERATIONS = 200
+
+    def __init__(self, students: List[Dict], workshops: set, config: Dict):
+        super().__init__(students, workshops, config)
+        self.iterations = config.get('lagrangian_iterations', self.ITERATIONS)
+        self._bound = None
+        self.lagrangian_info = {}
+
+    def optimize(self) -> OptimizationResult:
+        """
+        Run the optimization algorithm.
+
+        Returns:
+            OptimizationResult with assignments and statistics
+        """
+        result = super().optimize()
+        if result.success:
+            result.statistics['lagrangian'] = dict(self.lagrangian_info)
+        return result
+
+    def _fill_wishes(self):
+        """Place wishes by their value after subtracting the multipliers."""
+        started = time.time()
+        index = {workshop: i for i, workshop in enumerate(self.workshops)}
+        width = max([len(wished) for wished in self._wishes], default=0)
+        if not width:
+            self._bound = 0.0
+            return
+        wish_columns = np.full((len(self.students), width), -1)
+        wish_weights = np.zeros((len(self.students), width))
+        for row, wished in enumerate(self._wishes):
+            for column, (workshop, weight) in enumerate(wished.items()):
+                wish_columns[row, column] = index[workshop]
+                wish_weights[row, column] = weight
+        profiles, profile_of, counts = np.unique(
+            np.concatenate([wish_columns, wish_weights], axis=1), axis=0,
+            return_inverse=True, return_counts=True
+        )
+        profile_of = profile_of.reshape(-1)
+        seats = None
+        if self._is_limited():
+            seats = self._capacity_array(len(self.students))
+        self._bound, multipliers, prices, steps = day_relaxation(
+            profiles[:, :width].astype(int), profiles[:, width:], counts,
+            len(self.workshops), self.num_days, seats, self.iterations, self.time_limit,
+            target=float(np.minimum(wish_weights, 0).sum()) * self.num_days
+        )
+        self.lagrangian_info = {
+            'bound': self._bound,
+            'iterations': steps,
+            'profiles': len(profiles),
+            'time': time.time() - started,
+            # The wishes were placed again in the plain heuristic order
+            'fallback': False
+        }
+
+        # Every (student, wish, day) by priced value, best first; ties at random
+        priced = (
+            (wish_weights - multipliers[profile_of])[:, :, None] -
+            prices[np.where(wish_columns >= 0, wish_columns, 0)]
+        )
+        student, column, day = np.nonzero(
+            np.broadcast_to((wish_columns >= 0)[:, :, None], priced.shape)
+        )
+        rng = random.Random(self.seed)
+        tie_break = np.array([rng.random() for _ in range(len(student))])
+        order = np.lexsort((tie_break, -priced[student, column, day]))
+        for student, column, day in zip(
+                student[order].tolist(), column[order].tolist(), day[order].tolist()):
+            workshop = self.workshops[wish_columns[student, column]]
+            if (self._schedule[student][day] is None and workshop not in self._attended[student]
+                    and self._has_room(workshop, day)):
+                self._place(student, workshop, day)
+
+    def _fill_open_slots(self) -> bool:
+        """Seat the open slots, starting over in the plain heuristic order if needed."""
+        if super()._fill_open_slots():
+            return True
+        self._reset()
+        HeuristicOptimizer._fill_wishes(self)
+        if self.lagrangian_info:
+            self.lagrangian_info['fallback'] = True
+        return super()._fill_open_slots()
+
+    def _upper_bound(self) -> float:
+        """The better of the Lagrangian bound and the seat bound of the heuristic."""
+        bound = super()._upper_bound()
+        return bound if self._bound is None else min(bound, self._bound)
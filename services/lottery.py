@@ -0,0 +1,249 @@
+"""
+Probabilistic assignment under random serial dictatorship.
+Samples many lotteries in a process pool and reports how likely every student gets each wish.
+"""
+import itertools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+from models import Student, Workshop
+
+
+def _patterns(num_wishes: int, num_days: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Every way to put distinct wishes on distinct days.
+
+    Returns:
+        Wish index per pattern and day (-1 = no wish), and the value of
+        every pattern: one bit per wish, the first wish highest, so a
+        larger value is a lexicographically better set of wishes
+    """
+    patterns = [
+        pattern for pattern in itertools.product(range(-1, num_wishes), repeat=num_days)
+        if len({wish for wish in pattern if wish >= 0}) == sum(wish >= 0 for wish in pattern)
+    ]
+    patterns = np.array(patterns, dtype=np.int64).reshape(-1, num_days)
+    bits = np.where(patterns >= 0, 2 ** (num_wishes - 1 - np.maximum(patterns, 0)), 0)
+    return patterns, bits.sum(axis=1)
+
+
+def sample_serial_dictatorship(
+    wishes: np.ndarray,
+    num_workshops: int,
+    num_days: int,
+    capacity: Union[int, None, np.ndarray],
+    draws: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """Run random serial dictatorship for many lotteries at once.
+
+    All draws advance together: at every position of the lottery order,
+    each draw serves its student with one array operation. A student takes
+    the best set of wishes that fits on distinct days with a free seat (as
+    SerialDictatorshipOptimizer does), found as the best feasible pattern
+    among all placements of wishes on days. Days without a wish take no
+    seat here; they do not change which wishes are granted.
+
+    Args:
+        wishes: Students x wishes matrix of workshop indices, -1 = none;
+            the wishes of a student are distinct
+        num_workshops: Number of workshops
+        num_days: Number of days
+        capacity: Participants per workshop and day, None = unlimited; one
+            number or an array of shape (num_workshops, num_days)
+        draws: Number of lotteries
+        rng: Source of the lottery orders
+
+    Returns:
+        Number of draws in which every student got each wish (students x wishes)
+    """
+    num_students, num_wishes = wishes.shape
+    patterns, values = _patterns(num_wishes, num_days)
+    # Pattern x (wish, day) incidence; a pattern fits if none of its entries is full
+    incidence = np.zeros((len(patterns), num_wishes * num_days), dtype=np.float32)
+    pattern, day = np.nonzero(patterns >= 0)
+    incidence[pattern, patterns[pattern, day] * num_days + day] = 1
+    incidence = incidence.T
+    placed_wish = np.where(patterns >= 0, patterns, 0)
+
+    # Missing wishes point to an extra workshop that never has room
+    wishes = np.where(wishes >= 0, wishes, num_workshops)
+    seats = np.zeros((num_workshops + 1, num_days), dtype=np.int32)
+    seats[:num_workshops] = np.iinfo(np.int32).max if capacity is None else capacity
+    load = np.zeros((draws, num_workshops + 1, num_days), dtype=np.int32)
+    orders = rng.permuted(np.tile(np.arange(num_students), (draws, 1)), axis=1)
+    rows = np.arange(draws)
+    days = np.arange(num_days)
+    granted = []
+    for position in range(num_students):
+        students = orders[:, position]
+        workshops = wishes[students]
+        occupied = load[rows[:, None, None], workshops[:, :, None], days]
+        full = occupied >= seats[workshops[:, :, None], days]
+        fits = full.reshape(draws, -1).astype(np.float32) @ incidence == 0
+        best = np.where(fits, values, -1).argmax(axis=1)
+        taken = patterns[best] >= 0
+        draw, day = np.nonzero(taken)
+        wish = placed_wish[best[draw], day]
+        load[draw, workshops[draw, wish], day] += 1
+        granted.append(students[draw] * num_wishes + wish)
+    counts = np.bincount(np.concatenate(granted), minlength=num_students * num_wishes)
+    return counts.reshape(num_students, num_wishes)
+
+
+def _sample_batch(wishes: np.ndarray, num_workshops: int, num_days: int,
+                  capacity: Union[int, None, np.ndarray], draws: int,
+                  seed: np.random.SeedSequence) -> np.ndarray:
+    """Sample one batch of lotteries in a worker process."""
+    return sample_serial_dictatorship(
+        wishes, num_workshops, num_days, capacity, draws, np.random.default_rng(seed)
+    )
+
+
+def wilson_interval(successes: np.ndarray, trials: int,
+                    z: float = 1.96) -> Tuple[np.ndarray, np.ndarray]:
+    """Wilson score interval of estimated probabilities (95 % for z = 1.96)."""
+    if trials == 0:
+        return np.zeros_like(successes, dtype=float), np.ones_like(successes, dtype=float)
+    p = successes / trials
+    denominator = 1 + z ** 2 / trials
+    centre = (p + z ** 2 / (2 * trials)) / denominator
+    spread = z * np.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2)) / denominator
+    return np.clip(centre - spread, 0, 1), np.clip(centre + spread, 0, 1)
+
+
+@dataclass
+class LotteryReport:
+    """Estimated probabilities of a random serial dictatorship."""
+    student_ids: List[int]
+    workshops: List[str]
+    draws: int
+    wish_probability: np.ndarray  # students x 4, chance of getting the i-th wish
+    wish_interval: Tuple[np.ndarray, np.ndarray]  # lower and upper bounds of wish_probability
+    workshop_probability: np.ndarray  # students x workshops, chance of attending as a wish
+    workshop_interval: Tuple[np.ndarray, np.ndarray]
+
+    def to_rows(self) -> List[dict]:
+        """One row per student with the chance of every wish, e.g. for a DataFrame."""
+        rows = []
+        for index, student_id in enumerate(self.student_ids):
+            row = {'ID': student_id}
+            for rank in range(self.wish_probability.shape[1]):
+                row[f'Wunsch {rank + 1}'] = float(self.wish_probability[index, rank])
+                row[f'Wunsch {rank + 1} min'] = float(self.wish_interval[0][index, rank])
+                row[f'Wunsch {rank + 1} max'] = float(self.wish_interval[1][index, rank])
+            rows.append(row)
+        return rows
+
+
+class LotterySampler:
+    """Monte Carlo estimate of the assignment probabilities of a lottery.
+
+    The draws are split into batches with independent seeds, which run in
+    a process pool; the result depends on the seed, not on the number of
+    workers. A stop request cancels the batches that have not started and
+    reports on the draws done so far.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, num_days: int, max_participants: Optional[int], draws: int = 2000,
+                 seed: int = 0, max_workers: Optional[int] = None, confidence_z: float = 1.96,
+                 workshop_capacities: Optional[Dict] = None):
+        """
+        Args:
+            num_days: Number of days
+            max_participants: Participants per workshop and day, None = unlimited
+            draws: Number of lotteries
+            seed: Seed of the lotteries
+            max_workers: Worker processes, None = one per CPU
+            confidence_z: Width of the confidence intervals in standard errors
+            workshop_capacities: Capacities of single workshops or days
+                (see Workshop.from_setting), 0 = does not take place
+        """
+        self.num_days = num_days
+        self.max_participants = max_participants
+        self.workshop_capacities = workshop_capacities or {}
+        self.draws = draws
+        self.seed = seed
+        self.max_workers = max_workers
+        self.confidence_z = confidence_z
+
+    def run(self, students: List[Student], workshops: List[str],
+            stop_event: Optional[threading.Event] = None) -> LotteryReport:
+        """Sample the lotteries for the given students.
+
+        Args:
+            students: Student objects; wishes outside workshops are ignored
+            workshops: Workshop names
+            stop_event: Set it to stop after the running batches
+
+        Returns:
+            LotteryReport with probabilities and confidence intervals
+        """
+        index = {workshop: i for i, workshop in enumerate(workshops)}
+        # Column k is wunsch(k+1); missing, unknown and repeated wishes stay -1
+        wishes = np.full((len(students), 4), -1, dtype=np.int64)
+        for row, student in enumerate(students):
+            for column, wish in enumerate(student.wishes):
+                if wish in index and index[wish] not in wishes[row, :column]:
+                    wishes[row, column] = index[wish]
+
+        capacity = self.max_participants
+        if self.workshop_capacities:
+            capacity = np.full((len(workshops), self.num_days), np.iinfo(np.int32).max)
+            for row, name in enumerate(workshops):
+                workshop = Workshop.from_setting(
+                    name, self.workshop_capacities.get(name, self.max_participants),
+                    self.max_participants
+                )
+                for day in range(self.num_days):
+                    if workshop.capacity(day) is not None:
+                        capacity[row, day] = workshop.capacity(day)
+
+        sizes = [self.BATCH_SIZE] * (self.draws // self.BATCH_SIZE)
+        if self.draws % self.BATCH_SIZE:
+            sizes.append(self.draws % self.BATCH_SIZE)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(sizes))
+        granted = np.zeros(wishes.shape, dtype=np.int64)
+        draws = 0
+        workers = min(len(sizes), self.max_workers or os.cpu_count() or 1) or 1
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_sample_batch, wishes, len(workshops), self.num_days,
+                            capacity, size, batch_seed): size
+                for size, batch_seed in zip(sizes, seeds)
+            }
+            pending = set(futures)
+            while pending:
+                if stop_event is not None and stop_event.is_set():
+                    for future in pending:
+                        future.cancel()
+                done, pending = wait(pending, timeout=0.1)
+                for future in done:
+                    if not future.cancelled():
+                        granted += future.result()
+                        draws += futures[future]
+
+        # Granted wishes per attended workshop; the wishes of a student are distinct
+        attended = np.zeros((len(students), len(workshops) + 1), dtype=np.int64)
+        # Missing wishes (-1) count into the extra last column, which is dropped
+        np.add.at(
+            attended, (np.repeat(np.arange(len(students)), 4), wishes.reshape(-1)),
+            granted.reshape(-1)
+        )
+        attended = attended[:, :len(workshops)]
+        scale = max(draws, 1)
+        return LotteryReport(
+            student_ids=[student.id for student in students],
+            workshops=list(workshops),
+            draws=draws,
+            wish_probability=granted / scale,
+            wish_interval=wilson_interval(granted, draws, self.confidence_z),
+            workshop_probability=attended / scale,
+            workshop_interval=wilson_interval(attended, draws, self.confidence_z)
+        )
@@ -0,0 +1,569 @@
+"""
+Array-based construction of the allocation model.
+Builds objective, bounds and constraint matrix with NumPy instead of pulp objects.
+"""
+from dataclasses import dataclass
+from typing import Optional, Tuple, Union
+
+import numpy as np
+
+
+@dataclass
+class MatrixModel:
+    """An integer program in array form.
+
+    All columns are integer. Rows read row_lower <= A x <= row_upper, with
+    A given as COO triplets (rows, columns, values); infinite bounds are
+    np.inf.
+    """
+    objective: np.ndarray
+    column_lower: np.ndarray
+    column_upper: np.ndarray
+    rows: np.ndarray
+    columns: np.ndarray
+    values: np.ndarray
+    row_lower: np.ndarray
+    row_upper: np.ndarray
+    maximize: bool = True
+
+    @property
+    def num_columns(self) -> int:
+        return len(self.objective)
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.row_lower)
+
+    def column_major(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Matrix in compressed column form (starts, row indices, values)."""
+        order = np.lexsort((self.rows, self.columns))
+        starts = np.zeros(self.num_columns + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.columns, minlength=self.num_columns), out=starts[1:])
+        return starts, self.rows[order], self.values[order]
+
+    def objective_value(self, solution: np.ndarray) -> float:
+        return float(self.objective @ solution)
+
+    def extend(
+        self,
+        objective: np.ndarray,
+        column_lower: np.ndarray,
+        column_upper: np.ndarray,
+        rows: np.ndarray,
+        columns: np.ndarray,
+        values: np.ndarray,
+        row_lower: np.ndarray,
+        row_upper: np.ndarray
+    ):
+        """Append columns and rows.
+
+        The new columns and rows get the indices after the existing ones;
+        the triplets use indices into the extended model.
+        """
+        self.objective = np.concatenate([self.objective, objective])
+        self.column_lower = np.concatenate([self.column_lower, column_lower])
+        self.column_upper = np.concatenate([self.column_upper, column_upper])
+        self.rows = np.concatenate([self.rows, np.asarray(rows, dtype=np.int64)])
+        self.columns = np.concatenate([self.columns, np.asarray(columns, dtype=np.int64)])
+        self.values = np.concatenate([self.values, np.asarray(values, dtype=float)])
+        self.row_lower = np.concatenate([self.row_lower, row_lower])
+        self.row_upper = np.concatenate([self.row_upper, row_upper])
+
+    def presolve(self, max_passes: int = 10) -> Tuple['MatrixModel', 'Reduction']:
+        """Remove rows and columns that do not need a solver.
+
+        Reductions, repeated until nothing changes:
+        - singleton rows become column bounds
+        - forcing rows, whose bounds are only met at one end of every
+          column's range, fix those columns
+        - rows that hold for all column values within bounds are dropped
+        - columns without rows are fixed at their best finite bound
+        Fixed columns are removed and their share moved into the row
+        bounds. Every solution of the reduced model expands to a solution of
+        this model with the same objective, and every feasible start reduces
+        to a feasible start.
+
+        Returns:
+            The reduced model and the Reduction that maps between both
+        """
+        tolerance = 1e-9
+        lower, upper = self.column_lower.copy(), self.column_upper.copy()
+        active = np.ones(self.num_rows, dtype=bool)
+        positive = self.values > 0
+        row_length = np.bincount(self.rows, minlength=self.num_rows)
+        for _ in range(max_passes):
+            entries = active[self.rows]
+            rows, columns, values = self.rows[entries], self.columns[entries], self.values[entries]
+            at_lower = values * lower[columns]
+            at_upper = values * upper[columns]
+            min_activity = np.bincount(
+                rows, weights=np.where(positive[entries], at_lower, at_upper), minlength=self.num_rows
+            )
+            max_activity = np.bincount(
+                rows, weights=np.where(positive[entries], at_upper, at_lower), minlength=self.num_rows
+            )
+            # Singleton rows: a * x within the row bounds gives bounds on x
+            singleton = active & (row_length == 1)
+            force = np.zeros(len(rows), dtype=bool)
+            if singleton.any():
+                single = singleton[rows]
+                column, value, row = columns[single], values[single], rows[single]
+                bound_a = self.row_lower[row] / value
+                bound_b = self.row_upper[row] / value
+                np.maximum.at(lower, column, np.ceil(np.minimum(bound_a, bound_b) - tolerance))
+                np.minimum.at(upper, column, np.floor(np.maximum(bound_a, bound_b) + tolerance))
+                active &= ~singleton
+            else:
+                # Forcing rows: every column sits at the end that meets the row bound
+                forced_up = active & (np.abs(min_activity - self.row_upper) <= tolerance)
+                forced_low = active & (np.abs(max_activity - self.row_lower) <= tolerance)
+                force = (forced_up | forced_low)[rows]
+                if force.any():
+                    to_lower = positive[entries][force] == forced_up[rows[force]]
+                    column = columns[force]
+                    to_lower_columns, to_upper_columns = column[to_lower], column[~to_lower]
+                    both = np.intersect1d(to_lower_columns, to_upper_columns)
+                    if np.any(lower[both] < upper[both]):
+                        # Two rows force a column to opposite ends; infeasible
+                        return self, Reduction.identity(self)
+                    upper[to_lower_columns] = lower[to_lower_columns]
+                    lower[to_upper_columns] = upper[to_upper_columns]
+                    active &= ~(forced_up | forced_low)
+
+            if np.any(lower > upper + tolerance):
+                # Infeasible; leave that for the solver to report
+                return self, Reduction.identity(self)
+
+            # Rows that hold for all values within the (wider) old bounds
+            redundant = (
+                active & (min_activity >= self.row_lower - tolerance) &
+                (max_activity <= self.row_upper + tolerance)
+            )
+            active &= ~redundant
+            if not (singleton.any() or force.any() or redundant.any()):
+                break
+
+        # Columns without active rows take their best bound
+        in_rows = np.zeros(self.num_columns, dtype=bool)
+        in_rows[self.columns[active[self.rows]]] = True
+        direction = self.objective if self.maximize else -self.objective
+        best = np.where(direction > 0, upper, lower)
+        free = ~in_rows & np.isfinite(best)
+        lower[free] = upper[free] = best[free]
+
+        fixed = lower == upper
+        values = np.where(fixed, lower, 0.0)
+        kept_columns = np.nonzero(~fixed)[0]
+        kept_rows = np.nonzero(active)[0]
+        column_index = np.cumsum(~fixed) - 1
+        row_index = np.cumsum(active) - 1
+        fixed_activity = np.bincount(
+            self.rows, weights=self.values * values[self.columns], minlength=self.num_rows
+        )
+        keep = active[self.rows] & ~fixed[self.columns]
+        reduced = MatrixModel(
+            objective=self.objective[kept_columns],
+            column_lower=lower[kept_columns],
+            column_upper=upper[kept_columns],
+            rows=row_index[self.rows[keep]],
+            columns=column_index[self.columns[keep]],
+            values=self.values[keep],
+            row_lower=(self.row_lower - fixed_activity)[kept_rows],
+            row_upper=(self.row_upper - fixed_activity)[kept_rows],
+            maximize=self.maximize
+        )
+        return reduced, Reduction(kept_columns, kept_rows, values, float(self.objective @ values))
+
+
+@dataclass
+class Reduction:
+    """Maps between a model and the reduced model of MatrixModel.presolve."""
+    columns: np.ndarray  # Columns of the model kept in the reduced model
+    rows: np.ndarray  # Rows of the model kept in the reduced model
+    values: np.ndarray  # Values of all columns; final for the removed ones
+    offset: float  # Objective share of the removed columns
+
+    @classmethod
+    def identity(cls, model: MatrixModel) -> 'Reduction':
+        return cls(
+            np.arange(model.num_columns), np.arange(model.num_rows), np.zeros(model.num_columns), 0.0
+        )
+
+    def reduce(self, solution: np.ndarray) -> np.ndarray:
+        """Restrict a solution of the model to the reduced model."""
+        return solution[self.columns]
+
+    def expand(self, solution: np.ndarray) -> np.ndarray:
+        """Complete a solution of the reduced model with the removed columns."""
+        values = self.values.copy()
+        values[self.columns] = solution
+        return values
+
+
+class AllocationMatrix(MatrixModel):
+    """The day-indexed allocation model of WorkshopOptimizer in array form.
+
+    Columns are laid out in up to five blocks:
+    - x: members of a cohort in a candidate workshop on a day, (pair, day)
+      with pair = index into pair_cohort / pair_workshop; a friend group
+      is a cohort of one member that takes a seat per student
+    - f: fallback placements of a sparse cohort on a day, (fallback cohort, day)
+    - s: fallback seats of a workshop on a day, (workshop, day)
+    - o: a workshop with a minimum size takes place on a day, (workshop, day)
+    - g: a class is present in a workshop on a day, (group, day) with
+      group = index into group_class / group_workshop; fallback cohorts
+      must have no class, as their groups cannot be counted
+
+    The x, s, o and g blocks only hold the days on which their workshop
+    takes place (x_pair / x_day list the x columns); x_column and s_column
+    return -1 for the others. Rows are the same as in
+    WorkshopOptimizer._add_constraints, again only for workshop-days that
+    take place.
+    """
+
+    def __init__(
+        self,
+        pair_cohort: np.ndarray,
+        pair_workshop: np.ndarray,
+        pair_weight: np.ndarray,
+        cohort_size: np.ndarray,
+        fallback_cohorts: np.ndarray,
+        num_workshops: int,
+        num_days: int,
+        capacity: Union[int, None, np.ndarray],
+        cohort_class: Optional[np.ndarray] = None,
+        class_mode: str = 'egal',
+        class_weight: float = 0.0,
+        reserved: Optional[np.ndarray] = None,
+        minimum: Union[int, None, np.ndarray] = None,
+        cohort_seats: Optional[np.ndarray] = None
+    ):
+        """
+        Args:
+            pair_cohort: Cohort of every candidate (cohort, workshop) pair
+            pair_workshop: Workshop index of every pair
+            pair_weight: Objective weight of every pair (0 = not wished)
+            cohort_size: Number of members per cohort
+            fallback_cohorts: Sparse cohorts, which get fallback placements
+            num_workshops: Number of workshops
+            num_days: Number of days
+            capacity: Participants per workshop and day, None or np.inf =
+                unlimited, 0 = the workshop does not take place; one number
+                or an array of shape (num_workshops, num_days)
+            cohort_class: Class index of every cohort, -1 = no class term;
+                -1 for all fallback cohorts
+            class_mode: keep_classes_together, 'ja' / 'nein' / 'egal'
+            class_weight: Objective weight of a class group
+            reserved: Seats per (workshop, day) taken by students outside
+                the model, shape (num_workshops, num_days)
+            minimum: Fewest participants for a workshop to take place on a
+                day, otherwise it is cancelled; 0 or 1 = no minimum; one
+                number or an array of shape (num_workshops, num_days)
+            cohort_seats: Seats one placement of a cohort takes, None = 1
+                for all; more for a friend group placed as a whole, which
+                must not be a fallback cohort
+        """
+        self.pair_cohort = pair_cohort
+        self.pair_workshop = pair_workshop
+        self.cohort_size = cohort_size
+        self.fallback_cohorts = fallback_cohorts
+        self.num_workshops = num_workshops
+        self.num_days = num_days
+        self.class_mode = class_mode
+
+        days = num_days
+        num_pairs = len(pair_cohort)
+        num_cohorts = len(cohort_size)
+        num_fallback = len(fallback_cohorts)
+        capacity = np.broadcast_to(
+            np.asarray(np.inf if capacity is None else capacity, dtype=float), (num_workshops, days)
+        )
+        minimum = np.broadcast_to(
+            np.asarray(0 if minimum is None else minimum, dtype=float), (num_workshops, days)
+        )
+        # Workshop-days that take place, those the model may cancel (a
+        # minimum of 1 holds anyway) and those with a plain capacity row
+        offered = capacity > 0
+        opening = offered & (minimum > 1)
+        limited = offered & np.isfinite(capacity) & ~opening
+        self.offered = offered
+        has_seats = num_fallback > 0 and bool((limited | opening).any())
+
+        # Class groups over the candidate workshops of each class
+        if class_mode == 'egal' or cohort_class is None:
+            cohort_class = np.full(num_cohorts, -1)
+        class_size = np.bincount(
+            cohort_class[cohort_class >= 0], weights=cohort_size[cohort_class >= 0]
+        ).astype(np.int64)
+        pair_class = cohort_class[pair_cohort]
+        grouped = np.nonzero(pair_class >= 0)[0]
+        groups, pair_group = np.unique(
+            np.stack([pair_class[grouped], pair_workshop[grouped]]), axis=1, return_inverse=True
+        )
+        group_of_pair = np.full(num_pairs, -1, dtype=np.int64)
+        group_of_pair[grouped] = pair_group.reshape(-1)
+        self.group_class, self.group_workshop = groups
+        num_groups = groups.shape[1]
+
+        x_pair, x_day = np.nonzero(offered[pair_workshop].reshape(num_pairs, days))
+        if has_seats:
+            s_workshop, s_day = np.nonzero(offered)
+        else:
+            s_workshop = s_day = np.zeros(0, dtype=np.int64)
+        o_workshop, o_day = np.nonzero(opening)
+        g_group, g_day = np.nonzero(offered[self.group_workshop].reshape(num_groups, days))
+        self.x_pair, self.x_day = x_pair, x_day
+        self.s_workshop, self.s_day = s_workshop, s_day
+
+        self.x_offset = 0
+        self.f_offset = len(x_pair)
+        self.s_offset = self.f_offset + num_fallback * days
+        self.o_offset = self.s_offset + len(s_workshop)
+        self.g_offset = self.o_offset + len(o_workshop)
+        num_columns = self.g_offset + len(g_group)
+        self.end_offset = num_columns
+
+        x_cols = np.arange(self.f_offset)
+        self._x_index = np.full(num_pairs * days, -1, dtype=np.int64)
+        self._x_index[x_pair * days + x_day] = x_cols
+        f_cohort = np.repeat(fallback_cohorts, days)
+        f_day = np.tile(np.arange(days), num_fallback)
+        f_cols = self.f_offset + np.arange(num_fallback * days)
+        s_cols = self.s_offset + np.arange(len(s_workshop))
+        self._s_index = np.full(num_workshops * days, -1, dtype=np.int64)
+        self._s_index[s_workshop * days + s_day] = s_cols
+        o_cols = self.o_offset + np.arange(len(o_workshop))
+        # Workshop-day of every x and s column, and of every o column
+        x_slot = pair_workshop[x_pair] * days + x_day
+        s_slot = s_workshop * days + s_day
+        # Seats every x column takes
+        x_seats = 1 if cohort_seats is None else cohort_seats[pair_cohort[x_pair]]
+        x_seats = np.broadcast_to(np.asarray(x_seats, dtype=float), x_cols.shape)
+        self._load_slot = np.concatenate([x_slot, s_slot])
+        self._o_slot = o_workshop * days + o_day
+
+        objective = np.zeros(num_columns)
+        objective[x_cols] = pair_weight[x_pair]
+        column_lower = np.zeros(num_columns)
+        column_upper = np.full(num_columns, np.inf)
+        column_upper[x_cols] = cohort_size[pair_cohort[x_pair]]
+        column_upper[f_cols] = cohort_size[f_cohort]
+        column_upper[o_cols] = 1
+        column_upper[self.g_offset:] = 1
+        if reserved is not None:
+            # Students outside the model keep their workshop open
+            column_lower[o_cols] = reserved[opening] > 0
+
+        triplets = []
+        lower = []
+        upper = []
+        row_count = 0
+
+        def add_rows(count, entries, row_lower, row_upper):
+            nonlocal row_count
+            for rows, cols, vals in entries:
+                triplets.append((
+                    row_count + rows, cols, np.broadcast_to(np.asarray(vals, dtype=float), rows.shape)
+                ))
+            lower.append(np.broadcast_to(np.asarray(row_lower, dtype=float), (count,)))
+            upper.append(np.broadcast_to(np.asarray(row_upper, dtype=float), (count,)))
+            row_count += count
+
+        # Each student gets exactly one workshop per day
+        size_per_day = np.repeat(cohort_size, days).astype(float)
+        add_rows(num_cohorts * days, [
+            (pair_cohort[x_pair] * days + x_day, x_cols, 1),
+            (f_cohort * days + f_day, f_cols, 1)
+        ], size_per_day, size_per_day)
+
+        # Students don't repeat the same workshop
+        add_rows(num_pairs, [
+            (x_pair, x_cols, 1)
+        ], -np.inf, cohort_size[pair_cohort])
+
+        free = capacity.reshape(-1).copy()
+        if reserved is not None:
+            free -= reserved.reshape(-1)
+        if limited.any():
+            # Maximum participants per workshop and day
+            is_limited = limited.reshape(-1)
+            limited_row = np.cumsum(is_limited) - 1
+            add_rows(int(is_limited.sum()), [
+                (
+                    limited_row[x_slot[is_limited[x_slot]]], x_cols[is_limited[x_slot]],
+                    x_seats[is_limited[x_slot]]
+                ),
+                (limited_row[s_slot[is_limited[s_slot]]], s_cols[is_limited[s_slot]], 1)
+            ], -np.inf, free[is_limited])
+
+        if len(o_workshop):
+            # An open workshop-day holds from its minimum up to its seats, a
+            # cancelled one nobody. Seats are the fewer of the free capacity
+            # and the students who can attend, so o needs no big M; for
+            # limited workshop-days this row is the capacity row.
+            is_opening = opening.reshape(-1)
+            opening_row = np.cumsum(is_opening) - 1
+            attendable = np.bincount(
+                x_slot, weights=column_upper[x_cols] * x_seats, minlength=num_workshops * days
+            )
+            attendable[s_slot] += cohort_size[fallback_cohorts].sum()
+            o_rows = np.arange(len(o_workshop))
+            load = [
+                (
+                    opening_row[x_slot[is_opening[x_slot]]], x_cols[is_opening[x_slot]],
+                    x_seats[is_opening[x_slot]]
+                ),
+                (opening_row[s_slot[is_opening[s_slot]]], s_cols[is_opening[s_slot]], 1)
+            ]
+            add_rows(len(o_workshop), load + [
+                (o_rows, o_cols, -np.minimum(free, attendable)[is_opening])
+            ], -np.inf, 0)
+            add_rows(len(o_workshop), load + [
+                (o_rows, o_cols, -minimum[opening])
+            ], 0 if reserved is None else -reserved[opening], np.inf)
+
+        if has_seats:
+            # Every fallback placement needs a free seat somewhere
+            add_rows(days, [
+                (s_day, s_cols, 1),
+                (f_day, f_cols, -1)
+            ], 0, 0)
+
+            # Fallback seats of a workshop are only for students who did not wish it
+            offered_row = np.cumsum(offered.reshape(-1)) - 1
+            fallback_position = np.full(num_cohorts, -1)
+            fallback_position[fallback_cohorts] = np.arange(num_fallback)
+            wished = fallback_position[pair_cohort] >= 0
+            wish_pair, wish_day = np.nonzero(wished[:, None] & offered[pair_workshop])
+            # Seats of every other workshop that takes place on the same day
+            seat, workshop = np.nonzero(
+                (s_workshop[:, None] != np.arange(num_workshops)) & offered[:, s_day].T
+            )
+            add_rows(int(offered.sum()), [
+                (
+                    offered_row[pair_workshop[wish_pair] * days + wish_day],
+                    self.f_offset + fallback_position[pair_cohort[wish_pair]] * days + wish_day,
+                    1
+                ),
+                (offered_row[workshop * days + s_day[seat]], s_cols[seat], -1)
+            ], -np.inf, 0)
+
+            fallback_students = cohort_size[fallback_cohorts].sum()
+            wishers = np.bincount(
+                pair_workshop[wished], weights=cohort_size[pair_cohort[wished]],
+                minlength=num_workshops
+            )
+            seated = np.nonzero(offered.any(axis=1))[0]
+            seated_row = np.full(num_workshops, -1)
+            seated_row[seated] = np.arange(len(seated))
+            add_rows(len(seated), [
+                (seated_row[s_workshop], s_cols, 1)
+            ], -np.inf, (fallback_students - wishers)[seated])
+
+        # Placement columns counted by every g column (source, target)
+        members = [(np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))]
+        if len(g_group):
+            # Class groups: g >= count / limit with 'ja', g <= count with 'nein'
+            g_cols = self.g_offset + np.arange(len(g_group))
+            group_rows = np.arange(len(g_group))
+            g_index = np.full(num_groups * days, -1, dtype=np.int64)
+            g_index[g_group * days + g_day] = group_rows
+            x_grouped = group_of_pair[x_pair] >= 0
+            x_group_rows = g_index[group_of_pair[x_pair[x_grouped]] * days + x_day[x_grouped]]
+            x_group_cols = x_cols[x_grouped]
+            members.append((x_group_cols, x_group_rows))
+            if class_mode == 'ja':
+                limit = np.minimum(
+                    class_size[self.group_class[g_group]], capacity[self.group_workshop[g_group], g_day]
+                )
+                objective[g_cols] = -class_weight
+                add_rows(len(g_group), [
+                    (x_group_rows, x_group_cols, 1),
+                    (group_rows, g_cols, -limit)
+                ], -np.inf, 0)
+            else:
+                objective[g_cols] = class_weight
+                add_rows(len(g_group), [
+                    (x_group_rows, x_group_cols, -1),
+                    (group_rows, g_cols, 1)
+                ], -np.inf, 0)
+
+        self._group_members = tuple(np.concatenate(arrays) for arrays in zip(*members))
+
+        super().__init__(
+            objective=objective,
+            column_lower=column_lower,
+            column_upper=column_upper,
+            rows=np.concatenate([t[0] for t in triplets]).astype(np.int64),
+            columns=np.concatenate([t[1] for t in triplets]).astype(np.int64),
+            values=np.concatenate([t[2] for t in triplets]),
+            row_lower=np.concatenate(lower),
+            row_upper=np.concatenate(upper),
+            maximize=True
+        )
+
+    def set_pair_weights(self, pair_weight: np.ndarray):
+        """Replace the objective weight of every pair, keeping all rows."""
+        self.objective[self.x_offset:self.f_offset] = pair_weight[self.x_pair]
+
+    def set_class_weight(self, class_weight: float):
+        """Replace the objective weight of the class groups."""
+        self.objective[self.g_offset:self.end_offset] = (
+            -class_weight if self.class_mode == 'ja' else class_weight
+        )
+
+    def x_column(self, pair: np.ndarray, day: np.ndarray) -> np.ndarray:
+        return self._x_index[pair * self.num_days + day]
+
+    def f_column(self, fallback_index: np.ndarray, day: np.ndarray) -> np.ndarray:
+        return self.f_offset + fallback_index * self.num_days + day
+
+    def s_column(self, workshop: np.ndarray, day: np.ndarray) -> np.ndarray:
+        return self._s_index[workshop * self.num_days + day]
+
+    @property
+    def has_seats(self) -> bool:
+        return self.o_offset > self.s_offset
+
+    def set_openings(self, solution: np.ndarray):
+        """Set the o columns of a solution to the workshop-days its placements use."""
+        load = np.bincount(
+            self._load_slot,
+            weights=np.concatenate([
+                solution[self.x_offset:self.f_offset], solution[self.s_offset:self.o_offset]
+            ]),
+            minlength=self.num_workshops * self.num_days
+        )
+        solution[self.o_offset:self.g_offset] = load[self._o_slot] > 0.5
+
+    def seat_counts(self, solution: np.ndarray):
+        """(workshop, day, count) of all used s columns of a solution."""
+        counts = np.rint(solution[self.s_offset:self.o_offset]).astype(np.int64)
+        used = np.nonzero(counts)[0]
+        return self.s_workshop[used], self.s_day[used], counts[used]
+
+    def set_class_groups(self, solution: np.ndarray):
+        """Set the g columns of a solution to the groups its placements form."""
+        source, target = self._group_members
+        present = np.bincount(
+            target, weights=solution[source], minlength=self.end_offset - self.g_offset
+        )
+        solution[self.g_offset:self.end_offset] = present > 0.5
+
+    def placements(self, solution: np.ndarray):
+        """Split a solution into placements.
+
+        Returns:
+            (cohort, workshop, day, count) of all used x columns and
+            (cohort, day, count) of all used f columns
+        """
+        counts = np.rint(solution).astype(np.int64)
+        used = np.nonzero(counts[:self.f_offset])[0]
+        pair, day = self.x_pair[used], self.x_day[used]
+        x = (self.pair_cohort[pair], self.pair_workshop[pair], day, counts[used])
+
+        used = np.nonzero(counts[self.f_offset:self.s_offset])[0]
+        index, day = np.divmod(used, self.num_days)
+        f = (self.fallback_cohorts[index], day, counts[self.f_offset + used])
+        return x, f
+
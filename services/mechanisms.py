@@ -0,0 +1,251 @@
+"""
+Allocation mechanisms for workshop allocation.
+Transparent procedures that serve students in a priority order instead of solving a model.
+"""
+import heapq
+import random
+import time
+from typing import Dict, List, Set, Tuple
+
+from services.optimizer import OptimizationResult, WorkshopOptimizer
+
+
+class MechanismOptimizer(WorkshopOptimizer):
+    """Base of the allocation mechanisms.
+
+    Students are served in a priority order: a lottery drawn from the seed
+    ('random' tie-breaking) or the order of the student list ('priority').
+    Only the order of the wishes counts, not their weights. Days without a
+    wish get the least crowded workshop the student has not attended, after
+    all wishes are placed; with hardly any free seats, the placed wishes
+    can leave days that no workshop fits, and the run fails. Workshop-days
+    below their minimum size are cancelled afterwards and their
+    participants moved (see _cancel_small_workshops). Class composition and
+    friend groups are not considered. The run takes O(students x wishes x
+    days) steps.
+    """
+
+    # Lotteries are drawn for all students at once, and the run is fast anyway
+    DECOMPOSABLE = False
+    NAME = ''
+
+    def __init__(self, students: List[Dict], workshops: set, config: Dict):
+        super().__init__(students, workshops, config)
+        self.seed = config.get('seed', 0)
+        self.tie_breaking = config.get('tie_breaking', 'random')
+
+    def optimize(self) -> OptimizationResult:
+        """
+        Run the allocation mechanism.
+
+        Returns:
+            OptimizationResult with assignments and statistics
+        """
+        try:
+            started = time.time()
+            self._rng = random.Random(self.seed)
+            offered = set(self.workshops)
+            self._wishes = []
+            for student in self.students:
+                wishes = []
+                for i in range(1, 5):
+                    workshop = student.get(f'wunsch{i}')
+                    if workshop in offered and workshop not in wishes:
+                        wishes.append(workshop)
+                self._wishes.append(wishes)
+            self._schedule = [[None] * self.num_days for _ in self.students]
+            self._load = [{workshop: 0 for workshop in self.workshops} for _ in range(self.num_days)]
+            self._orders = []
+
+            self._allocate()
+            assignments = None
+            if self._fill_open_slots():
+                assignments = self._cancel_small_workshops({
+                    student['id']: schedule
+                    for student, schedule in zip(self.students, self._schedule)
+                })
+            if assignments is None:
+                return OptimizationResult(
+                    assignments={},
+                    statistics={},
+                    success=False,
+                    message="Keine zulässige Zuteilung für alle Tage gefunden"
+                )
+
+            statistics = self._calculate_statistics(assignments)
+            statistics['mechanism'] = {
+                'name': self.NAME,
+                'tie_breaking': self.tie_breaking,
+                'seed': self.seed,
+                # Student ids in the order they were served, per round
+                'orders': self._orders,
+                'time': time.time() - started
+            }
+            return OptimizationResult(
+                assignments=assignments,
+                statistics=statistics,
+                success=True,
+                message="Zuteilung erfolgreich abgeschlossen"
+            )
+
+        except Exception as e:
+            return OptimizationResult(
+                assignments={},
+                statistics={},
+                success=False,
+                message=f"Fehler bei der Zuteilung: {str(e)}"
+            )
+
+    def _allocate(self):
+        """Place the wishes of all students."""
+        raise NotImplementedError
+
+    def _order(self) -> List[int]:
+        """Draw the order in which the students are served."""
+        order = list(range(len(self.students)))
+        if self.tie_breaking == 'random':
+            self._rng.shuffle(order)
+        self._orders.append([self.students[student]['id'] for student in order])
+        return order
+
+    def _has_room(self, workshop: str, day: int) -> bool:
+        """Check whether a workshop has a free seat on a day."""
+        return self._fits(workshop, day, self._load[day][workshop])
+
+    def _fill_open_slots(self) -> bool:
+        """Give every day without a wish a workshop; False if that is impossible.
+
+        Each slot gets the least crowded workshop the student has not
+        attended, taken from a heap per day. If that gets stuck, all slots
+        are seated again by _seat_fallback_students.
+        """
+        slots = [
+            (student, day)
+            for student, schedule in enumerate(self._schedule)
+            for day, workshop in enumerate(schedule) if workshop is None
+        ]
+        if not slots:
+            return True
+        heaps = [
+            [(load, workshop) for workshop, load in day_load.items() if self._fits(workshop, day, load)]
+            for day, day_load in enumerate(self._load)
+        ]
+        for heap in heaps:
+            heapq.heapify(heap)
+        for index, (student, day) in enumerate(slots):
+            schedule = self._schedule[student]
+            heap = heaps[day]
+            attended = []
+            while heap and heap[0][1] in schedule:
+                attended.append(heapq.heappop(heap))
+            if not heap:
+                # Undo the slots seated so far and seat them all exactly
+                for student, day in slots[:index]:
+                    self._load[day][self._schedule[student][day]] -= 1
+                    self._schedule[student][day] = None
+                return self._seat_exactly(slots)
+            load, workshop = heapq.heappop(heap)
+            schedule[day] = workshop
+            self._load[day][workshop] += 1
+            if self._fits(workshop, day, load + 1):
+                heapq.heappush(heap, (load + 1, workshop))
+            for item in attended:
+                heapq.heappush(heap, item)
+        return True
+
+    def _seat_exactly(self, slots: List[Tuple[int, int]]) -> bool:
+        """Seat the open slots with _seat_fallback_students."""
+        load = {
+            (workshop, day): seats
+            for day, day_load in enumerate(self._load) for workshop, seats in day_load.items()
+        }
+        taken = {
+            student: {workshop for workshop in schedule if workshop is not None}
+            for student, schedule in enumerate(self._schedule)
+        }
+        capacity = dict(self.capacities)
+        seats = self._seat_fallback_students(slots, taken, load, capacity)
+        if seats is None:
+            return False
+        for (student, day), workshop in zip(slots, seats):
+            self._schedule[student][day] = workshop
+            self._load[day][workshop] += 1
+        return True
+
+
+class SerialDictatorshipOptimizer(MechanismOptimizer):
+    """Random serial dictatorship.
+
+    In the order of one lottery, every student takes the best schedule
+    still available: as many of their wishes as fit, a better wish always
+    before any number of worse ones. Each choice only depends on the
+    students before, so nobody gains by hiding or reordering wishes.
+    """
+
+    NAME = 'serial_dictatorship'
+
+    def _allocate(self):
+        has_room = self._has_room
+        for student in self._order():
+            schedule = self._schedule[student]
+            for workshop in self._wishes[student]:
+                # A free day with room needs no augmenting path
+                day = next((
+                    day for day, current in enumerate(schedule)
+                    if current is None and has_room(workshop, day)
+                ), None)
+                if day is None:
+                    self._fit(student, workshop, set())
+                else:
+                    schedule[day] = workshop
+                    self._load[day][workshop] += 1
+
+    def _fit(self, student: int, workshop: str, visited: Set[int]) -> bool:
+        """Place a wish on a day with room, moving the student's other wishes if needed.
+
+        The wishes a student can attend together form a transversal matroid
+        over the days, so adding wishes best first along augmenting paths
+        gives the student's best schedule.
+        """
+        schedule = self._schedule[student]
+        for day in range(self.num_days):
+            if day in visited or not self._has_room(workshop, day):
+                continue
+            visited.add(day)
+            current = schedule[day]
+            if current is not None:
+                if not self._fit(student, current, visited):
+                    continue
+                self._load[day][current] -= 1
+            schedule[day] = workshop
+            self._load[day][workshop] += 1
+            return True
+        return False
+
+
+class DeferredAcceptanceOptimizer(MechanismOptimizer):
+    """Student-proposing deferred acceptance, one round per day.
+
+    In every round, students propose to their best wish not attended yet;
+    a workshop holds the proposals of highest priority up to its capacity
+    and rejects the others, who propose to their next wish. With
+    'random' tie-breaking each round draws a new lottery, so the same
+    students do not come last every day. All workshops share the
+    priority order, and for common priorities the rounds end with the
+    same matching as serving the students one by one in that order,
+    each getting their best wish with room; that is how a round is
+    computed. Within a round, no student gains by misreporting.
+    """
+
+    NAME = 'deferred_acceptance'
+
+    def _allocate(self):
+        has_room = self._has_room
+        for day in range(self.num_days):
+            for student in self._order():
+                schedule = self._schedule[student]
+                for workshop in self._wishes[student]:
+                    if workshop not in schedule and has_room(workshop, day):
+                        schedule[day] = workshop
+                        self._load[day][workshop] += 1
+                        break
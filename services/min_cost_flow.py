@@ -0,0 +1,229 @@
+"""
+Min-cost flow engine for workshop allocation.
+Solves day-symmetric problems as a transportation problem without an LP solver.
+"""
+import heapq
+from typing import Dict, List, Optional, Union
+
+from services.optimizer import WorkshopOptimizer, OptimizationResult
+from services.scheduling import schedule_days
+
+
+def assign_workshop_sets(
+    weights: List[Dict[int, float]],
+    num_workshops: int,
+    per_student: int,
+    capacity: Union[int, None, List[Optional[int]]]
+) -> Optional[List[List[int]]]:
+    """Choose distinct workshops for every student with maximum total weight.
+
+    This is the transportation problem source -> student (per_student units)
+    -> workshop (one unit per pair) -> sink (capacity units), solved by
+    successive shortest paths. Students are inserted one unit at a time; the
+    residual graph is compressed onto the workshop nodes, where an arc
+    w1 -> w2 stands for moving the cheapest student from w1 to w2. Node
+    potentials keep all reduced costs non-negative, so each insertion is a
+    Dijkstra run over the workshops only. Integer weights stay exact, however
+    large they are.
+
+    Args:
+        weights: Per student, weight of each wished workshop index
+        num_workshops: Number of workshops (indices 0 .. num_workshops - 1)
+        per_student: Number of distinct workshops every student needs
+        capacity: Participants per workshop over all units, None = unlimited;
+            one number for all workshops or one per workshop
+
+    Returns:
+        Workshop indices per student, or None if no assignment exists
+    """
+    inf = float('inf')
+    if not isinstance(capacity, list):
+        capacity = [capacity] * num_workshops
+    sink = -1  # Sorts first among equal labels, which ends the search early
+    sets = [set() for _ in weights]
+    version = [0] * len(weights)
+    load = [0] * num_workshops
+    potential = [0] * num_workshops
+    # w1 -> w2 -> heap of (cost, version, student) for students in w1 who wished w2
+    moves_to_wish = [{} for _ in range(num_workshops)]
+    # w -> weight of the student in w -> students, for moves to non-wished workshops
+    members = [{} for _ in range(num_workshops)]
+
+    def refresh(student: int):
+        """Publish the moves of a student whose workshops changed."""
+        version[student] += 1
+        wished = weights[student]
+        for current in sets[student]:
+            for target, weight in wished.items():
+                if target not in sets[student]:
+                    heapq.heappush(
+                        moves_to_wish[current].setdefault(target, []),
+                        (wished.get(current, 0) - weight, version[student], student)
+                    )
+
+    def move_costs(source: int, open_nodes: List[int], done: List[bool]) -> Dict[int, tuple]:
+        """Cheapest student move from source to each open workshop."""
+        best = {}
+        for target, heap in moves_to_wish[source].items():
+            if done[target]:
+                continue
+            while heap and heap[0][1] != version[heap[0][2]]:
+                heapq.heappop(heap)
+            if heap:
+                best[target] = (heap[0][0], heap[0][2])
+
+        # Moves to non-wished workshops cost the weight given up in source
+        uncovered = set(open_nodes)
+        for weight in sorted(members[source]):
+            uncovered = {
+                target for target in uncovered
+                if target not in best or best[target][0] > weight
+            }
+            if not uncovered:
+                break
+            for student in members[source][weight]:
+                covered = [
+                    target for target in uncovered
+                    if target not in sets[student] and target not in weights[student]
+                ]
+                for target in covered:
+                    best[target] = (weight, student)
+                    uncovered.discard(target)
+                if not uncovered:
+                    break
+        return best
+
+    for student, wished in enumerate(weights):
+        for _ in range(per_student):
+            # Dijkstra on reduced costs, starting with the direct placements
+            label = [-wished.get(w, 0) - potential[w] for w in range(num_workshops)]
+            for workshop in sets[student]:
+                label[workshop] = inf
+            previous = [(None, student)] * num_workshops
+            queue = [(label[w], w) for w in range(num_workshops) if label[w] < inf]
+            heapq.heapify(queue)
+            done = [False] * num_workshops
+            popped = []
+            sink_label = inf
+            sink_from = None
+
+            while queue:
+                distance, node = heapq.heappop(queue)
+                if node == sink:
+                    break
+                if done[node] or distance > label[node]:
+                    continue
+                done[node] = True
+                popped.append(node)
+                if capacity[node] is None or load[node] < capacity[node]:
+                    reduced = distance + potential[node]
+                    if reduced < sink_label:
+                        sink_label, sink_from = reduced, node
+                        heapq.heappush(queue, (reduced, sink))
+                open_nodes = [w for w in range(num_workshops) if not done[w]]
+                for target, (cost, mover) in move_costs(node, open_nodes, done).items():
+                    reduced = distance + cost + potential[node] - potential[target]
+                    if reduced < label[target]:
+                        label[target] = reduced
+                        previous[target] = (node, mover)
+                        heapq.heappush(queue, (reduced, target))
+
+            if sink_from is None:
+                return None
+
+            # Keep reduced costs non-negative for the next insertion. Shifting
+            # all potentials by the sink label changes no reduced cost, so the
+            # sink stays at potential 0 and only settled workshops move.
+            for workshop in popped:
+                potential[workshop] += label[workshop] - sink_label
+
+            # Apply the moves along the path
+            load[sink_from] += 1
+            changed = set()
+            node = sink_from
+            while node is not None:
+                source, mover = previous[node]
+                sets[mover].add(node)
+                members[node].setdefault(weights[mover].get(node, 0), {})[mover] = None
+                if source is not None:
+                    sets[mover].discard(source)
+                    del members[source][weights[mover].get(source, 0)][mover]
+                changed.add(mover)
+                node = source
+            for mover in changed:
+                refresh(mover)
+
+    return [sorted(chosen) for chosen in sets]
+
+
+class FlowOptimizer(WorkshopOptimizer):
+    """Solves day-symmetric problems as a min-cost flow.
+
+    Without a day index, the allocation is a transportation problem, so the
+    flow solution has the same objective as the MIP. The days are then
+    assigned by edge colouring. Other problems, friend groups and the
+    lexicographic and maxmin modes are handed to the full day-indexed model.
+    """
+
+    # One flow solve is much faster than a process pool over the components
+    DECOMPOSABLE = False
+
+    def optimize(self) -> OptimizationResult:
+        """
+        Run the optimization algorithm.
+
+        Returns:
+            OptimizationResult with assignments and statistics
+        """
+        if not self._is_day_symmetric() or self.objective_mode != 'weighted' or self.groups:
+            return super().optimize()
+
+        try:
+            index = {workshop: i for i, workshop in enumerate(self.workshops)}
+            weights = [
+                {index[workshop]: weight for workshop, weight in self._wished_workshops(student).items()}
+                for student in self.students
+            ]
+            capacity = [
+                self.capacities[workshop, 0] and self.capacities[workshop, 0] * self.num_days
+                for workshop in self.workshops
+            ]
+            if self.num_days > len(self.workshops):
+                chosen = None
+            else:
+                chosen = assign_workshop_sets(weights, len(self.workshops), self.num_days, capacity)
+
+            if chosen is None:
+                return OptimizationResult(
+                    assignments={},
+                    statistics={},
+                    success=False,
+                    message="Optimierung fehlgeschlagen: Infeasible"
+                )
+
+            workshop_sets = {
+                student['id']: [self.workshops[i] for i in workshop_indices]
+                for student, workshop_indices in zip(self.students, chosen)
+            }
+            schedules = schedule_days(workshop_sets, self.num_days)
+            assignments = {student['id']: schedules[student['id']] for student in self.students}
+
+            statistics = self._calculate_statistics(assignments)
+            statistics['model_size'] = {
+                'nodes': len(self.students) + len(self.workshops) + 2,
+                'arcs': len(self.students) * (len(self.workshops) + 1) + len(self.workshops)
+            }
+            return OptimizationResult(
+                assignments=assignments,
+                statistics=statistics,
+                success=True,
+                message="Optimierung erfolgreich abgeschlossen"
+            )
+
+        except Exception as e:
+            return OptimizationResult(
+                assignments={},
+                statistics={},
+                success=False,
+                message=f"Fehler bei der Optimierung: {str(e)}"
+            )
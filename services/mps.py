@@ -0,0 +1,147 @@
+"""
+Model and solution files for the CBC binary.
+Streams MatrixModel arrays into free MPS files and reads solution files back into arrays.
+"""
+import warnings
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+
+from services.matrix_model import MatrixModel
+
+# Columns, rows or values formatted per write. Bounds the text held in memory
+# to a few megabytes, independent of the model size.
+CHUNK_SIZE = 10000
+
+
+def _chunks(length: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    for begin in range(0, length, chunk_size):
+        yield begin, min(begin + chunk_size, length)
+
+
+def write_mps(model: MatrixModel, path: str, chunk_size: int = CHUNK_SIZE):
+    """Write a model as free MPS file.
+
+    Columns are named C<j> and rows R<i> after their index, so CBC's
+    solution file maps straight back to array positions. All columns are
+    integer. The file is written chunk by chunk; apart from the model
+    arrays only one chunk of text is held in memory.
+
+    Raises:
+        ValueError: If a row has no finite bound
+    """
+    lower, upper = model.row_lower, model.row_upper
+    if np.any(np.isinf(lower) & np.isinf(upper)):
+        raise ValueError("Zeile ohne Schranke im Modell")
+    equal = lower == upper
+    less = ~equal & np.isfinite(upper)
+    sense = np.where(equal, 'E', np.where(less, 'L', 'G'))
+    rhs = np.where(np.isfinite(upper), upper, lower)
+    ranged = less & np.isfinite(lower)
+
+    # Column order of the matrix entries; the sorted entries are only
+    # gathered chunk by chunk
+    order = np.argsort(model.columns, kind='stable')
+    starts = np.zeros(model.num_columns + 1, dtype=np.int64)
+    np.cumsum(np.bincount(model.columns, minlength=model.num_columns), out=starts[1:])
+    with open(path, 'w') as mps:
+        mps.write("NAME ALLOCATION FREE\nROWS\n N OBJ\n")
+        for begin, end in _chunks(model.num_rows, chunk_size):
+            mps.writelines(map(" {} R{}\n".format, sense[begin:end].tolist(), range(begin, end)))
+
+        mps.write("COLUMNS\n MARKER 'MARKER' 'INTORG'\n")
+        for begin, end in _chunks(model.num_columns, chunk_size):
+            # Objective entry first, then the matrix entries of each column
+            entries = order[starts[begin]:starts[end]]
+            objective = model.objective[begin:end]
+            with_objective = np.nonzero(objective)[0]
+            columns = np.concatenate([
+                begin + with_objective,
+                np.repeat(np.arange(begin, end), np.diff(starts[begin:end + 1]))
+            ])
+            rows = np.concatenate([np.full(len(with_objective), -1), model.rows[entries]])
+            coefficients = np.concatenate([objective[with_objective], model.values[entries]])
+            chunk_order = np.argsort(columns, kind='stable')
+            mps.writelines(map(
+                " C{} {} {:.12g}\n".format,
+                columns[chunk_order].tolist(),
+                ['OBJ' if row < 0 else f'R{row}' for row in rows[chunk_order].tolist()],
+                coefficients[chunk_order].tolist()
+            ))
+        mps.write(" MARKER 'MARKER' 'INTEND'\n")
+
+        mps.write("RHS\n")
+        _write_entries(mps, " RHS R{} {:.12g}\n", np.nonzero(rhs)[0], rhs, chunk_size)
+        if ranged.any():
+            mps.write("RANGES\n")
+            _write_entries(mps, " RNG R{} {:.12g}\n", np.nonzero(ranged)[0], upper - lower, chunk_size)
+
+        mps.write("BOUNDS\n")
+        column_lower, column_upper = model.column_lower, model.column_upper
+        bounded_below = np.nonzero(np.isfinite(column_lower) & (column_lower != 0))[0]
+        _write_entries(mps, " LO BND C{} {:.12g}\n", bounded_below, column_lower, chunk_size)
+        _write_entries(mps, " MI BND C{}\n", np.nonzero(np.isinf(column_lower))[0], None, chunk_size)
+        bounded_above = np.nonzero(np.isfinite(column_upper))[0]
+        _write_entries(mps, " UP BND C{} {:.12g}\n", bounded_above, column_upper, chunk_size)
+        _write_entries(mps, " PL BND C{}\n", np.nonzero(np.isinf(column_upper))[0], None, chunk_size)
+        mps.write("ENDATA\n")
+
+
+def _write_entries(
+    mps,
+    line: str,
+    indices: np.ndarray,
+    values: Optional[np.ndarray],
+    chunk_size: int
+):
+    """Write one line per index, with the value at that index if values are given."""
+    for begin, end in _chunks(len(indices), chunk_size):
+        chunk = indices[begin:end]
+        if values is None:
+            mps.writelines(map(line.format, chunk.tolist()))
+        else:
+            mps.writelines(map(line.format, chunk.tolist(), values[chunk].tolist()))
+
+
+def write_start(path: str, start: np.ndarray, chunk_size: int = CHUNK_SIZE):
+    """Write a start solution for CBC's -mips option.
+
+    Uses the layout of a CBC solution file, which is what -mips reads.
+    """
+    with open(path, 'w') as mst:
+        mst.write("Stopped on time - objective value 0\n")
+        for begin, end in _chunks(len(start), chunk_size):
+            mst.writelines(map(
+                "{0} C{0} {1:.12g} 0\n".format, range(begin, end), start[begin:end].tolist()
+            ))
+
+
+def read_solution(path: str, num_columns: int) -> Tuple[Optional[np.ndarray], bool, str]:
+    """Read a CBC solution file of a model written by write_mps.
+
+    Every line holds the column index, name, value and reduced cost; CBC
+    marks infeasible entries with '**'. Only the index and value are
+    parsed, by NumPy's text reader, so the file is never split into Python
+    strings per field. Columns CBC does not list are zero.
+
+    Returns:
+        Column values (None without a feasible solution), whether they are
+        proven optimal, and the status in pulp's wording
+    """
+    with open(path) as solution_file:
+        words = solution_file.readline().split()
+        if not words or words[0] in ('Infeasible', 'Integer', 'Unbounded'):
+            return None, False, 'Infeasible' if words else 'Undefined'
+        # A stopped run without integer solution reports its relaxation
+        if words[0] != 'Optimal' and ('objective' not in words or 'integer' in words):
+            return None, False, 'Not Solved'
+        with warnings.catch_warnings():
+            # An all-zero solution leaves no lines to read
+            warnings.simplefilter('ignore', UserWarning)
+            entries = np.loadtxt(
+                (line.replace('**', '  ') for line in solution_file),
+                usecols=(0, 2), ndmin=2
+            )
+    values = np.zeros(num_columns)
+    values[entries[:, 0].astype(np.int64)] = entries[:, 1]
+    return values, words[0] == 'Optimal', 'Optimal'
@@ -1,23 +1,103 @@
 """Optimization service - handles workshop assignment optimization."""
+import itertools
+import multiprocessing
+import os
+import threading
 import time
-from typing import List, Dict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-from services.optimizer import WorkshopOptimizer
-from models import Student, OptimizationResult
+from services.decomposition import friend_groups, split_components
+from services.optimizer import OptimizationResult as RawResult, WorkshopOptimizer
+from services.two_phase import TwoPhaseOptimizer
+from services.min_cost_flow import FlowOptimizer
+from services.heuristic import HeuristicOptimizer
+from services.lagrangian import LagrangianOptimizer
+from services.pareto import ParetoOptimizer
+from services.mechanisms import DeferredAcceptanceOptimizer, SerialDictatorshipOptimizer
+from services.lottery import LotteryReport, LotterySampler
+from services.result_cache import ResultCache, result_key
+from services.solvers import Incumbent, available_solvers
+from models import Student, OptimizationResult, Workshop
+
+
+def _optimize_component(engine: type, students: List[Dict], workshops: List[str], config: dict,
+                        index: int, incumbents, stop) -> RawResult:
+    """Optimize one component in a worker process.
+
+    Improved solutions go to the incumbents queue as (index, Incumbent);
+    stop is a shared event.
+    """
+    optimizer = engine(students=students, workshops=workshops, config=config)
+    optimizer.on_incumbent = lambda incumbent: incumbents.put((index, incumbent))
+    optimizer.stop_event = stop
+    return optimizer.optimize()
+
+
+def _optimize_config(students: List[Student], workshops: List[str], config: dict,
+                     time_limit: Optional[float], cache: Optional[ResultCache],
+                     stop) -> OptimizationResult:
+    """Run one configuration of a sweep in a worker process."""
+    return OptimizationService(cache).optimize(
+        students, workshops, config, time_limit=time_limit, stop_event=stop
+    )
+
+
+def parameter_grid(base: dict, options: Dict[str, List[Any]]) -> List[dict]:
+    """Build every combination of parameter values on top of a base configuration.
+
+    Example: parameter_grid(config, {'max_participants_per_workshop': [15, 18, 20, 25],
+    'keep_classes_together': ['ja', 'egal']}) gives eight configurations.
+
+    Args:
+        base: Configuration the values are applied to
+        options: Values to try per parameter
+
+    Returns:
+        One configuration per combination, the last parameter varying fastest
+    """
+    names = list(options)
+    return [
+        {**base, **dict(zip(names, values))}
+        for values in itertools.product(*(options[name] for name in names))
+    ]
 
 
 class OptimizationService:
     """Service for running optimization - wraps WorkshopOptimizer."""
 
-    def __init__(self):
+    # Available optimization engines, selected via config['engine']
+    ENGINES = {
+        'mip': WorkshopOptimizer,
+        'two_phase': TwoPhaseOptimizer,
+        'flow': FlowOptimizer,
+        'heuristic': HeuristicOptimizer,
+        'lagrangian': LagrangianOptimizer,
+        'pareto': ParetoOptimizer,
+        'deferred_acceptance': DeferredAcceptanceOptimizer,
+        'serial_dictatorship': SerialDictatorshipOptimizer,
+    }
+
+    def __init__(self, cache: Optional[ResultCache] = None):
+        """
+        Args:
+            cache: Stores results of finished runs; None = always solve
+        """
         self.optimizer = None
+        self.cache = cache
+        # Problem solved by self.optimizer apart from the wish weights, if it can be reused
+        self._reusable = None
         self._last_result: OptimizationResult = None
 
     def optimize(
         self,
         students: List[Student],
         workshops: List[str],
-        config: dict
+        config: dict,
+        time_limit: Optional[float] = None,
+        mip_gap: Optional[float] = None,
+        on_incumbent: Optional[Callable[[Incumbent], None]] = None,
+        stop_event: Optional[threading.Event] = None
     ) -> OptimizationResult:
         """Run optimization with given students, workshops, and parameters.
 
@@ -25,6 +105,10 @@ class OptimizationService:
             students: List of Student objects
             workshops: List of workshop names
             config: Configuration dictionary with parameters
+            time_limit: Seconds after which the best solution so far is used
+            mip_gap: Relative gap to the bound at which a solution is good enough
+            on_incumbent: Called with every improved solution (from the solver thread)
+            stop_event: Set it to stop and use the best solution so far
 
         Returns:
             OptimizationResult with assignments and statistics
@@ -32,17 +116,55 @@ class OptimizationService:
         # Convert Student objects back to dicts for the optimizer
         student_dicts = [student.to_dict() for student in students]
 
-        # Create optimizer
-        self.optimizer = WorkshopOptimizer(
-            students=student_dicts,
-            workshops=workshops,
-            config=config
-        )
+        config = dict(config)
+        if time_limit is not None:
+            config['time_limit'] = time_limit
+        if mip_gap is not None:
+            config['mip_gap'] = mip_gap
+
+        key = None
+        if self.cache is not None:
+            key = result_key(student_dicts, workshops, config)
+            cached = self.cache.get(key)
+            if cached is not None:
+                cached.statistics['cache'] = self._cache_info(hit=True)
+                self._last_result = cached
+                return cached
+
+        engine = self._select_engine(config)
+        problem = (engine, student_dicts, list(workshops),
+                   {name: value for name, value in config.items() if name != 'wish_weights'})
 
-        # Run optimization and measure time
         start_time = time.time()
-        raw_result = self.optimizer.optimize()
+        components = []
+        if problem == self._reusable:
+            # Only the wish weights changed: solve the model of the last run again
+            self.optimizer.on_incumbent = on_incumbent
+            self.optimizer.stop_event = stop_event
+            raw_result = self.optimizer.reoptimize(
+                config.get('wish_weights', self.optimizer.wish_weights)
+            )
+        else:
+            # Create optimizer
+            self.optimizer = engine(
+                students=student_dicts,
+                workshops=workshops,
+                config=config
+            )
+            self.optimizer.on_incumbent = on_incumbent
+            self.optimizer.stop_event = stop_event
+
+            # Run optimization and measure time
+            components = self._split(engine, student_dicts, workshops, config)
+            if len(components) > 1:
+                raw_result = self._optimize_components(
+                    engine, components, config, on_incumbent, stop_event
+                )
+            else:
+                raw_result = self.optimizer.optimize()
         execution_time = time.time() - start_time
+        # Components are solved in other processes, which keep no model
+        self._reusable = problem if raw_result.success and len(components) <= 1 else None
 
         # Wrap in our model
         result = OptimizationResult(
@@ -53,9 +175,340 @@ class OptimizationService:
             execution_time=execution_time
         )
 
+        # Results of stopped runs and of runs that ended on time_limit or
+        # mip_gap depend on timing, so only proven optima are kept
+        if key is not None:
+            stopped = stop_event is not None and stop_event.is_set()
+            if (result.success and not stopped and
+                    result.statistics.get('solver', {}).get('optimal', True)):
+                self.cache.put(key, result)
+            result.statistics['cache'] = self._cache_info(hit=False)
+
         self._last_result = result
         return result
 
+    def _cache_info(self, hit: bool) -> Dict:
+        """Cache report for the statistics of a result."""
+        return {'hit': hit, **self.cache.metrics}
+
+    def get_cache_metrics(self) -> Dict[str, int]:
+        """Get hits, misses, stores and evictions of the result cache."""
+        if self.cache is None:
+            return {}
+        return dict(self.cache.metrics)
+
+    def _select_engine(self, config: dict) -> type:
+        """Pick the optimizer class for a configuration.
+
+        'auto' uses the min-cost flow engine, which solves day-symmetric
+        configurations without an LP solver and hands all others to the full
+        model itself.
+        """
+        engine = config.get('engine', 'auto')
+        if engine == 'auto':
+            return FlowOptimizer
+        return self.ENGINES[engine]
+
+    def _split(
+        self,
+        engine: type,
+        students: List[Dict],
+        workshops: List[str],
+        config: dict
+    ) -> List[Tuple[List[Dict], List[str]]]:
+        """Split the problem into independent components if that is allowed.
+
+        The lowest score of the maxmin objective is shared by all
+        components, so that problem is solved as a whole. The spare seat
+        argument of split_components needs one capacity for all workshops
+        and days and no workshop that may be cancelled, so per-workshop
+        capacities and minimum sizes are not split either. A friend group
+        moved out of a workshop needs several seats at once, and its members
+        may wish workshops of different components, so problems with friend
+        groups stay whole as well.
+        """
+        if (not config.get('decompose', True) or not engine.DECOMPOSABLE or
+                config.get('keep_classes_together', 'egal') != 'egal' or
+                config.get('objective', 'weighted') == 'maxmin' or
+                config.get('workshop_capacities') or config.get('workshop_minimums') or
+                (config.get('keep_partners_together', True) and friend_groups(students))):
+            return [(students, workshops)]
+        return split_components(
+            students, workshops, config.get('num_days', 3),
+            config.get('max_participants_per_workshop')
+        )
+
+    def _optimize_components(
+        self,
+        engine: type,
+        components: List[Tuple[List[Dict], List[str]]],
+        config: dict,
+        on_incumbent: Optional[Callable[[Incumbent], None]],
+        stop_event: Optional[threading.Event]
+    ) -> RawResult:
+        """Optimize every component in a process pool and merge the results.
+
+        Improved solutions of the components are combined into one as soon
+        as every component has one; a stop request reaches all components.
+        """
+        latest = {}
+
+        def forward(incumbents):
+            while not incumbents.empty():
+                index, incumbent = incumbents.get()
+                latest[index] = incumbent
+                if on_incumbent is not None and len(latest) == len(components):
+                    bounds = [known.bound for known in latest.values()]
+                    on_incumbent(Incumbent(
+                        objective=sum(known.objective for known in latest.values()),
+                        bound=None if None in bounds else sum(bounds),
+                        elapsed=max(known.elapsed for known in latest.values())
+                    ))
+
+        workers = min(len(components), os.cpu_count() or 1)
+        with multiprocessing.Manager() as manager:
+            incumbents = manager.Queue()
+            stop = manager.Event()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(
+                        _optimize_component, engine, students, workshops, config, index,
+                        incumbents, stop
+                    )
+                    for index, (students, workshops) in enumerate(components)
+                ]
+                pending = set(futures)
+                while pending:
+                    _, pending = wait(pending, timeout=0.1)
+                    if stop_event is not None and stop_event.is_set():
+                        stop.set()
+                    forward(incumbents)
+                results = [future.result() for future in futures]
+            forward(incumbents)
+        return self._merge_results(results, components)
+
+    def _merge_results(
+        self,
+        results: List[RawResult],
+        components: List[Tuple[List[Dict], List[str]]]
+    ) -> RawResult:
+        """Combine the results of all components into one result."""
+        failed = next((result for result in results if not result.success), None)
+        if failed is not None:
+            return RawResult(assignments={}, statistics={}, success=False, message=failed.message)
+
+        assignments = {}
+        for result in results:
+            assignments.update(result.assignments)
+        assignments = {student['id']: assignments[student['id']] for student in self.optimizer.students}
+        statistics = self.optimizer._calculate_statistics(assignments)
+        for key in ('model_size', 'presolve'):
+            parts = [result.statistics[key] for result in results if key in result.statistics]
+            if parts:
+                statistics[key] = {name: sum(part[name] for part in parts) for name in parts[0]}
+        solver_infos = [result.statistics['solver'] for result in results
+                        if 'solver' in result.statistics]
+        if solver_infos:
+            statistics['solver'] = self._merge_solver_info(solver_infos)
+        # Heuristic engines report their objective and bound; both add up over components
+        if all('upper_bound' in result.statistics for result in results):
+            objective = sum(result.statistics['objective'] for result in results)
+            upper_bound = sum(result.statistics['upper_bound'] for result in results)
+            statistics['objective'] = objective
+            statistics['upper_bound'] = upper_bound
+            statistics['gap'] = (upper_bound - objective) / upper_bound if upper_bound > 0 else 0.0
+        lagrangian = [result.statistics['lagrangian'] for result in results
+                      if result.statistics.get('lagrangian')]
+        if lagrangian:
+            statistics['lagrangian'] = {
+                'bound': sum(info['bound'] for info in lagrangian),
+                'iterations': max(info['iterations'] for info in lagrangian),
+                'profiles': sum(info['profiles'] for info in lagrangian),
+                'time': sum(info['time'] for info in lagrangian),
+                'fallback': any(info['fallback'] for info in lagrangian)
+            }
+        statistics['components'] = [
+            {'students': len(students), 'workshops': len(workshops), 'message': result.message}
+            for (students, workshops), result in zip(components, results)
+        ]
+
+        # A component that stopped early decides the message
+        message = next(
+            (result.message for result in results
+             if not result.statistics.get('solver', {}).get('optimal', True)),
+            results[0].message
+        )
+        return RawResult(assignments=assignments, statistics=statistics, success=True, message=message)
+
+    @staticmethod
+    def _merge_solver_info(infos: List[Dict]) -> Dict:
+        """Combine the solver reports of independent components."""
+        def total(key):
+            values = [info.get(key) for info in infos]
+            return None if None in values else sum(values)
+
+        first_incumbent = [info.get('time_to_first_incumbent') for info in infos]
+        return {
+            'solver': infos[0].get('solver'),
+            'status': next(
+                (info.get('status') for info in infos if not info.get('optimal')),
+                infos[0].get('status')
+            ),
+            'warm_start': any(info.get('warm_start') for info in infos),
+            'heuristic_time': total('heuristic_time'),
+            'solve_time': total('solve_time'),
+            'time_to_first_incumbent': None if None in first_incumbent else max(first_incumbent),
+            'solves': total('solves'),
+            'objective': total('objective'),
+            'bound': total('bound'),
+            'optimal': all(info.get('optimal') for info in infos)
+        }
+
+    def sweep(
+        self,
+        students: List[Student],
+        workshops: List[str],
+        configs: List[dict],
+        time_limit: Optional[float] = None,
+        on_result: Optional[Callable[[int, OptimizationResult], None]] = None,
+        stop_event: Optional[threading.Event] = None,
+        max_workers: Optional[int] = None
+    ) -> List[Dict]:
+        """Optimize several configurations in a process pool and compare them.
+
+        Args:
+            students: List of Student objects
+            workshops: List of workshop names
+            configs: Configurations to run, e.g. from parameter_grid
+            time_limit: Seconds per run after which its best solution is used
+            on_result: Called with (index into configs, result) as every run finishes
+            stop_event: Set it to end running runs early and skip the others
+            max_workers: Number of processes, default one per CPU
+
+        Returns:
+            One comparison row per configuration, in the order of configs
+        """
+        results: List[Optional[OptimizationResult]] = [None] * len(configs)
+        if not configs:
+            return []
+
+        workers = min(len(configs), max_workers or os.cpu_count() or 1)
+        with multiprocessing.Manager() as manager:
+            stop = manager.Event()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    pool.submit(
+                        _optimize_config, students, workshops, config, time_limit, self.cache, stop
+                    ): index
+                    for index, config in enumerate(configs)
+                }
+                pending = set(futures)
+                while pending:
+                    done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    if stop_event is not None and stop_event.is_set() and not stop.is_set():
+                        stop.set()
+                        for future in pending:
+                            future.cancel()
+                    for future in done:
+                        if future.cancelled():
+                            continue
+                        index = futures[future]
+                        try:
+                            results[index] = future.result()
+                        except Exception as e:
+                            results[index] = OptimizationResult(
+                                success=False, assignments={}, statistics={},
+                                message=f"Fehler bei der Optimierung: {str(e)}"
+                            )
+                        if on_result is not None:
+                            on_result(index, results[index])
+        return self._comparison_table(configs, results)
+
+    def lottery(
+        self,
+        students: List[Student],
+        workshops: List[str],
+        config: dict,
+        draws: int = 2000,
+        stop_event: Optional[threading.Event] = None,
+        max_workers: Optional[int] = None
+    ) -> LotteryReport:
+        """Estimate how likely every student gets each wish under random serial dictatorship.
+
+        Args:
+            students: List of Student objects
+            workshops: List of workshop names
+            config: Configuration dictionary; uses num_days,
+                max_participants_per_workshop, workshop_capacities and seed
+            draws: Number of lotteries to sample
+            stop_event: Set it to report on the lotteries sampled so far
+            max_workers: Number of processes, default one per CPU
+
+        Returns:
+            LotteryReport with probabilities and confidence intervals
+
+        Raises:
+            ValueError: If workshop_minimums are set; the samples do not
+                cancel workshop-days as SerialDictatorshipOptimizer does
+        """
+        minimums = config.get('workshop_minimums') or {}
+        if any(minimum and minimum > 1 for minimum in minimums.values()):
+            raise ValueError(
+                "Die Lotterie-Schätzung unterstützt keine Mindestgrößen (workshop_minimums)"
+            )
+        sampler = LotterySampler(
+            config.get('num_days', 3), config.get('max_participants_per_workshop'),
+            draws=draws, seed=config.get('seed', 0), max_workers=max_workers,
+            workshop_capacities=config.get('workshop_capacities')
+        )
+        return sampler.run(students, workshops, stop_event)
+
+    @staticmethod
+    def _comparison_table(
+        configs: List[dict],
+        results: List[Optional[OptimizationResult]]
+    ) -> List[Dict]:
+        """One row per configuration with the parameters that differ between them."""
+        varying = [
+            name for name in dict.fromkeys(name for config in configs for name in config)
+            if any(config.get(name) != configs[0].get(name) for config in configs)
+        ]
+
+        def label(config):
+            parts = []
+            for name in varying:
+                value = config.get(name)
+                if isinstance(value, dict):
+                    value = '/'.join(str(part) for part in value.values())
+                parts.append(f"{name}={value}")
+            return ', '.join(parts) or 'Standard'
+
+        rows = []
+        for index, (config, result) in enumerate(zip(configs, results)):
+            row = {'Nr.': index + 1, 'Konfiguration': label(config)}
+            if result is None:
+                row.update({'Erfolgreich': False, 'Meldung': 'Abgebrochen'})
+                rows.append(row)
+                continue
+            statistics = result.statistics
+            row.update({
+                'Erfolgreich': result.success,
+                'Zufriedenheitsrate': round(result.get_satisfaction_rate(), 1),
+                '1. Wunsch': statistics.get('wunsch1_count', 0),
+                '2. Wunsch': statistics.get('wunsch2_count', 0),
+                '3. Wunsch': statistics.get('wunsch3_count', 0),
+                '4. Wunsch': statistics.get('wunsch4_count', 0),
+                'Kein Wunsch': statistics.get('other_count', 0),
+                'Laufzeit (s)': round(result.execution_time, 2),
+                'Meldung': result.message
+            })
+            rows.append(row)
+        return rows
+
+    def get_available_solvers(self) -> List[str]:
+        """Get the names of the solver backends installed here."""
+        return available_solvers()
+
     def get_last_result(self) -> OptimizationResult:
         """Get the last optimization result."""
         return self._last_result
@@ -73,10 +526,22 @@ class OptimizationService:
         """
         num_students = len(students)
         num_days = config.get('num_days', 3)
-        max_participants = config.get('max_participants_per_workshop')
+        max_participants = config.get('max_participants_per_workshop') or None
+        capacities = config.get('workshop_capacities') or {}
+        minimums = config.get('workshop_minimums') or {}
 
+        # Seats of every workshop per day; nobody attends a workshop twice
+        seats = {}
+        for workshop in workshops:
+            details = Workshop.from_setting(
+                workshop, capacities.get(workshop, max_participants), max_participants
+            )
+            seats[workshop] = [
+                num_students if details.capacity(day) is None else details.capacity(day)
+                for day in range(num_days)
+            ]
         total_slots = num_students * num_days
-        capacity_per_day = len(workshops) * (max_participants or num_students)
+        capacity_per_day = sum(map(sum, seats.values())) // max(num_days, 1)
 
         # Count workshop demand
         workshop_demand = {}
@@ -92,14 +557,16 @@ class OptimizationService:
         for workshop in workshops:
             demand = workshop_demand.get(workshop, 0)
 
-            if max_participants and demand > max_participants:
+            capacity = max(seats[workshop], default=0)
+            if capacity < num_students and demand > capacity:
                 popular_workshops.append({
                     'name': workshop,
                     'demand': demand,
-                    'capacity': max_participants
+                    'capacity': capacity
                 })
 
-            if demand < 3:  # Arbitrary threshold
+            # Without a minimum size an arbitrary threshold
+            if demand < (minimums.get(workshop) or 3):
                 underbooked_workshops.append({
                     'name': workshop,
                     'demand': demand
@@ -111,7 +578,7 @@ class OptimizationService:
             'num_workshops': len(workshops),
             'total_slots': total_slots,
             'capacity_per_day': capacity_per_day,
-            'is_feasible': total_slots <= capacity_per_day * num_days,
+            'is_feasible': total_slots <= sum(map(sum, seats.values())),
             'popular_workshops': popular_workshops,
             'underbooked_workshops': underbooked_workshops,
             'workshop_demand': workshop_demand
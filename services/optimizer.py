@@ -2,10 +2,25 @@
 Optimization module for workshop allocation.
 Uses linear programming to maximize student satisfaction.
 """
-from typing import Dict, List, Tuple
+import math
+import threading
+import time
+from collections import Counter
+from itertools import combinations
+from dataclasses import replace
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
 import pulp
 from dataclasses import dataclass
 
+from models import Workshop
+from services.decomposition import friend_groups
+from services.matrix_model import AllocationMatrix, MatrixModel, Reduction
+from services.scheduling import color_bipartite_edges
+from services.solvers import (
+    Incumbent, SolveMetrics, SolveOptions, SolverBackend, get_solver, objective_value
+)
+
 
 @dataclass
 class OptimizationResult:
@@ -16,9 +31,17 @@ class OptimizationResult:
     message: str
 
 
+def _shifted(value: Optional[float], offset: float) -> Optional[float]:
+    """Add an objective offset to a value that may be unknown."""
+    return None if value is None else value + offset
+
+
 class WorkshopOptimizer:
     """Optimizes student-workshop assignments using linear programming."""
 
+    # Independent components may be optimized separately and merged
+    DECOMPOSABLE = True
+
     def __init__(self, students: List[Dict], workshops: set, config: Dict):
         """
         Initialize optimizer.
@@ -28,11 +51,50 @@ class WorkshopOptimizer:
             workshops: Set of available workshop names
             config: Configuration dictionary with optimization parameters
         """
+        self.config = config
         self.students = students
         self.workshops = list(workshops)
         self.num_days = config.get('num_days', 3)
         self.max_participants = config.get('max_participants_per_workshop')
+        # Participants per (workshop, day), None = unlimited, 0 = the workshop
+        # does not take place; workshop_capacities overrides the global
+        # value for single workshops or days
+        self.capacities = self._capacity_table(config.get('workshop_capacities') or {})
+        # Fewest participants per workshop for it to take place on a day;
+        # the model cancels workshop-days that would stay below
+        minimums = config.get('workshop_minimums') or {}
+        self.minimums = {
+            workshop: minimums[workshop] for workshop in self.workshops if minimums.get(workshop)
+        }
         self.keep_classes_together = config.get('keep_classes_together', 'egal')
+        # Objective weight of every (class, workshop, day) group: a penalty
+        # with 'ja', a bonus with 'nein'
+        self.class_weight = config.get('class_weight', 1)
+        # Groups of students who named each other as partners; the model
+        # gives all members of a group the same workshops every day
+        self.keep_partners_together = config.get('keep_partners_together', True)
+        self.groups = friend_groups(students) if self.keep_partners_together else []
+        # Sparse mode only creates variables for wished workshops and routes
+        # all other placements through aggregated fallback seats
+        self.sparse_model = config.get('sparse_model', True)
+        # Students with identical wishes share integer variables
+        self.aggregate_cohorts = config.get('aggregate_cohorts', True)
+        # Start the solver from a heuristic solution
+        self.warm_start = config.get('warm_start', True)
+        # Solver backend ('auto', 'cbc', 'highs', 'cpsat') and its limits
+        self.solver_name = config.get('solver', 'auto')
+        self.threads = config.get('threads')
+        self.time_limit = config.get('time_limit')
+        self.mip_gap = config.get('mip_gap')
+        # Assemble the model as NumPy arrays when the solver accepts them
+        self.matrix_model = config.get('matrix_model', True)
+        # Pin students whose best schedule is optimal anyway and reduce the
+        # model before solving
+        self.presolve = config.get('presolve', True)
+        # 'weighted' maximises the weighted wishes, 'lexicographic' the number
+        # of first wishes, then of second wishes, and so on, 'maxmin' the
+        # lowest score of a student, then the weighted wishes
+        self.objective_mode = config.get('objective', 'weighted')
         self.wish_weights = config.get('wish_weights', {
             'wunsch1': 10,
             'wunsch2': 5,
@@ -41,7 +103,44 @@ class WorkshopOptimizer:
         })
 
         self.problem = None
+        self.matrix = None
+        self._solution = None
+        self._start_vector = None
+        self.cohorts = []
         self.variables = {}
+        self.fallback_variables = {}
+        self.fallback_seats = {}
+        self.class_groups = {}
+        self.open_variables = {}
+        self._unseated_cohorts = set()
+        # Schedules, seats and objective of the students pinned by presolve
+        self._pinned = {}
+        self._pinned_load = {}
+        self._pinned_objective = 0.0
+        self._pinned_size = (0, 0)
+        self.presolve_info = {}
+        self.solve_info = {}
+        # Model functions, dense cohorts and assignments of the last solve,
+        # kept for reoptimize
+        self._session = None
+        self._dense_cohorts = set()
+        self._assignments = None
+        # Rows "at least count placements of a wish" of the lexicographic
+        # stages so far, (wish key, count), and the report of every stage
+        self._rank_rows = []
+        self.lexicographic_info = []
+        # Floor of the maxmin mode: whether the models get it, None while it
+        # is maximised, then the lowest score of a model student; its column
+        # or variable in the built model
+        self._floor_active = False
+        self._floor = None
+        self._floor_column = None
+        self.floor_variable = None
+        self.maxmin_info = {}
+        # Called with every improved solution while solving
+        self.on_incumbent: Optional[Callable[[Incumbent], None]] = None
+        # Once set, solving stops and the best solution so far is used
+        self.stop_event: Optional[threading.Event] = None
 
     def optimize(self) -> OptimizationResult:
         """
@@ -51,64 +150,27 @@ class WorkshopOptimizer:
             OptimizationResult with assignments and statistics
         """
         try:
-            # Create the optimization problem
-            self.problem = pulp.LpProblem("Workshop_Allocation", pulp.LpMaximize)
-
-            # Create decision variables
-            # x[student][workshop][day] = 1 if student is assigned to workshop on day, 0 otherwise
-            self.variables = {}
-            for student in self.students:
-                student_id = student['id']
-                self.variables[student_id] = {}
-                for workshop in self.workshops:
-                    self.variables[student_id][workshop] = {}
-                    for day in range(self.num_days):
-                        var_name = f"s{student_id}_w{workshop}_d{day}"
-                        self.variables[student_id][workshop][day] = pulp.LpVariable(
-                            var_name, cat='Binary'
-                        )
+            lexicographic = self.objective_mode == 'lexicographic'
+            if (lexicographic and self.num_days == 1 and self._is_day_symmetric()
+                    and not self.groups):
+                return self._make_result(self._rank_maximal_matching())
 
-            # Objective function: Maximize satisfaction based on wish priorities
-            objective = []
-            for student in self.students:
-                student_id = student['id']
-                for i in range(1, 5):
-                    wish_key = f'wunsch{i}'
-                    workshop = student.get(wish_key)
-                    if workshop and workshop in self.workshops:
-                        weight = self.wish_weights.get(wish_key, 0)
-                        # Sum over all days
-                        for day in range(self.num_days):
-                            objective.append(
-                                weight * self.variables[student_id][workshop][day]
-                            )
-
-            self.problem += pulp.lpSum(objective), "Total_Satisfaction"
-
-            # Constraints
-            self._add_constraints()
-
-            # Solve
-            solver = pulp.PULP_CBC_CMD(msg=0)  # Silent solver
-            self.problem.solve(solver)
-
-            # Extract results
-            if self.problem.status == pulp.LpStatusOptimal:
-                assignments = self._extract_assignments()
-                statistics = self._calculate_statistics(assignments)
-                return OptimizationResult(
-                    assignments=assignments,
-                    statistics=statistics,
-                    success=True,
-                    message="Optimierung erfolgreich abgeschlossen"
+            self.cohorts = self._build_cohorts()
+            if self.matrix_model and get_solver(self.solver_name).capabilities.matrix:
+                functions = (
+                    self._build_matrix_model, self._extract_matrix_assignments,
+                    self._set_matrix_start
                 )
             else:
-                return OptimizationResult(
-                    assignments={},
-                    statistics={},
-                    success=False,
-                    message=f"Optimierung fehlgeschlagen: {pulp.LpStatus[self.problem.status]}"
-                )
+                functions = (self._build_model, self._extract_assignments, self._set_initial_values)
+            if lexicographic:
+                assignments = self._solve_lexicographic(*functions)
+            elif self.objective_mode == 'maxmin':
+                assignments = self._solve_maxmin(*functions)
+            else:
+                self._presolve()
+                assignments = self._solve(*functions)
+            return self._make_result(assignments)
 
         except Exception as e:
             return OptimizationResult(
@@ -118,82 +180,1633 @@ class WorkshopOptimizer:
                 message=f"Fehler bei der Optimierung: {str(e)}"
             )
 
+    def reoptimize(self, wish_weights: Dict[str, float]) -> OptimizationResult:
+        """Solve again with new wish weights, reusing the model of the last run.
+
+        Cohorts, variables and constraints do not depend on the weights, so
+        only the objective coefficients of the built model are replaced and
+        the solver starts from the previous assignment. Students pinned by
+        presolve stay pinned if their schedule is still among their best;
+        otherwise, without a model to reuse or with another objective than
+        'weighted', this is a full optimize().
+
+        Args:
+            wish_weights: New weight per wish key
+
+        Returns:
+            OptimizationResult with assignments and statistics
+        """
+        previous = self._assignments
+        self.wish_weights = dict(wish_weights)
+        self.config = {**self.config, 'wish_weights': self.wish_weights}
+        if (self._session is None or previous is None or self.objective_mode != 'weighted'
+                or not self._repin()):
+            return self.optimize()
+
+        try:
+            assignments = self._solve(*self._session, start=previous, reuse=True)
+            return self._make_result(assignments)
+
+        except Exception as e:
+            return OptimizationResult(
+                assignments={},
+                statistics={},
+                success=False,
+                message=f"Fehler bei der Optimierung: {str(e)}"
+            )
+
+    def _repin(self) -> bool:
+        """Check that the pinned schedules are still optimal under the current weights.
+
+        Pinning does not depend on the weights except through the choice of
+        the best wishes (see _presolve), so the pins hold as long as every
+        pinned schedule is still a best one. The pinned objective is updated.
+        """
+        if any(weight < 0 for weight in self.wish_weights.values()):
+            return not self._pinned
+        by_id = {student['id']: student for student in self.students}
+        objective = 0.0
+        for student_id, schedule in self._pinned.items():
+            wished = self._wished_workshops(by_id[student_id])
+            value = sum(wished[workshop] for workshop in schedule)
+            if value < sum(sorted(wished.values(), reverse=True)[:self.num_days]) - 1e-9:
+                return False
+            objective += value
+        self._pinned_objective = objective
+        return True
+
+    def _update_objective(self):
+        """Write the current wish and class weights into the built model."""
+        if self.matrix is not None:
+            self.matrix.set_pair_weights(self._pair_weights())
+            self.matrix.set_class_weight(self.class_weight)
+            self._set_floor_objective()
+            return
+
+        # Wish variables are per day in the day-indexed model, single in the set model
+        objective = self.problem.objective
+        for cohort_index, members in enumerate(self.cohorts):
+            for workshop, weight in self._wished_workshops(members[0]).items():
+                variables = self.variables[cohort_index].get(workshop, {})
+                for var in (variables.values() if isinstance(variables, dict) else [variables]):
+                    objective[var] = weight
+        sign = -1 if self.keep_classes_together == 'ja' else 1
+        for group in self.class_groups.values():
+            objective[group] = sign * self.class_weight
+        self._set_floor_objective()
+
+    def _pair_weights(self, wish_weights: Optional[Dict[str, float]] = None) -> np.ndarray:
+        """Objective weight of every pair of the matrix model."""
+        weights = [self._wished_workshops(members[0], wish_weights) for members in self.cohorts]
+        return np.array([
+            weights[cohort].get(self.workshops[workshop], 0)
+            for cohort, workshop in zip(
+                self.matrix.pair_cohort.tolist(), self.matrix.pair_workshop.tolist()
+            )
+        ], dtype=float)
+
+    def _solve_lexicographic(
+        self,
+        build: Callable[[bool, Set[int]], None],
+        extract: Callable[[], Optional[Dict[int, List[str]]]],
+        initialize: Callable[[Dict[int, List[str]]], None]
+    ) -> Optional[Dict[int, List[str]]]:
+        """Maximise the first wishes, then the second wishes, and so on.
+
+        Every stage solves the model for the placements of one wish rank,
+        without the class term, and the count it reaches becomes a row for
+        all later stages. The model is built once: a stage only replaces the
+        objective, adds its row and starts from the assignment of the stage
+        before, which meets every row. With a class term, a last stage
+        optimizes the usual objective under all rows, which leaves only the
+        class term to improve. A stop request ends the stages early.
+        """
+        started = time.time()
+        wish_weights, class_weight = self.wish_weights, self.class_weight
+        on_incumbent = self.on_incumbent
+        self._rank_rows = []
+        self.lexicographic_info = []
+        infos = []
+        assignments = None
+        ranks = []
+        try:
+            # Pinned students get their first wishes, whatever the weights
+            self.wish_weights = {f'wunsch{i}': 5 - i for i in range(1, 5)}
+            self._presolve()
+            ranks = [
+                key for key in (f'wunsch{i}' for i in range(1, 5))
+                if any(
+                    any(self._wished_workshops(members[0], {key: 1}).values())
+                    for members in self.cohorts
+                )
+            ]
+            self.class_weight = 0
+            # Stage objectives are counts; only finished stages are reported
+            self.on_incumbent = None
+            model_students = self._model_students()
+            for key in ranks:
+                self.wish_weights = {key: 1}
+                solved = self._solve(
+                    build, extract, initialize, start=assignments, reuse=assignments is not None
+                )
+                infos.append(dict(self.solve_info))
+                if solved is None:
+                    break
+                assignments = solved
+                self._rank_rows.append((key, self._satisfaction(model_students, assignments)))
+                self._add_rank_rows(self._rank_rows[-1:])
+                self.lexicographic_info.append({
+                    'wish': key,
+                    'count': int(round(self._satisfaction(self.students, assignments))),
+                    'solve_time': infos[-1]['solve_time'],
+                    'optimal': infos[-1]['optimal']
+                })
+                if on_incumbent is not None:
+                    on_incumbent(Incumbent(
+                        self._satisfaction(self.students, assignments, wish_weights), None,
+                        time.time() - started
+                    ))
+                if self.stop_event is not None and self.stop_event.is_set():
+                    break
+        finally:
+            self.wish_weights, self.class_weight = wish_weights, class_weight
+            self.on_incumbent = on_incumbent
+
+        if infos and assignments is None:
+            return None
+        complete = len(self.lexicographic_info) == len(ranks)
+        final = complete and (not ranks or self.keep_classes_together != 'egal')
+        if final:
+            solved = self._solve(
+                build, extract, initialize, start=assignments, reuse=assignments is not None
+            )
+            infos.append(dict(self.solve_info))
+            if solved is None:
+                return None
+            assignments = solved
+
+        optimal = complete and all(info['optimal'] for info in infos)
+        self.solve_info = {
+            **infos[-1],
+            'warm_start': infos[0]['warm_start'],
+            'heuristic_time': infos[0]['heuristic_time'],
+            'time_to_first_incumbent': infos[0]['time_to_first_incumbent'],
+            'solve_time': sum(info['solve_time'] for info in infos),
+            'solves': sum(info['solves'] for info in infos),
+            'optimal': optimal
+        }
+        if not final or self._pinned:
+            # Stage objectives are counts, pins were chosen by rank
+            objective = self._satisfaction(self.students, assignments)
+            self.solve_info['objective'] = objective
+            self.solve_info['bound'] = objective if optimal else None
+        return assignments
+
+    def _add_rank_rows(self, rank_rows: List[Tuple[str, float]]):
+        """Add the rows "at least count placements of a wish" to the built model."""
+        for key, count in rank_rows:
+            if self.matrix is not None:
+                matrix = self.matrix
+                weights = self._pair_weights({key: 1})[matrix.x_pair]
+                columns = np.nonzero(weights)[0]
+                matrix.extend(
+                    objective=np.zeros(0), column_lower=np.zeros(0), column_upper=np.zeros(0),
+                    rows=np.full(len(columns), matrix.num_rows), columns=columns,
+                    values=weights[columns], row_lower=np.array([count], dtype=float),
+                    row_upper=np.array([np.inf])
+                )
+                continue
+
+            terms = []
+            for cohort_index, members in enumerate(self.cohorts):
+                for workshop, weight in self._wished_workshops(members[0], {key: 1}).items():
+                    if weight:
+                        terms.extend(
+                            weight * var
+                            for var in self.variables[cohort_index].get(workshop, {}).values()
+                        )
+            self.problem += pulp.lpSum(terms) >= count, f"rank_{key}"
+
+    def _solve_maxmin(
+        self,
+        build: Callable[[bool, Set[int]], None],
+        extract: Callable[[], Optional[Dict[int, List[str]]]],
+        initialize: Callable[[Dict[int, List[str]]], None]
+    ) -> Optional[Dict[int, List[str]]]:
+        """Maximise the lowest score of a student, then the total above that floor.
+
+        The model gets one integer floor column z and a row "score >= z" per
+        student with a valid wish (see _add_floor). z enters the objective
+        with a weight above any change the rest of the objective can make,
+        so one solve maximises the floor first and the usual objective among
+        all assignments that reach it. Without tightening, the relaxation
+        spreads contested wishes fractionally and promises floors no
+        assignment reaches; _floor_bound caps z by the wishes every
+        student needs for a floor. Students without a valid wish score
+        nothing in any assignment and do not bound the floor. Pinned
+        students get their best schedule, which costs no other student a
+        wish.
+        """
+        started = time.time()
+        on_incumbent = self.on_incumbent
+        self._floor_active = True
+        self._floor = None
+        self.maxmin_info = {}
+        self._presolve()
+        try:
+            # Objective values mix floor and total; the result is reported once
+            self.on_incumbent = None
+            assignments = self._solve(build, extract, initialize)
+        finally:
+            self.on_incumbent = on_incumbent
+        if assignments is None:
+            return None
+
+        # With the floor fixed, the objective of the model is the usual one
+        self._floor = math.floor(self._lowest_score(self._model_students(), assignments))
+        self._set_floor_objective()
+        if self.cohorts:
+            initialize(assignments)
+            if self.matrix is not None:
+                objective = self.matrix.objective_value(self._start_vector)
+            else:
+                objective = objective_value(self.problem)
+            self.solve_info['objective'] = objective + self._pinned_objective
+        optimal = self.solve_info['optimal']
+        self.solve_info['bound'] = self.solve_info['objective'] if optimal else None
+        floor = self._lowest_score(self.students, assignments)
+        self.maxmin_info = {
+            'floor': floor,
+            'at_floor': sum(
+                self._satisfaction([student], assignments) == floor
+                for student in self.students if self._wished_workshops(student)
+            )
+        }
+        if on_incumbent is not None:
+            on_incumbent(Incumbent(
+                self.solve_info['objective'], self.solve_info['bound'], time.time() - started
+            ))
+        return assignments
+
+    def _lowest_score(self, students: List[Dict], assignments: Dict[int, List[str]]) -> float:
+        """Lowest score among the given students with a valid wish (0 without any)."""
+        scores = [
+            self._satisfaction([student], assignments)
+            for student in students if self._wished_workshops(student)
+        ]
+        return min(scores, default=0.0)
+
+    def _floor_bound(self) -> float:
+        """Highest floor the capacities leave possible for the model students.
+
+        For a floor v, every student needs a set of at most num_days wished
+        workshops worth at least v (or no wish at all if v <= 0). The
+        workshops shared by all such sets of a student are needed for sure;
+        if more students need a workshop than it has seats over all days,
+        no assignment reaches v. Scores are rounded down, as z is integer.
+        """
+        options = []
+        for _, wished in self._scored_students():
+            options.append([(0.0, frozenset())] + [
+                (float(sum(wished[workshop] for workshop in workshops)), frozenset(workshops))
+                for size in range(1, self.num_days + 1)
+                for workshops in combinations(wished, size)
+            ])
+        if not options:
+            return 0.0
+        best = math.floor(min(max(value for value, _ in student) for student in options))
+        if not self._is_limited():
+            return float(best)
+
+        seats = Counter()
+        for (workshop, _), capacity in self.capacities.items():
+            seats[workshop] += math.inf if capacity is None else capacity
+        seats.subtract(Counter({
+            workshop: count for (workshop, _), count in self._pinned_load.items()
+        }))
+        levels = sorted({
+            math.floor(value) for student in options for value, _ in student if value <= best
+        }, reverse=True)
+        for level in levels:
+            needed = Counter()
+            for student in options:
+                needed.update(frozenset.intersection(*(
+                    workshops for value, workshops in student if value >= level
+                )))
+            if all(count <= seats[workshop] for workshop, count in needed.items()):
+                return float(level)
+        return float(levels[-1])
+
+    def _scored_students(self) -> List[Tuple[int, Dict[str, float]]]:
+        """Cohort and valid wishes of every model student with a valid wish.
+
+        In the maxmin mode every cohort is a single student or a friend
+        group (see _build_cohorts); the members of a group are scored on the
+        placements of their group, each with their own wishes.
+        """
+        return [
+            (cohort_index, wished)
+            for cohort_index, members in enumerate(self.cohorts)
+            for student in members[0].get('group', members)
+            for wished in [self._wished_workshops(student)] if wished
+        ]
+
+    def _add_floor(self):
+        """Add the floor column and a row "score >= floor" per student (objective 'maxmin').
+
+        The floor is a whole number of points; with fractional weights it
+        is rounded down.
+        """
+        self._floor_column = None
+        self.floor_variable = None
+        if not self._floor_active:
+            return
+        scored = self._scored_students()
+        lowest = -np.inf if any(weight < 0 for weight in self.wish_weights.values()) else 0.0
+        highest = self._floor_bound()
+
+        if self.matrix is not None:
+            matrix = self.matrix
+            # x columns of every cohort
+            column_cohort = matrix.pair_cohort[matrix.x_pair]
+            order = np.argsort(column_cohort, kind='stable')
+            starts = np.searchsorted(column_cohort[order], np.arange(len(self.cohorts) + 1))
+            rows, columns, values = [], [], []
+            for row, (cohort_index, wished) in enumerate(scored):
+                cohort_columns = order[starts[cohort_index]:starts[cohort_index + 1]]
+                weights = np.array([
+                    wished.get(self.workshops[workshop], 0)
+                    for workshop in matrix.pair_workshop[matrix.x_pair[cohort_columns]].tolist()
+                ], dtype=float)
+                used = np.nonzero(weights)[0]
+                rows.append(np.full(len(used), matrix.num_rows + row))
+                columns.append(cohort_columns[used])
+                values.append(weights[used])
+            self._floor_column = matrix.num_columns
+            matrix.extend(
+                objective=np.zeros(1),
+                column_lower=np.array([lowest]),
+                column_upper=np.array([highest]),
+                rows=np.concatenate(rows + [matrix.num_rows + np.arange(len(scored))]),
+                columns=np.concatenate(columns + [np.full(len(scored), self._floor_column)]),
+                values=np.concatenate(values + [-np.ones(len(scored))]),
+                row_lower=np.zeros(len(scored)),
+                row_upper=np.full(len(scored), np.inf)
+            )
+        else:
+            self.floor_variable = pulp.LpVariable(
+                "floor", lowBound=None if np.isinf(lowest) else lowest, upBound=highest,
+                cat='Integer'
+            )
+            for row, (cohort_index, wished) in enumerate(scored):
+                score = [
+                    weight * var
+                    for workshop, weight in wished.items()
+                    for var in self.variables[cohort_index].get(workshop, {}).values()
+                ]
+                self.problem += pulp.lpSum(score) >= self.floor_variable, f"floor_{row}"
+        self._set_floor_objective()
+
+    def _set_floor_objective(self):
+        """Put the floor first in the objective, or keep it as a bound once it is known.
+
+        The floor weight exceeds the largest value the rest of the
+        objective can take, so a higher floor always wins.
+        """
+        if self._floor_column is not None:
+            matrix = self.matrix
+            objective = matrix.objective
+            if self._floor is None:
+                objective[self._floor_column] = 0
+                weighted = np.nonzero(objective)[0]
+                objective[self._floor_column] = 1 + np.sum(
+                    np.abs(objective[weighted]) * matrix.column_upper[weighted]
+                )
+            else:
+                objective[self._floor_column] = 0
+                matrix.column_lower[self._floor_column] = self._floor
+        elif self.floor_variable is not None:
+            objective = self.problem.objective
+            if self._floor is None:
+                objective[self.floor_variable] = 1 + sum(
+                    abs(coefficient) * var.upBound
+                    for var, coefficient in objective.items()
+                    if coefficient and var is not self.floor_variable
+                )
+            else:
+                objective[self.floor_variable] = 0
+                self.floor_variable.lowBound = self._floor
+
+    def _rank_maximal_matching(self) -> Optional[Dict[int, List[str]]]:
+        """Assign one workshop per student with the best wish counts, first wishes first.
+
+        With a single day and no class term, the allocation is a bipartite
+        matching with workshop capacities. Wish k gets the weight B^(4 - k)
+        with B above the number of students, so one more first wish is worth
+        more than any number of later wishes; the maximum weight matching of
+        assign_workshop_sets is then rank-maximal. Python integers keep
+        these weights exact.
+        """
+        # Imported here because the flow engine builds on this class
+        from services.min_cost_flow import assign_workshop_sets
+
+        started = time.time()
+        index = {workshop: i for i, workshop in enumerate(self.workshops)}
+        base = len(self.students) + 1
+        weights = []
+        for student in self.students:
+            wished = {}
+            for rank in range(1, 5):
+                workshop = student.get(f'wunsch{rank}')
+                if workshop and workshop in index:
+                    wished[index[workshop]] = wished.get(index[workshop], 0) + base ** (4 - rank)
+            weights.append(wished)
+        chosen = assign_workshop_sets(
+            weights, len(self.workshops), 1, [self.capacities[workshop, 0] for workshop in self.workshops]
+        )
+
+        self.solve_info = {
+            'solver': 'rank_maximal',
+            'status': 'Optimal' if chosen is not None else 'Infeasible',
+            'warm_start': False,
+            'heuristic_time': 0.0,
+            'solve_time': time.time() - started,
+            'time_to_first_incumbent': None,
+            'solves': 1,
+            'optimal': True
+        }
+        if chosen is None:
+            return None
+        assignments = {
+            student['id']: [self.workshops[workshop] for workshop in workshop_indices]
+            for student, workshop_indices in zip(self.students, chosen)
+        }
+        self.solve_info['objective'] = self.solve_info['bound'] = self._satisfaction(
+            self.students, assignments
+        )
+        return assignments
+
+    def _satisfaction(self, students: List[Dict], assignments: Dict[int, List[str]],
+                      wish_weights: Optional[Dict[str, float]] = None) -> float:
+        """Weighted wishes the given students get in an assignment."""
+        return float(sum(
+            self._wished_workshops(student, wish_weights).get(workshop, 0)
+            for student in students for workshop in assignments[student['id']]
+        ))
+
+    def _solve(
+        self,
+        build: Callable[[bool, Set[int]], None],
+        extract: Callable[[], Optional[Dict[int, List[str]]]],
+        initialize: Callable[[Dict[int, List[str]]], None],
+        start: Optional[Dict[int, List[str]]] = None,
+        reuse: bool = False
+    ) -> Optional[Dict[int, List[str]]]:
+        """Build and solve a model until its solution can be turned into assignments.
+
+        Cohorts under the class term always get the full set of workshops.
+        If fallback placements of the sparse model cannot be seated, the
+        affected cohorts get them as well and the model is solved again. With warm start, the solver begins with a heuristic
+        solution, which is also kept when a time limit or stop request ends
+        the solve before anything better was found. Objectives and bounds
+        include the students pinned by presolve.
+
+        Args:
+            build: Creates self.problem or self.matrix (sparse, dense_cohorts)
+            extract: Reads the assignments from the solved problem
+            initialize: Sets the start of the problem to an assignment
+            start: Known assignment to start from instead of the heuristic
+            reuse: Only update the objective of the model built by the last solve
+
+        Returns:
+            Assignments per student, or None if the problem has no solution
+        """
+        started = time.time()
+        heuristic_time = 0.0
+        self._session = (build, extract, initialize)
+        if start is None and self.warm_start and self.cohorts:
+            start = self._initial_assignment()
+            if start is not None and self._pinned:
+                start = self._apply_pins(start)
+            heuristic_time = time.time() - started
+
+        self.solve_info = {
+            'warm_start': start is not None,
+            'heuristic_time': heuristic_time,
+            'solve_time': 0.0,
+            'time_to_first_incumbent': None,
+            'solves': 0,
+            'optimal': True
+        }
+        if not self.cohorts:
+            # Presolve pinned every student
+            self.solve_info['objective'] = self.solve_info['bound'] = self._pinned_objective
+            return self._assign_placements({})
+
+        pinned = self._pinned_objective
+        dense_cohorts = set(self._dense_cohorts) if reuse else self._class_term_cohorts()
+        while True:
+            sparse = self.sparse_model and len(dense_cohorts) < len(self.cohorts)
+            if reuse:
+                self._update_objective()
+                reuse = False
+            else:
+                self.matrix = None
+                build(sparse, dense_cohorts)
+            self._dense_cohorts = set(dense_cohorts)
+            start_objective = None
+            if start is not None:
+                initialize(start)
+                if self.matrix is not None:
+                    start_objective = self.matrix.objective_value(self._start_vector)
+                else:
+                    start_objective = objective_value(self.problem)
+                if self.solve_info['solves'] == 0:
+                    self._report_incumbent(
+                        Incumbent(start_objective, None, heuristic_time), 0.0, pinned
+                    )
+
+            solver = get_solver(self.solver_name)
+            model, reduction = self.matrix, None
+            if self.matrix is not None and self.presolve:
+                model, reduction = self.matrix.presolve()
+                self.presolve_info['removed_variables'] = (
+                    self._pinned_size[0] + self.matrix.num_columns - model.num_columns
+                )
+                self.presolve_info['removed_constraints'] = (
+                    self._pinned_size[1] + self.matrix.num_rows - model.num_rows
+                )
+            offset = time.time() - started
+            objective_offset = pinned + (reduction.offset if reduction is not None else 0.0)
+            options = SolveOptions(
+                threads=self.threads,
+                time_limit=self.time_limit,
+                gap=self.mip_gap,
+                warm_start=start is not None,
+                # The class groups of 'ja' make the relaxation weak; within a
+                # time limit, searching finds better solutions than cut passes
+                cuts=self.keep_classes_together != 'ja' or self.time_limit is None,
+                on_incumbent=lambda incumbent: self._report_incumbent(
+                    incumbent, offset, objective_offset
+                ),
+                stop=self.stop_event
+            )
+            if self.matrix is not None:
+                self._solution, metrics = self._solve_matrix(solver, model, reduction, options)
+            else:
+                metrics = solver.solve(self.problem, options)
+            self.solve_info['solver'] = metrics.solver
+            self.solve_info['status'] = metrics.status
+            self.solve_info['solve_time'] += metrics.solve_time
+            self.solve_info['solves'] += 1
+            self.solve_info['objective'] = _shifted(metrics.objective, pinned)
+            self.solve_info['bound'] = _shifted(metrics.bound, pinned)
+            self.solve_info['optimal'] = metrics.optimal
+            if self.solve_info['time_to_first_incumbent'] is None:
+                self.solve_info['time_to_first_incumbent'] = metrics.time_to_first_incumbent
+
+            stopped = self.stop_event is not None and self.stop_event.is_set()
+            if metrics.objective is None or (
+                    start_objective is not None and metrics.objective < start_objective - 1e-6):
+                if start is not None and (stopped or not self.solve_info['optimal']):
+                    # Ended early; the heuristic solution is the best one known
+                    self.solve_info['objective'] = start_objective + pinned
+                    self.solve_info['optimal'] = False
+                    return start
+                return None
+            assignments = extract()
+            if assignments is not None:
+                return assignments
+            if stopped:
+                self.solve_info['optimal'] = False
+                return start
+            dense_cohorts.update(self._unseated_cohorts)
+
+    def _solve_matrix(
+        self,
+        solver: SolverBackend,
+        model: Optional[MatrixModel],
+        reduction: Optional[Reduction],
+        options: SolveOptions
+    ) -> Tuple[Optional[np.ndarray], SolveMetrics]:
+        """Solve self.matrix, or its presolved form if a reduction is given.
+
+        Solutions and objectives are returned for self.matrix. A model that
+        presolve reduced to nothing is not passed to the solver.
+        """
+        if reduction is None:
+            return solver.solve_matrix(self.matrix, options, self._start_vector)
+
+        start = self._start_vector
+        if model.num_columns == 0:
+            solution = np.zeros(0)
+            metrics = SolveMetrics(
+                solver=solver.name, status='Optimal', objective=0.0, bound=0.0, solve_time=0.0,
+                time_to_first_incumbent=0.0, warm_start=False, optimal=True
+            )
+        else:
+            solution, metrics = solver.solve_matrix(
+                model, options, None if start is None else reduction.reduce(start)
+            )
+        if solution is not None:
+            solution = reduction.expand(solution)
+        return solution, replace(
+            metrics,
+            objective=_shifted(metrics.objective, reduction.offset),
+            bound=_shifted(metrics.bound, reduction.offset)
+        )
+
+    def _report_incumbent(self, incumbent: Incumbent, offset: float = 0.0,
+                          objective_offset: float = 0.0):
+        """Pass an improved solution on, timed from the start of the optimization.
+
+        objective_offset is the objective share the solver does not see.
+        """
+        if self.on_incumbent is not None:
+            self.on_incumbent(replace(
+                incumbent,
+                objective=incumbent.objective + objective_offset,
+                bound=_shifted(incumbent.bound, objective_offset),
+                elapsed=offset + incumbent.elapsed
+            ))
+
+    def _presolve(self):
+        """Take cohorts out of the model whose best schedule is optimal anyway.
+
+        A cohort is pinned to its num_days best wishes when nothing can make
+        that schedule worse for everyone else: there is no class term and no
+        workshop that may be cancelled, each of these workshops takes place
+        every day with room for all students who wished it, and every day
+        has at least (num_days - 1) * capacity + 1 free seats, capacity
+        being the largest one of the day. A
+        student without the wish who is pushed out of such a workshop then
+        always finds a free workshop they have not attended, at no loss, so
+        some optimal assignment gives every pinned cohort its best schedule.
+        The model keeps the other cohorts, with the pinned seats taken off
+        the capacity. A friend group that is pushed out needs a seat for
+        every member at once, so nothing is pinned when there are groups.
+        """
+        started = time.time()
+        self._pinned = {}
+        self._pinned_load = {}
+        self._pinned_objective = 0.0
+        self._pinned_size = (0, 0)
+        self.presolve_info = {
+            'pinned_students': 0,
+            'pinned_cohorts': 0,
+            'removed_variables': 0,
+            'removed_constraints': 0,
+            'time': 0.0
+        }
+        if (not self.presolve or self.keep_classes_together != 'egal' or self._opening_days()
+                or self.groups):
+            return
+        if any(weight < 0 for weight in self.wish_weights.values()):
+            return
+        for day in range(self.num_days):
+            capacities = [self.capacities[workshop, day] for workshop in self.workshops]
+            limited = [capacity for capacity in capacities if capacity is not None]
+            # Unlimited workshops only count once the student cannot attend them all
+            if limited and len(capacities) - len(limited) < self.num_days and (
+                    sum(limited) - len(self.students) < (self.num_days - 1) * max(limited) + 1):
+                return
+
+        wishers = Counter(
+            workshop for student in self.students for workshop in self._wished_workshops(student)
+        )
+        remaining = []
+        num_variables = num_constraints = 0
+        for members in self.cohorts:
+            wished = self._wished_workshops(members[0])
+            best = sorted(wished, key=wished.get, reverse=True)[:self.num_days]
+            if len(best) < self.num_days or not all(
+                    self._fits(workshop, day, wishers[workshop] - 1)
+                    for workshop in best for day in range(self.num_days)):
+                remaining.append(members)
+                continue
+
+            # Members start on different days to spread the seats
+            for shift, student in enumerate(members):
+                schedule = [best[(day + shift) % self.num_days] for day in range(self.num_days)]
+                self._pinned[student['id']] = schedule
+                for day, workshop in enumerate(schedule):
+                    self._pinned_load[workshop, day] = self._pinned_load.get((workshop, day), 0) + 1
+            self._pinned_objective += len(members) * sum(wished[workshop] for workshop in best)
+            # Variables and constraints the cohort would have had
+            workshops = len(wished) if self.sparse_model else len(self.workshops)
+            num_variables += (workshops + self.sparse_model) * self.num_days
+            num_constraints += self.num_days + workshops
+
+        self.presolve_info['pinned_cohorts'] = len(self.cohorts) - len(remaining)
+        self.cohorts = remaining
+        self._pinned_size = (num_variables, num_constraints)
+        self.presolve_info.update({
+            'pinned_students': len(self._pinned),
+            'removed_variables': num_variables,
+            'removed_constraints': num_constraints,
+            'time': time.time() - started
+        })
+
+    def _apply_pins(self, assignments: Dict[int, List[str]]) -> Optional[Dict[int, List[str]]]:
+        """Give the pinned students their schedule in a feasible assignment.
+
+        Students without the wish who no longer fit into a workshop move to
+        the least crowded workshop they have not attended, as in the
+        argument of _presolve; their satisfaction does not drop.
+
+        Returns:
+            The adjusted assignment, or None if a student could not be moved
+        """
+        assignments = {student_id: list(schedule) for student_id, schedule in assignments.items()}
+        assignments.update({
+            student_id: list(schedule) for student_id, schedule in self._pinned.items()
+        })
+        if not self._is_limited():
+            return assignments
+
+        occupants = {
+            (workshop, day): [] for workshop in self.workshops for day in range(self.num_days)
+        }
+        for student in self.students:
+            for day, workshop in enumerate(assignments[student['id']]):
+                occupants[workshop, day].append(student)
+        for (workshop, day), students in occupants.items():
+            for student in list(students):
+                if self._fits(workshop, day, len(occupants[workshop, day]) - 1):
+                    break
+                if workshop in self._wished_workshops(student):
+                    continue
+                schedule = assignments[student['id']]
+                options = [
+                    other for other in self.workshops
+                    if other not in schedule and self._fits(other, day, len(occupants[other, day]))
+                ]
+                if not options:
+                    return None
+                target = min(options, key=lambda other: len(occupants[other, day]))
+                occupants[workshop, day].remove(student)
+                occupants[target, day].append(student)
+                schedule[day] = target
+        return assignments
+
+    def _cancel_small_workshops(
+        self,
+        assignments: Dict[int, List[str]]
+    ) -> Optional[Dict[int, List[str]]]:
+        """Cancel the workshop-days below their minimum size in a feasible assignment.
+
+        The emptiest workshop-day below its minimum is cancelled first. Each
+        of its participants moves to the workshop of that day they wished
+        most that has room, is new to them and is not cancelled, preferring
+        workshops that need no minimum to be reached, then the least
+        crowded. Moves only add participants elsewhere, so this repeats
+        until every workshop-day is empty or at its minimum.
+
+        Returns:
+            The adjusted assignment, or None if a participant could not be moved
+        """
+        opening_days = self._opening_days()
+        if not opening_days:
+            return assignments
+        assignments = {student_id: list(schedule) for student_id, schedule in assignments.items()}
+        occupants = {
+            (workshop, day): [] for workshop in self.workshops for day in range(self.num_days)
+        }
+        for student in self.students:
+            for day, workshop in enumerate(assignments[student['id']]):
+                occupants[workshop, day].append(student)
+
+        cancelled = set()
+        while True:
+            small = [
+                key for key, minimum in opening_days.items() if 0 < len(occupants[key]) < minimum
+            ]
+            if not small:
+                return assignments
+            workshop, day = min(small, key=lambda key: len(occupants[key]))
+            cancelled.add((workshop, day))
+            for student in occupants[workshop, day]:
+                schedule = assignments[student['id']]
+                wished = self._wished_workshops(student)
+                options = [
+                    other for other in self.workshops
+                    if (other, day) not in cancelled and other not in schedule
+                    and self._fits(other, day, len(occupants[other, day]))
+                ]
+                if not options:
+                    return None
+                target = max(options, key=lambda other: (
+                    wished.get(other, 0),
+                    (other, day) not in opening_days or len(occupants[other, day]) > 0,
+                    -len(occupants[other, day])
+                ))
+                occupants[target, day].append(student)
+                schedule[day] = target
+            occupants[workshop, day] = []
+
+    def _initial_assignment(self) -> Optional[Dict[int, List[str]]]:
+        """Compute a fast feasible assignment to start the solver from.
+
+        The heuristic places students one by one and splits friend groups,
+        so with groups the solver starts without an assignment.
+        """
+        # Imported here because the heuristic builds on this class
+        from services.heuristic import HeuristicOptimizer
+
+        if self.groups:
+            return None
+
+        result = HeuristicOptimizer(self.students, self.workshops, self.config).optimize()
+        return result.assignments if result.success else None
+
+    def _set_initial_values(self, assignments: Dict[int, List[str]]):
+        """Set the variables of the day-indexed model to a known assignment."""
+        for cohort_index, members in enumerate(self.cohorts):
+            for day_vars in self.variables[cohort_index].values():
+                for var in day_vars.values():
+                    var.setInitialValue(0)
+            for var in self.fallback_variables.get(cohort_index, {}).values():
+                var.setInitialValue(0)
+        for day_vars in self.fallback_seats.values():
+            for var in day_vars.values():
+                var.setInitialValue(0)
+        for var in list(self.class_groups.values()) + list(self.open_variables.values()):
+            var.setInitialValue(0)
+
+        for cohort_index, members in enumerate(self.cohorts):
+            cohort_vars = self.variables[cohort_index]
+            for student in members:
+                for day, workshop in enumerate(assignments[student['id']]):
+                    group = (student.get('klasse', ''), workshop, day)
+                    if workshop in cohort_vars:
+                        var = cohort_vars[workshop][day]
+                    else:
+                        var = self.fallback_variables[cohort_index][day]
+                        if workshop in self.fallback_seats:
+                            seats = self.fallback_seats[workshop][day]
+                            seats.setInitialValue(seats.varValue + 1)
+                    var.setInitialValue(var.varValue + 1)
+                    if group in self.class_groups:
+                        self.class_groups[group].setInitialValue(1)
+                    if (workshop, day) in self.open_variables:
+                        self.open_variables[workshop, day].setInitialValue(1)
+        if self.floor_variable is not None:
+            self.floor_variable.setInitialValue(math.floor(self._lowest_score(
+                self._model_students(), assignments
+            )))
+
+    def _make_result(self, assignments: Optional[Dict[int, List[str]]]) -> OptimizationResult:
+        """Wrap the assignments of a solved problem in an OptimizationResult."""
+        self._assignments = assignments
+        if assignments is not None:
+            statistics = self._calculate_statistics(assignments)
+            if self.matrix is not None:
+                num_variables, num_constraints = self.matrix.num_columns, self.matrix.num_rows
+            elif self.problem is not None:
+                num_variables = self.problem.numVariables()
+                num_constraints = self.problem.numConstraints()
+            else:
+                num_variables = num_constraints = 0
+            statistics['model_size'] = {
+                'cohorts': len(self.cohorts),
+                'variables': num_variables,
+                'constraints': num_constraints
+            }
+            statistics['solver'] = dict(self.solve_info)
+            statistics['presolve'] = dict(self.presolve_info)
+            if self.objective_mode == 'lexicographic' and self.lexicographic_info:
+                statistics['lexicographic'] = [dict(stage) for stage in self.lexicographic_info]
+            if self.objective_mode == 'maxmin' and self.maxmin_info:
+                statistics['maxmin'] = dict(self.maxmin_info)
+            message = "Optimierung erfolgreich abgeschlossen"
+            if not self.solve_info.get('optimal', True):
+                message = "Optimierung vorzeitig beendet, beste gefundene Lösung übernommen"
+            return OptimizationResult(
+                assignments=assignments,
+                statistics=statistics,
+                success=True,
+                message=message
+            )
+        else:
+            return OptimizationResult(
+                assignments={},
+                statistics={},
+                success=False,
+                message=f"Optimierung fehlgeschlagen: {self.solve_info.get('status')}"
+            )
+
+    def _is_day_symmetric(self) -> bool:
+        """Check whether all days are interchangeable for the model.
+
+        This holds when every workshop runs every day with the same capacity
+        and no day-dependent objective terms are active. Minimum sizes open
+        or cancel every day on its own, so they break the symmetry.
+        """
+        return self.keep_classes_together == 'egal' and not self._opening_days() and all(
+            capacity == self.capacities[workshop, 0]
+            for (workshop, _), capacity in self.capacities.items()
+        )
+
+    def _capacity_table(self, settings: Dict) -> Dict[Tuple[str, int], Optional[int]]:
+        """Participants of every workshop and day (see Workshop.from_setting).
+
+        Args:
+            settings: Per workshop name, its entry of workshop_capacities;
+                other workshops get max_participants_per_workshop
+        """
+        default = self.max_participants or None
+        table = {}
+        for name in self.workshops:
+            workshop = Workshop.from_setting(name, settings.get(name, default), default)
+            for day in range(self.num_days):
+                table[name, day] = workshop.capacity(day)
+        return table
+
+    def _is_limited(self) -> bool:
+        """Check whether any workshop-day has a capacity."""
+        return any(capacity is not None for capacity in self.capacities.values())
+
+    def _capacity_array(self, unlimited: float = np.inf) -> np.ndarray:
+        """Capacities as a workshops x days array, with the given value for unlimited ones."""
+        return np.array([
+            [unlimited if self.capacities[workshop, day] is None else self.capacities[workshop, day]
+             for day in range(self.num_days)]
+            for workshop in self.workshops
+        ], dtype=float).reshape(len(self.workshops), self.num_days)
+
+    def _offered_days(self, workshop: str) -> List[int]:
+        """Days on which a workshop takes place."""
+        return [day for day in range(self.num_days) if self.capacities[workshop, day] != 0]
+
+    def _opening_days(self) -> Dict[Tuple[str, int], int]:
+        """Minimum size of every workshop-day that may be cancelled.
+
+        Minimums of 1 hold for every workshop-day anyway and are left out.
+        """
+        return {
+            (workshop, day): minimum
+            for workshop, minimum in self.minimums.items() if minimum > 1
+            for day in self._offered_days(workshop)
+        }
+
+    def _minimum_array(self) -> np.ndarray:
+        """Minimum sizes as a workshops x days array, 0 = no minimum."""
+        minimums = np.zeros((len(self.workshops), self.num_days))
+        for row, workshop in enumerate(self.workshops):
+            minimums[row] = self.minimums.get(workshop, 0)
+        return minimums
+
+    def _fits(self, workshop: str, day: int, load: int) -> bool:
+        """Check whether a workshop has a free seat on a day at the given load."""
+        capacity = self.capacities[workshop, day]
+        return capacity is None or load < capacity
+
+    def _wished_workshops(self, student: Dict,
+                          wish_weights: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """Get the valid wishes of a student with their objective weight.
+
+        A workshop wished several times collects the weight of every wish.
+        Other weights than the configured ones may be passed. A friend group
+        (see _build_cohorts) has the wishes of all its members.
+        """
+        if wish_weights is None:
+            wish_weights = self.wish_weights
+        wished = {}
+        if 'group' in student:
+            for member in student['group']:
+                for workshop, weight in self._wished_workshops(member, wish_weights).items():
+                    wished[workshop] = wished.get(workshop, 0) + weight
+            return wished
+        for i in range(1, 5):
+            wish_key = f'wunsch{i}'
+            workshop = student.get(wish_key)
+            if workshop and workshop in self.workshops:
+                wished[workshop] = wished.get(workshop, 0) + wish_weights.get(wish_key, 0)
+        return wished
+
+    def _build_cohorts(self) -> List[List[Dict]]:
+        """Group students with identical wish profiles into cohorts.
+
+        Members of a cohort are interchangeable for the model, so it only
+        decides how many of them attend each workshop on each day. The class
+        is part of the profile whenever class composition matters.
+
+        A friend group becomes a cohort of its own with a single member that
+        stands for the whole group: {'id', 'klasse', 'group'}, with the id of
+        its first student, the class all members share ('' otherwise) and
+        the student dictionaries in 'group'. Its wishes are those of all
+        members added up, and each of its placements takes a seat per member
+        (see _seats). The model thus gets one set of variables per group
+        instead of rows that tie partners together.
+
+        Returns:
+            List of cohorts, each a list of student dictionaries
+        """
+        grouped = {student['id'] for members in self.groups for student in members}
+        cohorts = {}
+        for student in self.students:
+            if student['id'] in grouped:
+                continue
+            # The floor rows of the maxmin mode need every student's own score
+            if not self.aggregate_cohorts or self.objective_mode == 'maxmin':
+                key = (student['id'],)
+            else:
+                key = tuple(
+                    workshop if workshop in self.workshops else None
+                    for workshop in (student.get(f'wunsch{i}') for i in range(1, 5))
+                )
+                if self.keep_classes_together != 'egal':
+                    key += (student.get('klasse', ''),)
+            cohorts.setdefault(key, []).append(student)
+        for members in self.groups:
+            classes = {student.get('klasse', '') for student in members}
+            cohorts[('group', members[0]['id'])] = [{
+                'id': members[0]['id'],
+                'klasse': classes.pop() if len(classes) == 1 else '',
+                'group': members
+            }]
+        return list(cohorts.values())
+
+    @staticmethod
+    def _seats(members: List[Dict]) -> int:
+        """Seats one placement of a cohort takes: the size of a friend group, else 1."""
+        return len(members[0].get('group', ())) or 1
+
+    def _model_students(self) -> List[Dict]:
+        """Students of the cohorts in the model, with friend groups split into their members."""
+        return [
+            student for members in self.cohorts for entry in members
+            for student in entry.get('group', [entry])
+        ]
+
+    def _build_model(self, sparse: bool, dense_cohorts: Set[int]):
+        """Create decision variables and objective of the optimization problem.
+
+        The dense model has a variable for every cohort, workshop and day. The
+        sparse model only keeps the wished workshops of each cohort plus one
+        fallback variable per cohort and day; which workshop hosts a fallback
+        placement is decided after solving (see _seat_fallback_students).
+        Days on which a workshop does not take place get no variables.
+        Friend groups always keep all workshops, as a fallback placement
+        would have to seat all members in one workshop.
+
+        Args:
+            sparse: Whether to build the sparse model
+            dense_cohorts: Cohorts that keep all workshops in the sparse model
+        """
+        self.problem = pulp.LpProblem("Workshop_Allocation", pulp.LpMaximize)
+
+        # x[cohort][workshop][day] = number of cohort members assigned to workshop on day
+        self.variables = {}
+        self.fallback_variables = {}
+        self.fallback_seats = {}
+        for cohort_index, members in enumerate(self.cohorts):
+            is_sparse = sparse and cohort_index not in dense_cohorts and self._seats(members) == 1
+            candidates = self._wished_workshops(members[0]) if is_sparse else self.workshops
+            size = len(members)
+            category = 'Binary' if size == 1 else 'Integer'
+            self.variables[cohort_index] = {}
+            for workshop in candidates:
+                days = self._offered_days(workshop)
+                if not days:
+                    continue
+                self.variables[cohort_index][workshop] = {}
+                for day in days:
+                    var_name = f"c{cohort_index}_w{workshop}_d{day}"
+                    self.variables[cohort_index][workshop][day] = pulp.LpVariable(
+                        var_name, lowBound=0, upBound=size, cat=category
+                    )
+
+            if is_sparse:
+                # f[cohort][day] = number of members with a non-wished workshop on day
+                self.fallback_variables[cohort_index] = {
+                    day: pulp.LpVariable(
+                        f"f{cohort_index}_d{day}", lowBound=0, upBound=size, cat=category
+                    )
+                    for day in range(self.num_days)
+                }
+
+        if self.fallback_variables and (self._is_limited() or self._opening_days()):
+            # Number of fallback placements hosted by each workshop and day
+            for index, workshop in enumerate(self.workshops):
+                if self._offered_days(workshop):
+                    self.fallback_seats[workshop] = {
+                        day: pulp.LpVariable(f"seats_w{index}_d{day}", lowBound=0, cat='Integer')
+                        for day in self._offered_days(workshop)
+                    }
+
+        # Objective function: Maximize satisfaction based on wish priorities
+        objective = []
+        for cohort_index, members in enumerate(self.cohorts):
+            for workshop, weight in self._wished_workshops(members[0]).items():
+                # Sum over all days
+                for var in self.variables[cohort_index].get(workshop, {}).values():
+                    objective.append(weight * var)
+
+        self.problem += pulp.lpSum(objective), "Total_Satisfaction"
+
+        # Constraints
+        self._add_constraints()
+        self._add_rank_rows(self._rank_rows)
+        self._add_floor()
+
     def _add_constraints(self):
         """Add constraints to the optimization problem."""
 
         # Constraint 1: Each student gets exactly one workshop per day
-        for student in self.students:
-            student_id = student['id']
+        for cohort_index, members in enumerate(self.cohorts):
             for day in range(self.num_days):
+                slots = [
+                    day_vars[day] for day_vars in self.variables[cohort_index].values()
+                    if day in day_vars
+                ]
+                if cohort_index in self.fallback_variables:
+                    slots.append(self.fallback_variables[cohort_index][day])
                 self.problem += (
-                    pulp.lpSum([
-                        self.variables[student_id][workshop][day]
-                        for workshop in self.workshops
-                    ]) == 1,
-                    f"one_workshop_per_day_s{student_id}_d{day}"
+                    pulp.lpSum(slots) == len(members),
+                    f"one_workshop_per_day_c{cohort_index}_d{day}"
                 )
 
         # Constraint 2: Students shouldn't repeat the same workshop
-        for student in self.students:
-            student_id = student['id']
-            for workshop in self.workshops:
+        for cohort_index, members in enumerate(self.cohorts):
+            for workshop, day_vars in self.variables[cohort_index].items():
+                self.problem += (
+                    pulp.lpSum(day_vars.values()) <= len(members),
+                    f"no_repeat_c{cohort_index}_w{workshop}"
+                )
+
+        # Constraint 3: Maximum participants per workshop and day (if specified)
+        participants = self._participant_terms()
+        opening_days = self._opening_days()
+        for workshop in self.workshops:
+            for day in self._offered_days(workshop):
+                capacity = self.capacities[workshop, day]
+                # Workshop-days that may be cancelled get their capacity in Constraint 4
+                if capacity is None or (workshop, day) in opening_days:
+                    continue
+                self.problem += (
+                    pulp.lpSum(seats * var for var, seats in participants[workshop, day])
+                    <= capacity - self._pinned_load.get((workshop, day), 0),
+                    f"max_capacity_w{workshop}_d{day}"
+                )
+
+        if self.fallback_seats:
+            # Every fallback placement needs a free seat somewhere
+            for day in range(self.num_days):
                 self.problem += (
                     pulp.lpSum([
-                        self.variables[student_id][workshop][day]
-                        for day in range(self.num_days)
-                    ]) <= 1,
-                    f"no_repeat_s{student_id}_w{workshop}"
+                        day_seats[day] for day_seats in self.fallback_seats.values()
+                        if day in day_seats
+                    ]) == pulp.lpSum([
+                        day_vars[day] for day_vars in self.fallback_variables.values()
+                    ]),
+                    f"fallback_seats_d{day}"
                 )
 
-        # Constraint 3: Maximum participants per workshop (if specified)
-        if self.max_participants:
-            for workshop in self.workshops:
-                for day in range(self.num_days):
+            # Fallback seats of a workshop are only for students who did not
+            # wish it - otherwise they would bypass the no-repeat constraint
+            wishers = {workshop: [] for workshop in self.workshops}
+            fallback_students = 0
+            for cohort_index, fallback_vars in self.fallback_variables.items():
+                fallback_students += len(self.cohorts[cohort_index])
+                for workshop in self.variables[cohort_index]:
+                    wishers[workshop].append(cohort_index)
+
+            for index, workshop in enumerate(self.workshops):
+                if workshop not in self.fallback_seats:
+                    continue
+                for day in self.fallback_seats[workshop]:
                     self.problem += (
                         pulp.lpSum([
-                            self.variables[student['id']][workshop][day]
-                            for student in self.students
-                        ]) <= self.max_participants,
-                        f"max_capacity_w{workshop}_d{day}"
+                            self.fallback_variables[cohort_index][day]
+                            for cohort_index in wishers[workshop]
+                        ]) <= pulp.lpSum([
+                            day_seats[day] for other, day_seats in self.fallback_seats.items()
+                            if other != workshop and day in day_seats
+                        ]),
+                        f"fallback_wishers_w{index}_d{day}"
                     )
+                self.problem += (
+                    pulp.lpSum(self.fallback_seats[workshop].values())
+                    <= fallback_students - sum(
+                        len(self.cohorts[cohort_index]) for cohort_index in wishers[workshop]
+                    ),
+                    f"fallback_once_w{index}"
+                )
 
-        # Constraint 4: Keep classes together (if enabled)
-        if self.keep_classes_together == "ja":
+        # Constraint 4: Cancel workshop-days below their minimum size (if specified)
+        self.open_variables = {}
+        if opening_days:
+            self._add_minimum_constraints(participants, opening_days)
+
+        # Constraint 5: Keep classes together or mix them (if enabled)
+        self.class_groups = {}
+        if self.keep_classes_together != 'egal':
             self._add_class_cohesion_constraints()
 
-    def _add_class_cohesion_constraints(self):
-        """Add soft constraints to encourage students from same class to be together."""
-        # Group students by class
+    def _participant_terms(self) -> Dict[Tuple[str, int], List[Tuple[pulp.LpVariable, int]]]:
+        """Variables that count the participants of every workshop-day, with their seats each."""
+        participants = {
+            (workshop, day): [] for workshop in self.workshops for day in range(self.num_days)
+        }
+        for cohort_index, cohort_vars in self.variables.items():
+            seats = self._seats(self.cohorts[cohort_index])
+            for workshop, day_vars in cohort_vars.items():
+                for day, var in day_vars.items():
+                    participants[workshop, day].append((var, seats))
+        for workshop, day_seats in self.fallback_seats.items():
+            for day, var in day_seats.items():
+                participants[workshop, day].append((var, 1))
+        return participants
+
+    def _add_minimum_constraints(
+        self,
+        participants: Dict[Tuple[str, int], List[Tuple[pulp.LpVariable, int]]],
+        opening_days: Dict[Tuple[str, int], int]
+    ):
+        """Let the model cancel workshop-days that would stay below their minimum size.
+
+        o[workshop][day] tells whether a workshop takes place on a day. Its
+        participants are at least o times the minimum and at most o times
+        its seats, so a cancelled workshop-day is empty and the same solve
+        places its students elsewhere. The seats are the fewer of the
+        capacity and the students who can attend, so the linking needs no
+        big M and the relaxation stays tight.
+        """
+        fallback_students = sum(len(self.cohorts[cohort]) for cohort in self.fallback_variables)
+        for index, workshop in enumerate(self.workshops):
+            for day in self._offered_days(workshop):
+                if (workshop, day) not in opening_days:
+                    continue
+                terms = participants[workshop, day]
+                pinned = self._pinned_load.get((workshop, day), 0)
+                seats = sum(var.upBound * unit for var, unit in terms if var.upBound is not None)
+                if workshop in self.fallback_seats:
+                    seats += fallback_students
+                if self.capacities[workshop, day] is not None:
+                    seats = min(seats, self.capacities[workshop, day] - pinned)
+                # Pinned students keep their workshop open
+                is_open = pulp.LpVariable(
+                    f"open_w{index}_d{day}", lowBound=int(pinned > 0), upBound=1, cat='Integer'
+                )
+                self.open_variables[workshop, day] = is_open
+                load = pulp.lpSum(unit * var for var, unit in terms)
+                self.problem += (
+                    load <= seats * is_open,
+                    f"max_open_w{index}_d{day}"
+                )
+                self.problem += (
+                    load + pinned >= opening_days[workshop, day] * is_open,
+                    f"min_open_w{index}_d{day}"
+                )
+
+    def _class_cohorts(self) -> Dict[str, List[int]]:
+        """Get the cohorts of every class that the class term applies to.
+
+        Cohorts are split by class whenever class composition matters, so
+        every cohort belongs to one class. Students without a class and
+        classes of a single student are left out.
+        """
         classes = {}
-        for student in self.students:
-            klasse = student.get('klasse', '')
+        for cohort_index, members in enumerate(self.cohorts):
+            klasse = members[0].get('klasse', '')
             if klasse:
-                if klasse not in classes:
-                    classes[klasse] = []
-                classes[klasse].append(student['id'])
+                classes.setdefault(klasse, []).append(cohort_index)
+        return {
+            klasse: cohort_indices for klasse, cohort_indices in classes.items()
+            if sum(len(self.cohorts[cohort_index]) for cohort_index in cohort_indices) > 1
+        }
 
-        # For each class with multiple students, add bonus to objective for being together
-        # This is a soft constraint through the objective function
-        # (Could be implemented more strictly with hard constraints if needed)
-        pass  # Implementation depends on how strict this requirement should be
+    def _class_term_cohorts(self) -> Set[int]:
+        """Get the cohorts that must keep all workshops in the sparse model.
 
-    def _extract_assignments(self) -> Dict[int, List[str]]:
-        """Extract assignments from solved problem."""
-        assignments = {}
+        A fallback placement is seated after solving, without regard to the
+        class, so the model cannot count the class groups it forms. Cohorts
+        under the class term therefore get a variable for every workshop.
+        """
+        if self.keep_classes_together == 'egal':
+            return set()
+        return {
+            cohort_index
+            for cohort_indices in self._class_cohorts().values()
+            for cohort_index in cohort_indices
+        }
 
-        for student in self.students:
-            student_id = student['id']
-            assignments[student_id] = []
+    def _add_class_cohesion_constraints(self):
+        """Add the class term of keep_classes_together to the objective.
 
-            for day in range(self.num_days):
-                assigned_workshop = None
-                for workshop in self.workshops:
-                    if self.variables[student_id][workshop][day].varValue == 1:
-                        assigned_workshop = workshop
-                        break
-                assignments[student_id].append(assigned_workshop)
+        g[class][workshop][day] tells whether a class is present in a
+        workshop on a day. With 'ja' every such group costs class_weight, so
+        classes are split into as few groups as possible; with 'nein' every
+        group earns class_weight, so classes spread over many workshops. The
+        variables link to the aggregated member counts, which adds one
+        variable and one constraint per class, candidate workshop and day
+        regardless of the class size. Cohorts of these classes are never
+        sparse (see _class_term_cohorts), so every group has a variable.
+        """
+        keep_together = self.keep_classes_together == 'ja'
+        terms = []
+        for class_index, (klasse, cohort_indices) in enumerate(self._class_cohorts().items()):
+            class_size = sum(len(self.cohorts[cohort_index]) for cohort_index in cohort_indices)
+            present = {}
+            for cohort_index in cohort_indices:
+                for workshop, day_vars in self.variables[cohort_index].items():
+                    for day, var in day_vars.items():
+                        present.setdefault((workshop, day), []).append(var)
 
-        return assignments
+            for (workshop, day), members in present.items():
+                name = f"k{class_index}_w{workshop}_d{day}"
+                group = pulp.LpVariable(f"g_{name}", cat='Binary')
+                self.class_groups[klasse, workshop, day] = group
+                if keep_together:
+                    limit = class_size
+                    if self.capacities[workshop, day] is not None:
+                        limit = min(limit, self.capacities[workshop, day])
+                    self.problem += (
+                        pulp.lpSum(members) <= limit * group,
+                        f"class_together_{name}"
+                    )
+                    terms.append(-self.class_weight * group)
+                else:
+                    self.problem += (
+                        group <= pulp.lpSum(members),
+                        f"class_mixed_{name}"
+                    )
+                    terms.append(self.class_weight * group)
+
+        self.problem.setObjective(self.problem.objective + pulp.lpSum(terms))
+
+    def _build_matrix_model(self, sparse: bool, dense_cohorts: Set[int]):
+        """Create the model of _build_model as arrays (see AllocationMatrix).
+
+        Args:
+            sparse: Whether to build the sparse model
+            dense_cohorts: Cohorts that keep all workshops in the sparse model
+        """
+        index = {workshop: i for i, workshop in enumerate(self.workshops)}
+        cohort_class = np.full(len(self.cohorts), -1, dtype=np.int64)
+        for class_index, cohort_indices in enumerate(self._class_cohorts().values()):
+            cohort_class[cohort_indices] = class_index
+        pair_cohort = []
+        pair_workshop = []
+        pair_weight = []
+        fallback_cohorts = []
+        for cohort_index, members in enumerate(self.cohorts):
+            wished = self._wished_workshops(members[0])
+            is_sparse = sparse and cohort_index not in dense_cohorts and self._seats(members) == 1
+            candidates = wished if is_sparse else self.workshops
+            for workshop in candidates:
+                if not self._offered_days(workshop):
+                    continue
+                pair_cohort.append(cohort_index)
+                pair_workshop.append(index[workshop])
+                pair_weight.append(wished.get(workshop, 0))
+            if is_sparse:
+                fallback_cohorts.append(cohort_index)
+
+        reserved = np.zeros((len(self.workshops), self.num_days))
+        for (workshop, day), seats in self._pinned_load.items():
+            reserved[index[workshop], day] = seats
+
+        self.problem = None
+        self.matrix = AllocationMatrix(
+            pair_cohort=np.array(pair_cohort, dtype=np.int64),
+            pair_workshop=np.array(pair_workshop, dtype=np.int64),
+            pair_weight=np.array(pair_weight, dtype=float),
+            cohort_size=np.array([len(members) for members in self.cohorts], dtype=np.int64),
+            cohort_seats=np.array([self._seats(members) for members in self.cohorts], dtype=np.int64),
+            fallback_cohorts=np.array(fallback_cohorts, dtype=np.int64),
+            num_workshops=len(self.workshops),
+            num_days=self.num_days,
+            capacity=self._capacity_array(),
+            cohort_class=cohort_class,
+            class_mode=self.keep_classes_together,
+            class_weight=self.class_weight,
+            reserved=reserved,
+            minimum=self._minimum_array()
+        )
+        self._add_rank_rows(self._rank_rows)
+        self._add_floor()
+
+    def _set_matrix_start(self, assignments: Dict[int, List[str]]):
+        """Translate a known assignment into a start vector of the matrix model."""
+        matrix = self.matrix
+        index = {workshop: i for i, workshop in enumerate(self.workshops)}
+        pairs = {
+            (cohort, workshop): pair
+            for pair, (cohort, workshop) in enumerate(zip(
+                matrix.pair_cohort.tolist(), matrix.pair_workshop.tolist()
+            ))
+        }
+        fallback_index = {cohort: i for i, cohort in enumerate(matrix.fallback_cohorts.tolist())}
+        start = np.zeros(matrix.num_columns)
+        for cohort_index, members in enumerate(self.cohorts):
+            for student in members:
+                for day, workshop in enumerate(assignments[student['id']]):
+                    pair = pairs.get((cohort_index, index[workshop]))
+                    if pair is not None:
+                        start[matrix.x_column(pair, day)] += 1
+                    else:
+                        start[matrix.f_column(fallback_index[cohort_index], day)] += 1
+                        if matrix.has_seats:
+                            start[matrix.s_column(index[workshop], day)] += 1
+        matrix.set_class_groups(start)
+        matrix.set_openings(start)
+        if self._floor_column is not None:
+            start[self._floor_column] = math.floor(self._lowest_score(
+                self._model_students(), assignments
+            ))
+        self._start_vector = start
+
+    def _extract_matrix_assignments(self) -> Optional[Dict[int, List[str]]]:
+        """Extract assignments from the solution of the matrix model."""
+        (cohorts, workshops, days, counts), fallback = self.matrix.placements(self._solution)
+        placements = {cohort_index: [] for cohort_index in range(len(self.cohorts))}
+        for cohort_index, workshop, day, count in zip(
+                cohorts.tolist(), workshops.tolist(), days.tolist(), counts.tolist()):
+            placements[cohort_index].extend([(self.workshops[workshop], day)] * count)
+        for cohort_index, day, count in zip(*(array.tolist() for array in fallback)):
+            placements[cohort_index].extend([((None, day), day)] * count)
+        seats = None
+        if self._opening_days() and self.matrix.has_seats:
+            seats = {
+                (self.workshops[workshop], day): count
+                for workshop, day, count in zip(
+                    *(array.tolist() for array in self.matrix.seat_counts(self._solution))
+                )
+            }
+        return self._assign_placements(placements, seats)
+
+    def _extract_assignments(self) -> Optional[Dict[int, List[str]]]:
+        """Extract assignments from solved problem.
+
+        Returns:
+            Assignments per student, or None if the fallback placements of the
+            sparse model cannot be seated
+        """
+        placements = {}
+        for cohort_index in range(len(self.cohorts)):
+            # One edge per placement; fallback placements use a node per day
+            edges = []
+            for workshop, day_vars in self.variables[cohort_index].items():
+                for day, var in day_vars.items():
+                    edges.extend([(workshop, day)] * int(round(var.varValue)))
+            if cohort_index in self.fallback_variables:
+                for day, var in self.fallback_variables[cohort_index].items():
+                    edges.extend([((None, day), day)] * int(round(var.varValue)))
+            placements[cohort_index] = edges
+        seats = None
+        if self.open_variables and self.fallback_seats:
+            seats = {
+                (workshop, day): int(round(var.varValue))
+                for workshop, day_seats in self.fallback_seats.items()
+                for day, var in day_seats.items()
+            }
+        return self._assign_placements(placements, seats)
+
+    def _assign_placements(
+        self,
+        placements: Dict[int, List[Tuple]],
+        seats: Optional[Dict[Tuple[str, int], int]] = None
+    ) -> Optional[Dict[int, List[str]]]:
+        """Turn the placements of every cohort into schedules of its members.
+
+        Cohort counts are split into individual schedules by colouring the
+        cohort's (workshop, day) placements with one colour per member.
+        Every student of a friend group gets the schedule of the group.
+        Fallback placements are edges ((None, day), day) and get seated on
+        free workshops afterwards.
+
+        Args:
+            placements: Per cohort, one (workshop, day) edge per placement
+            seats: Fallback seats per (workshop, day) of the solution; if
+                given, the fallback placements fill exactly these seats, so
+                cancelled workshops stay empty and open ones keep their
+                minimum size
+
+        Returns:
+            Assignments per student, or None if the fallback placements of the
+            sparse model cannot be seated
+        """
+        # Pinned students take part in seating like everyone else
+        assignments = {student_id: list(schedule) for student_id, schedule in self._pinned.items()}
+        fallback_slots = []
+        fallback_cohorts = {}
+
+        for cohort_index, members in enumerate(self.cohorts):
+            edges = placements[cohort_index]
+            schedules = [[None] * self.num_days for _ in members]
+            colors = color_bipartite_edges(edges, len(members))
+            for (workshop, day), member in zip(edges, colors):
+                if isinstance(workshop, tuple):
+                    fallback_slots.append((members[member]['id'], day))
+                    fallback_cohorts[members[member]['id']] = cohort_index
+                else:
+                    schedules[member][day] = workshop
+
+            for entry, schedule in zip(members, schedules):
+                for student in entry.get('group', [entry]):
+                    assignments[student['id']] = list(schedule)
+
+        self._unseated_cohorts = set()
+        if fallback_slots:
+            load = {(workshop, day): 0 for workshop in self.workshops for day in range(self.num_days)}
+            for assigned in assignments.values():
+                for day, workshop in enumerate(assigned):
+                    if workshop:
+                        load[workshop, day] += 1
+            capacity = dict(self.capacities)
+            if seats is not None:
+                capacity = {key: count + seats.get(key, 0) for key, count in load.items()}
+            taken = {student_id: set(assigned) for student_id, assigned in assignments.items()}
+
+            seats = self._seat_fallback_students(fallback_slots, taken, load, capacity)
+            if seats is None:
+                self._unseated_cohorts = set(fallback_cohorts.values())
+                return None
+            for (student_id, day), workshop in zip(fallback_slots, seats):
+                assignments[student_id][day] = workshop
+
+        # Keep the input order of the students
+        return {student['id']: assignments[student['id']] for student in self.students}
+
+    def _seat_fallback_students(
+        self,
+        slots: List[Tuple[int, int]],
+        taken: Dict[int, Set[str]],
+        load: Dict[Tuple[str, int], int],
+        capacity: Dict[Tuple[str, int], Optional[int]]
+    ) -> Optional[List[str]]:
+        """Choose concrete workshops for fallback placements of the sparse model.
+
+        Fallback placements carry no weight, so any choice that respects the
+        remaining capacity and the no-repeat rule keeps the solution optimal.
+        A greedy pass handles almost all cases; a small feasibility problem over
+        the fallback placements only is solved when it gets stuck.
+
+        Args:
+            slots: (student_id, day) pairs that need a workshop
+            taken: Workshops each student already attends
+            load: Current participants per (workshop, day)
+            capacity: Capacity per (workshop, day), None = unlimited
+
+        Returns:
+            Workshop for every slot, or None if the slots cannot be seated
+        """
+        def has_room(workshop, day):
+            return capacity[workshop, day] is None or load[workshop, day] < capacity[workshop, day]
+
+        # Greedy: least crowded workshop the student has not attended yet
+        seats = []
+        greedy_load = dict(load)
+        greedy_taken = {student_id: set(workshops) for student_id, workshops in taken.items()}
+        for student_id, day in slots:
+            options = [
+                w for w in self.workshops
+                if w not in greedy_taken[student_id] and (
+                    capacity[w, day] is None or greedy_load[w, day] < capacity[w, day]
+                )
+            ]
+            if not options:
+                break
+            workshop = min(options, key=lambda w: greedy_load[w, day])
+            seats.append(workshop)
+            greedy_load[workshop, day] += 1
+            greedy_taken[student_id].add(workshop)
+        else:
+            return seats
+
+        # Solve the seating exactly
+        seating = pulp.LpProblem("Fallback_Seating", pulp.LpMinimize)
+        choices = []
+        for slot_index, (student_id, day) in enumerate(slots):
+            choices.append({
+                workshop: pulp.LpVariable(f"seat{slot_index}_w{index}", cat='Binary')
+                for index, workshop in enumerate(self.workshops)
+                if workshop not in taken[student_id] and has_room(workshop, day)
+            })
+            seating += pulp.lpSum(choices[-1].values()) == 1
+
+        by_student = {}
+        by_seat = {}
+        for (student_id, day), options in zip(slots, choices):
+            for workshop, var in options.items():
+                by_student.setdefault((student_id, workshop), []).append(var)
+                by_seat.setdefault((workshop, day), []).append(var)
+        for student_vars in by_student.values():
+            seating += pulp.lpSum(student_vars) <= 1
+        for (workshop, day), seat_vars in by_seat.items():
+            if capacity[workshop, day] is not None:
+                seating += pulp.lpSum(seat_vars) <= capacity[workshop, day] - load[workshop, day]
+
+        seating.solve(pulp.PULP_CBC_CMD(msg=0))
+        if seating.status != pulp.LpStatusOptimal:
+            return None
+
+        return [
+            next(workshop for workshop, var in options.items() if var.varValue > 0.5)
+            for options in choices
+        ]
 
     def _calculate_statistics(self, assignments: Dict[int, List[str]]) -> Dict:
         """Calculate statistics about the allocation."""
@@ -238,6 +1851,22 @@ class WorkshopOptimizer:
                 if workshop:
                     workshop_stats[workshop][day].append(student_name)
 
+        # Workshop-days cancelled for staying below their minimum size
+        if self.minimums:
+            stats['cancelled_workshops'] = [
+                {'Workshop': workshop, 'Tag': day + 1}
+                for workshop, day in self._opening_days() if not workshop_stats[workshop][day]
+            ]
+
+        # Friend groups whose members do not share all their workshops
+        if self.groups:
+            stats['friend_groups'] = len(self.groups)
+            stats['split_friend_groups'] = sum(
+                any(assignments.get(student['id']) != assignments.get(members[0]['id'])
+                    for student in members)
+                for members in self.groups
+            )
+
         # Convert to list format for export
         for workshop in self.workshops:
             for day in range(self.num_days):
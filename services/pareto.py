@@ -0,0 +1,322 @@
+"""
+Pareto analysis for workshop allocation.
+Trades total satisfaction against the number of students without any wish.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from services.matrix_model import MatrixModel
+from services.optimizer import OptimizationResult, WorkshopOptimizer
+from services.solvers import SolveMetrics, SolveOptions, get_solver
+
+
+def _solve_epsilon(solver_name: str, model: MatrixModel, options: SolveOptions,
+                   start: Optional[np.ndarray]) -> Tuple[Optional[np.ndarray], SolveMetrics]:
+    """Solve one epsilon-constraint model in a worker process."""
+    return get_solver(solver_name).solve_matrix(model, options, start)
+
+
+class ParetoOptimizer(WorkshopOptimizer):
+    """Efficient frontier between total satisfaction and unsatisfied students.
+
+    The day-indexed matrix model gets a column y per cohort that counts the
+    members with at least one wished workshop (y <= wished placements of
+    the cohort) and one row "at most epsilon students without a wish".
+    Members of a friend group have wishes of their own, so every member
+    gets a y column on the placements of the group.
+    Without epsilon the model yields the usual optimum; maximising the y
+    columns instead gives the fewest possible unsatisfied students. The
+    epsilon values in between are solved in a process pool on copies of the
+    same model, all starting from the fairest solution. The optimum is
+    returned as result, statistics['pareto'] lists all frontier points with
+    their assignments.
+    """
+
+    # Frontier points between the two extremes
+    POINTS = 5
+    # The frontier of the whole problem is not the sum of component frontiers
+    DECOMPOSABLE = False
+
+    def __init__(self, students: List[Dict], workshops: set, config: Dict):
+        super().__init__(students, workshops, config)
+        self.points = config.get('pareto_points', self.POINTS)
+        # First y column and the epsilon row of the built model
+        self._fairness = None
+        # Cohort, students and wishes counted by every y column
+        self._profiles = []
+
+    def optimize(self) -> OptimizationResult:
+        """
+        Run the optimization algorithm.
+
+        Returns:
+            OptimizationResult with assignments and statistics
+        """
+        if not get_solver(self.solver_name).capabilities.matrix:
+            return OptimizationResult(
+                assignments={},
+                statistics={},
+                success=False,
+                message=f"Pareto-Analyse mit Solver '{self.solver_name}' nicht möglich"
+            )
+
+        try:
+            started = time.time()
+            self.cohorts = self._build_cohorts()
+            self._presolve()
+            assignments = self._solve(
+                self._build_matrix_model, self._extract_matrix_assignments, self._set_matrix_start
+            )
+            result = self._make_result(assignments)
+            if not result.success:
+                return result
+
+            points = [self._point(None, assignments)]
+            fairest = self._fairest_solution()
+            if fairest is not None:
+                fewest = int(round(
+                    len(self._model_students()) - fairest[self._y_columns()].sum()
+                ))
+                points += self._solve_epsilons(
+                    self._epsilons(fewest, points[0]['unsatisfied']), fairest
+                )
+            # An equally good point with fewer unsatisfied students replaces the optimum
+            frontier = self._frontier(points)
+            result.assignments = frontier[0]['assignments']
+            result.statistics.update(frontier[0]['statistics'])
+            result.statistics['pareto'] = frontier
+            result.statistics['pareto_time'] = time.time() - started
+            return result
+
+        except Exception as e:
+            return OptimizationResult(
+                assignments={},
+                statistics={},
+                success=False,
+                message=f"Fehler bei der Optimierung: {str(e)}"
+            )
+
+    def reoptimize(self, wish_weights: Dict[str, float]) -> OptimizationResult:
+        """Compute the frontier again for new wish weights."""
+        self.wish_weights = dict(wish_weights)
+        self.config = {**self.config, 'wish_weights': self.wish_weights}
+        return self.optimize()
+
+    def _build_matrix_model(self, sparse: bool, dense_cohorts: Set[int]):
+        """Create the allocation model plus the y columns and the epsilon row."""
+        super()._build_matrix_model(sparse, dense_cohorts)
+        matrix = self.matrix
+        self._profiles = []
+        for cohort_index, members in enumerate(self.cohorts):
+            if 'group' in members[0]:
+                self._profiles.extend(
+                    (cohort_index, [student], self._wished_workshops(student))
+                    for student in members[0]['group']
+                )
+            else:
+                self._profiles.append((cohort_index, members, self._wished_workshops(members[0])))
+        num_profiles = len(self._profiles)
+        pair_cohort = matrix.pair_cohort[matrix.x_pair]
+        pair_workshop = matrix.pair_workshop[matrix.x_pair]
+        order = np.argsort(pair_cohort, kind='stable')
+        starts = np.searchsorted(pair_cohort[order], np.arange(len(self.cohorts) + 1))
+
+        first_column, first_row = matrix.num_columns, matrix.num_rows
+        y_columns = first_column + np.arange(num_profiles)
+        epsilon_row = first_row + num_profiles
+        wish_rows, wish_columns = [], []
+        for profile, (cohort_index, _, wished) in enumerate(self._profiles):
+            columns = order[starts[cohort_index]:starts[cohort_index + 1]]
+            columns = columns[np.array([
+                self.workshops[workshop] in wished for workshop in pair_workshop[columns].tolist()
+            ], dtype=bool)]
+            wish_rows.append(np.full(len(columns), first_row + profile))
+            wish_columns.append(columns)
+        wish_rows = np.concatenate(wish_rows + [np.zeros(0, dtype=np.int64)])
+        wish_columns = np.concatenate(wish_columns + [np.zeros(0, dtype=np.int64)])
+        matrix.extend(
+            objective=np.zeros(num_profiles),
+            column_lower=np.zeros(num_profiles),
+            column_upper=np.array([len(students) for _, students, _ in self._profiles], dtype=float),
+            rows=np.concatenate([
+                first_row + np.arange(num_profiles),
+                wish_rows,
+                np.full(num_profiles, epsilon_row)
+            ]),
+            columns=np.concatenate([y_columns, wish_columns, y_columns]),
+            values=np.concatenate([
+                np.ones(num_profiles), -np.ones(len(wish_columns)), np.ones(num_profiles)
+            ]),
+            # Without epsilon, the epsilon row only asks for y >= 0
+            row_lower=np.append(np.full(num_profiles, -np.inf), 0.0),
+            row_upper=np.append(np.zeros(num_profiles), np.inf)
+        )
+        self._fairness = (first_column, epsilon_row)
+
+    def _required(self, max_unsatisfied: int) -> float:
+        """Satisfied students the model needs for at most max_unsatisfied without a wish.
+
+        Pinned students always get their best wishes.
+        """
+        return float(len(self._model_students()) - max_unsatisfied)
+
+    def _y_columns(self) -> np.ndarray:
+        return self._fairness[0] + np.arange(len(self._profiles))
+
+    def _set_matrix_start(self, assignments: Dict[int, List[str]]):
+        """Translate a known assignment into a start vector, including the y columns."""
+        super()._set_matrix_start(assignments)
+        for column, (_, students, wished) in zip(self._y_columns().tolist(), self._profiles):
+            self._start_vector[column] = sum(
+                any(workshop in wished for workshop in assignments[student['id']])
+                for student in students
+            )
+
+    def _assign_placements(
+        self,
+        placements: Dict[int, List[Tuple]],
+        seats: Optional[Dict[Tuple[str, int], int]] = None
+    ) -> Optional[Dict[int, List[str]]]:
+        """Split cohort placements into schedules, giving as many members as possible a wish."""
+        assignments = super()._assign_placements(placements, seats)
+        if assignments is not None:
+            self._spread_wishes(assignments)
+        return assignments
+
+    def _spread_wishes(self, assignments: Dict[int, List[str]]):
+        """Hand wished workshops from members with several to members without any.
+
+        Members of a cohort share their wishes (and class), so swapping the
+        workshops of two members on one day keeps the objective and every
+        capacity. A member without a wish attends none of the wished
+        workshops, so only the member giving one away can repeat a workshop.
+        """
+        for members in self.cohorts:
+            wished = self._wished_workshops(members[0])
+            schedules = [assignments[student['id']] for student in members]
+            counts = [sum(workshop in wished for workshop in schedule) for schedule in schedules]
+            for poor, schedule in enumerate(schedules):
+                if counts[poor]:
+                    continue
+                for rich, other in enumerate(schedules):
+                    if counts[rich] < 2:
+                        continue
+                    day = next((
+                        day for day in range(self.num_days)
+                        if other[day] in wished and schedule[day] not in other
+                    ), None)
+                    if day is not None:
+                        other[day], schedule[day] = schedule[day], other[day]
+                        counts[rich] -= 1
+                        counts[poor] += 1
+                        break
+
+    def _options(self, stop=None) -> SolveOptions:
+        """Solver settings of the frontier solves."""
+        return SolveOptions(
+            threads=self.threads,
+            time_limit=self.time_limit,
+            gap=self.mip_gap,
+            warm_start=True,
+            stop=stop if stop is not None else self.stop_event
+        )
+
+    def _fairest_solution(self) -> Optional[np.ndarray]:
+        """Solve for the most students with a wish, starting from the optimum."""
+        start = self._solution if self._solution is not None else self._start_vector
+        if start is None or not len(self.cohorts):
+            return None
+        matrix = self.matrix
+        objective = matrix.objective
+        matrix.objective = np.zeros_like(objective)
+        matrix.objective[self._y_columns()] = 1
+        try:
+            solution, _ = get_solver(self.solver_name).solve_matrix(matrix, self._options(), start)
+        finally:
+            matrix.objective = objective
+        return solution
+
+    def _epsilons(self, fewest: int, most: int) -> List[int]:
+        """Limits on unsatisfied students between the fairest solution and the optimum."""
+        if fewest >= most:
+            return []
+        if most - fewest <= self.points:
+            return list(range(fewest, most))
+        return sorted({int(value) for value in np.linspace(fewest, most - 1, self.points).round()})
+
+    def _solve_epsilons(self, epsilons: List[int], start: np.ndarray) -> List[Dict]:
+        """Maximise satisfaction for every epsilon in parallel.
+
+        Every run solves a copy of the built model with another bound on the
+        epsilon row; the fairest solution is feasible for all of them.
+        """
+        if not epsilons:
+            return []
+        matrix = self.matrix
+        _, epsilon_row = self._fairness
+        models = []
+        for epsilon in epsilons:
+            row_lower = matrix.row_lower.copy()
+            row_lower[epsilon_row] = self._required(epsilon)
+            models.append(MatrixModel(
+                objective=matrix.objective, column_lower=matrix.column_lower,
+                column_upper=matrix.column_upper, rows=matrix.rows, columns=matrix.columns,
+                values=matrix.values, row_lower=row_lower, row_upper=matrix.row_upper
+            ))
+
+        solutions = [None] * len(epsilons)
+        workers = min(len(epsilons), os.cpu_count() or 1)
+        with multiprocessing.Manager() as manager:
+            stop = manager.Event()
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_solve_epsilon, self.solver_name, model, self._options(stop), start)
+                    for model in models
+                ]
+                pending = set(futures)
+                while pending:
+                    _, pending = wait(pending, timeout=0.1)
+                    if self.stop_event is not None and self.stop_event.is_set():
+                        stop.set()
+                solutions = [future.result()[0] for future in futures]
+
+        points = []
+        for epsilon, solution in zip(epsilons, solutions):
+            if solution is None:
+                continue
+            self._solution = solution
+            assignments = self._extract_matrix_assignments()
+            if assignments is not None:
+                points.append(self._point(epsilon, assignments))
+        return points
+
+    def _point(self, max_unsatisfied: Optional[int], assignments: Dict[int, List[str]]) -> Dict:
+        """Describe one frontier point by the values its assignment reaches."""
+        objective = 0.0
+        unsatisfied = 0
+        for student in self.students:
+            wished = self._wished_workshops(student)
+            schedule = assignments[student['id']]
+            objective += sum(wished.get(workshop, 0) for workshop in schedule)
+            unsatisfied += not any(workshop in wished for workshop in schedule)
+        return {
+            'max_unsatisfied': max_unsatisfied,
+            'objective': objective,
+            'unsatisfied': unsatisfied,
+            'assignments': assignments,
+            'statistics': self._calculate_statistics(assignments)
+        }
+
+    @staticmethod
+    def _frontier(points: List[Dict]) -> List[Dict]:
+        """Drop dominated points; the rest ordered from the optimum to the fairest."""
+        frontier = []
+        for point in sorted(points, key=lambda point: (point['unsatisfied'], -point['objective'])):
+            if not frontier or point['objective'] > frontier[-1]['objective'] + 1e-9:
+                frontier.append(point)
+        return frontier[::-1]
@@ -0,0 +1,126 @@
+"""
+On-disk cache of optimization results.
+Identical students and parameters return the stored result instead of solving again.
+"""
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from models import OptimizationResult
+
+
+# Config keys that change the result of an optimization
+RESULT_PARAMETERS = (
+    'num_days', 'max_participants_per_workshop', 'workshop_capacities', 'workshop_minimums',
+    'wish_weights', 'keep_classes_together', 'class_weight', 'keep_partners_together',
+    'objective', 'engine', 'solver', 'time_limit', 'mip_gap', 'pareto_points', 'seed',
+    'tie_breaking', 'lagrangian_iterations'
+)
+
+
+def result_key(students: List[Dict], workshops: List[str], config: Dict) -> str:
+    """Stable hash of everything that determines an optimization result.
+
+    Students are reduced to id, class, wishes and partners, so names do
+    not matter. Their order is kept: priority tie-breaking, the lottery
+    and the heuristics depend on it. Missing config keys count as None.
+
+    Args:
+        students: Student dictionaries
+        workshops: Workshop names
+        config: Optimization parameters
+
+    Returns:
+        Hex digest identifying the problem
+    """
+    normalised = {
+        'students': [
+            [str(student.get('id')), str(student.get('klasse') or '').strip()] +
+            [str(student.get(f'wunsch{i}') or '').strip() for i in range(1, 5)] +
+            [sorted(str(partner) for partner in student.get('partners') or ())]
+            for student in students
+        ],
+        'workshops': [str(workshop).strip() for workshop in workshops],
+        'parameters': {key: config.get(key) for key in RESULT_PARAMETERS}
+    }
+    text = json.dumps(normalised, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Directory of pickled results with least-recently-used eviction.
+
+    Every result is one file named by its key. A hit refreshes the file's
+    modification time; when the directory grows beyond max_bytes, the files
+    used longest ago are deleted. Unreadable entries count as misses.
+    """
+
+    SUFFIX = '.pickle'
+
+    def __init__(self, directory: str = 'result_cache', max_bytes: int = 50 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.metrics = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.SUFFIX}"
+
+    def get(self, key: str) -> Optional[OptimizationResult]:
+        """Return the stored result for a key, or None."""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                result = pickle.load(f)
+            os.utime(path)
+        except FileNotFoundError:
+            result = None
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            path.unlink(missing_ok=True)
+            result = None
+
+        if not isinstance(result, OptimizationResult):
+            self.metrics['misses'] += 1
+            return None
+        self.metrics['hits'] += 1
+        return result
+
+    def put(self, key: str, result: OptimizationResult):
+        """Store a result and evict old entries beyond the size limit."""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so readers never see half a result
+            handle, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(handle, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, self._path(key))
+        except OSError as e:
+            print(f"Could not cache result: {e}")
+            return
+        self.metrics['stores'] += 1
+        self._evict()
+
+    def _evict(self):
+        """Delete the least recently used entries until the cache fits."""
+        entries = []
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            self.metrics['evictions'] += 1
+
+    def clear(self):
+        """Delete all cached results."""
+        for path in self.directory.glob(f"*{self.SUFFIX}"):
+            path.unlink(missing_ok=True)
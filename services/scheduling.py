@@ -0,0 +1,111 @@
+"""
+Scheduling helpers for workshop allocation.
+Splits aggregated workshop counts into conflict-free individual schedules.
+"""
+from collections import defaultdict
+from typing import Dict, Hashable, List, Tuple
+
+
+def color_bipartite_edges(edges: List[Tuple[Hashable, Hashable]], num_colors: int) -> List[int]:
+    """Colour the edges of a bipartite multigraph.
+
+    No two edges at the same node get the same colour. By König's theorem
+    the maximum node degree is always enough colours; each colour class is
+    then a matching. Edges are coloured one by one and colour conflicts are
+    resolved by swapping two colours along an alternating path.
+
+    Args:
+        edges: (left_node, right_node) pairs, parallel edges allowed
+        num_colors: Number of available colours
+
+    Returns:
+        Colour (0 .. num_colors - 1) for every edge, in input order
+
+    Raises:
+        ValueError: If a node has more than num_colors edges
+    """
+    colors = [None] * len(edges)
+    left_at = defaultdict(dict)   # left node -> colour -> edge index
+    right_at = defaultdict(dict)  # right node -> colour -> edge index
+
+    def free_color(used: dict) -> int:
+        for color in range(num_colors):
+            if color not in used:
+                return color
+        raise ValueError(f"Mehr als {num_colors} Kanten an einem Knoten")
+
+    def set_color(index: int, color: int):
+        left, right = edges[index]
+        colors[index] = color
+        left_at[left][color] = index
+        right_at[right][color] = index
+
+    for index, (left, right) in enumerate(edges):
+        color_a = free_color(left_at[left])
+        color_b = free_color(right_at[right])
+
+        if color_a in right_at[right] and color_b not in left_at[left]:
+            color_a = color_b
+        elif color_a in right_at[right]:
+            # Walk the a/b alternating path starting at the right node. It can
+            # never reach the left node (a is free there), so swapping a and b
+            # on it frees colour a at the right node.
+            path = []
+            node, on_right, color = right, True, color_a
+            while True:
+                used = right_at[node] if on_right else left_at[node]
+                if color not in used:
+                    break
+                edge = used[color]
+                path.append(edge)
+                node = edges[edge][0] if on_right else edges[edge][1]
+                on_right = not on_right
+                color = color_b if color == color_a else color_a
+
+            for edge in path:
+                edge_left, edge_right = edges[edge]
+                del left_at[edge_left][colors[edge]]
+                del right_at[edge_right][colors[edge]]
+            for edge in path:
+                set_color(edge, color_b if colors[edge] == color_a else color_a)
+
+        set_color(index, color_a)
+
+    return colors
+
+
+def schedule_days(
+    workshop_sets: Dict[Hashable, List[str]],
+    num_days: int
+) -> Dict[Hashable, List[str]]:
+    """Distribute each student's workshops over the days.
+
+    The participants of a workshop are split round-robin into
+    ceil(participants / num_days) groups of at most num_days students. Every
+    group attends on distinct days, so no day gets more than
+    ceil(participants / num_days) participants - the fewest possible. A day
+    plan that respects a uniform capacity therefore exists whenever the
+    workshop has at most capacity * num_days participants in total.
+
+    Args:
+        workshop_sets: student_id -> num_days distinct workshops
+        num_days: Number of days
+
+    Returns:
+        student_id -> workshop per day
+    """
+    participants = defaultdict(list)
+    for student_id, workshops in workshop_sets.items():
+        for workshop in workshops:
+            participants[workshop].append(student_id)
+
+    edges = []
+    for workshop, student_ids in participants.items():
+        groups = -(-len(student_ids) // num_days)
+        for index, student_id in enumerate(student_ids):
+            edges.append((student_id, (workshop, index % groups)))
+
+    schedules = {student_id: [None] * num_days for student_id in workshop_sets}
+    for (student_id, (workshop, _)), day in zip(edges, color_bipartite_edges(edges, num_days)):
+        schedules[student_id][day] = workshop
+    return schedules
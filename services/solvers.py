@@ -0,0 +1,789 @@
+"""
+Solver backends for the optimization models.
+Wraps CBC, HiGHS and OR-Tools CP-SAT behind a common interface.
+"""
+import os
+import re
+import signal
+import subprocess
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pulp
+
+from services.matrix_model import MatrixModel
+from services.mps import read_solution, write_mps, write_start
+
+try:
+    import highspy
+except ImportError:  # Optional dependency
+    highspy = None
+
+try:
+    from ortools.sat.python import cp_model
+except ImportError:  # Optional dependency
+    cp_model = None
+
+
+@dataclass
+class SolverCapabilities:
+    """Options a solver backend understands."""
+    threads: bool
+    time_limit: bool
+    warm_start: bool
+    gap: bool
+    matrix: bool = False  # Solves MatrixModel arrays without pulp
+
+
+@dataclass
+class Incumbent:
+    """An improved solution reported while the solver runs."""
+    objective: float
+    bound: Optional[float]  # Best proven bound so far, None = unknown
+    elapsed: float  # Seconds since the solver started
+
+
+@dataclass
+class SolveOptions:
+    """Settings for a single solve."""
+    threads: Optional[int] = None
+    time_limit: Optional[float] = None  # Seconds
+    gap: Optional[float] = None  # Relative MIP gap at which to stop
+    warm_start: bool = False  # Start from the current variable values
+    # Cutting planes at the root; turning them off keeps weak relaxations
+    # from spending the time limit on cut passes that do not pay off
+    cuts: bool = True
+    # Called with every improved solution
+    on_incumbent: Optional[Callable[[Incumbent], None]] = None
+    # Once set, the solver stops and keeps its best solution so far
+    stop: Optional[threading.Event] = None
+
+
+@dataclass
+class SolveMetrics:
+    """Uniform report of a single solve."""
+    solver: str
+    status: str
+    objective: Optional[float]
+    bound: Optional[float]
+    solve_time: float
+    time_to_first_incumbent: Optional[float]
+    warm_start: bool
+    optimal: bool = False  # Optimality of the solution is proven
+
+    def to_dict(self) -> Dict:
+        """Convert to dictionary."""
+        return asdict(self)
+
+
+class SolverBackend:
+    """Base class of all solver backends.
+
+    A backend solves a pulp problem in place: afterwards the variables carry
+    their values and problem.status is set, whichever solver ran.
+    """
+
+    name = ''
+    capabilities = SolverCapabilities(threads=False, time_limit=False, warm_start=False, gap=False)
+
+    @classmethod
+    def available(cls) -> bool:
+        """Check whether the solver can be used in this installation."""
+        return True
+
+    def solve(self, problem: pulp.LpProblem, options: SolveOptions) -> SolveMetrics:
+        """Solve the problem.
+
+        Args:
+            problem: Problem to solve; receives the solution
+            options: Settings; unsupported ones are ignored
+
+        Returns:
+            SolveMetrics of the solve
+        """
+        raise NotImplementedError
+
+    def solve_matrix(
+        self,
+        model: MatrixModel,
+        options: SolveOptions,
+        start: Optional[np.ndarray] = None
+    ) -> Tuple[Optional[np.ndarray], SolveMetrics]:
+        """Solve a model given as arrays (requires capabilities.matrix).
+
+        Args:
+            model: Problem to solve
+            options: Settings; unsupported ones are ignored
+            start: Start solution, used with options.warm_start
+
+        Returns:
+            Column values (None if no solution was found) and SolveMetrics
+        """
+        raise NotImplementedError
+
+    def _metrics(
+        self,
+        problem: pulp.LpProblem,
+        options: SolveOptions,
+        solve_time: float,
+        first_incumbent: Optional[float],
+        bound: Optional[float] = None
+    ) -> SolveMetrics:
+        """Collect the metrics after a solve."""
+        objective = objective_value(problem) if has_solution(problem) else None
+        if bound is None and problem.sol_status == pulp.LpSolutionOptimal:
+            bound = objective
+        return SolveMetrics(
+            solver=self.name,
+            status=pulp.LpStatus[problem.status],
+            objective=objective,
+            bound=bound,
+            solve_time=solve_time,
+            time_to_first_incumbent=first_incumbent,
+            warm_start=options.warm_start and self.capabilities.warm_start,
+            optimal=problem.sol_status == pulp.LpSolutionOptimal
+        )
+
+    def _matrix_metrics(
+        self,
+        model: MatrixModel,
+        solution: Optional[np.ndarray],
+        optimal: bool,
+        status: str,
+        options: SolveOptions,
+        solve_time: float,
+        first_incumbent: Optional[float],
+        bound: Optional[float] = None
+    ) -> SolveMetrics:
+        """Collect the metrics after a matrix solve."""
+        objective = model.objective_value(solution) if solution is not None else None
+        if optimal:
+            bound = objective
+        return SolveMetrics(
+            solver=self.name,
+            status=status,
+            objective=objective,
+            bound=bound,
+            solve_time=solve_time,
+            time_to_first_incumbent=first_incumbent,
+            warm_start=options.warm_start and self.capabilities.warm_start,
+            optimal=optimal
+        )
+
+
+def has_solution(problem: pulp.LpProblem) -> bool:
+    """Check whether a solved problem carries a feasible solution."""
+    return problem.sol_status in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible)
+
+
+def objective_value(problem: pulp.LpProblem) -> float:
+    """Objective value at the current variable values.
+
+    pulp.value() returns None for an objective without terms, e.g. when no
+    student has a wish; such an objective is constantly 0.
+    """
+    value = pulp.value(problem.objective)
+    return 0.0 if value is None else value
+
+
+_BACKENDS: Dict[str, type] = {}
+
+
+def register_solver(backend: type) -> type:
+    """Class decorator that makes a backend selectable by its name."""
+    _BACKENDS[backend.name] = backend
+    return backend
+
+
+def available_solvers() -> List[str]:
+    """Names of all registered backends that can run here."""
+    return [name for name, backend in _BACKENDS.items() if backend.available()]
+
+
+# Backend used for 'auto'. On the event sizes measured so far (up to
+# 6000 students and 60 workshops) CBC solved fastest; HiGHS and CP-SAT
+# found the same optimum in two to fifteen times the solve time.
+AUTO_SOLVER = 'cbc'
+
+
+def get_solver(name: str) -> SolverBackend:
+    """Create a solver backend.
+
+    Args:
+        name: Registered backend name or 'auto'
+
+    Returns:
+        SolverBackend instance
+
+    Raises:
+        ValueError: If the backend is unknown or not installed
+    """
+    if name == 'auto':
+        name = AUTO_SOLVER
+    if name not in _BACKENDS:
+        raise ValueError(f"Unbekannter Solver: {name}")
+    if not _BACKENDS[name].available():
+        raise ValueError(f"Solver {name} ist nicht installiert")
+    return _BACKENDS[name]()
+
+
+def read_first_incumbent_time(log_path: str) -> Optional[float]:
+    """Find the time CBC needed for its first integer solution.
+
+    A warm start solution counts from the moment CBC accepted it.
+
+    Args:
+        log_path: Path of a CBC log written with -timeMode elapsed
+
+    Returns:
+        Seconds until the first integer solution, or None if there was none
+    """
+    seconds = re.compile(r'([\d.]+) seconds')
+    last_time = 0.0
+    with open(log_path, encoding='utf-8', errors='replace') as log:
+        for line in log:
+            if line.startswith('Cbc0045I'):  # MIPStart provided solution
+                return last_time
+            match = seconds.search(line)
+            if match:
+                last_time = float(match.group(1))
+                if line.startswith(('Cbc0004I', 'Cbc0012I', 'Cbc0016I')):
+                    return last_time
+    return None
+
+
+class CbcLogWatcher:
+    """Follows a growing CBC log and reports improved solutions.
+
+    CBC logs the objective of the minimization it solves internally, so
+    values of a maximization appear negated. The continuous objective is
+    printed with the original sign.
+    """
+
+    SOLUTION = re.compile(r'^Cbc00(?:04|12|16)I Integer solution of (\S+) .*\(([\d.]+) seconds\)')
+    PROGRESS = re.compile(r'^Cbc0010I .* best possible (\S+) \(([\d.]+) seconds\)')
+    CONTINUOUS = re.compile(r'^Continuous objective value is (\S+) - ([\d.]+) seconds')
+
+    def __init__(
+        self,
+        log_path: str,
+        maximize: bool,
+        on_incumbent: Optional[Callable[[Incumbent], None]],
+        best: Optional[float] = None
+    ):
+        self.log_path = log_path
+        self.sign = -1 if maximize else 1
+        self.maximize = maximize
+        self.on_incumbent = on_incumbent
+        self.best = best
+        self.bound = None
+        self._position = 0
+        self._rest = ''
+
+    def poll(self):
+        """Process the lines written since the last call."""
+        with open(self.log_path, encoding='utf-8', errors='replace') as log:
+            log.seek(self._position)
+            text = self._rest + log.read()
+            self._position = log.tell()
+        lines = text.split('\n')
+        self._rest = lines.pop()
+        for line in lines:
+            self._process(line)
+
+    def _process(self, line: str):
+        match = self.CONTINUOUS.match(line)
+        if match:
+            self.bound = float(match.group(1))
+            return
+        match = self.PROGRESS.match(line)
+        if match:
+            self.bound = self.sign * float(match.group(1))
+            return
+        match = self.SOLUTION.match(line)
+        if match:
+            objective = self.sign * float(match.group(1))
+            if self.best is None or self._better(objective, self.best):
+                self.best = objective
+                if self.on_incumbent is not None:
+                    self.on_incumbent(Incumbent(objective, self.bound, float(match.group(2))))
+
+    def _better(self, value: float, other: float) -> bool:
+        return value > other if self.maximize else value < other
+
+
+@register_solver
+class CbcBackend(SolverBackend):
+    """COIN-OR CBC, bundled with pulp.
+
+    CBC runs as a separate process whose log is watched for improved
+    solutions. A stop request interrupts it like Ctrl+C, after which CBC
+    writes its best solution. Windows offers no such signal for a single
+    process; there CBC is terminated without a solution.
+    """
+
+    name = 'cbc'
+    capabilities = SolverCapabilities(
+        threads=True, time_limit=True, warm_start=True, gap=True, matrix=True
+    )
+
+    # Seconds between two looks at the log
+    POLL_INTERVAL = 0.1
+    # Seconds CBC gets to finish after its time limit or an interrupt. CBC
+    # only checks both between cut passes, which can take minutes on hard
+    # models; afterwards it is interrupted and finally killed.
+    STOP_GRACE = 5.0
+
+    def solve(self, problem: pulp.LpProblem, options: SolveOptions) -> SolveMetrics:
+        solver = pulp.PULP_CBC_CMD(
+            msg=0,
+            warmStart=options.warm_start,
+            threads=options.threads,
+            timeLimit=options.time_limit,
+            gapRel=options.gap
+        )
+        maximize = problem.sense == pulp.LpMaximize
+        start_objective = objective_value(problem) if options.warm_start else None
+        mps_path, solution_path, start_path, log_path = solver.create_tmp_files(
+            problem.name, 'mps', 'sol', 'mst', 'log'
+        )
+        try:
+            variables, variable_names, constraint_names, _ = problem.writeMPS(mps_path, rename=1)
+            if options.warm_start:
+                solver.writesol(start_path, problem, variables, variable_names, constraint_names)
+            args = self._arguments(
+                solver, mps_path, maximize, options, start_path, solution_path,
+                printing=['-printingOptions', 'all']
+            )
+
+            watcher = CbcLogWatcher(log_path, maximize, options.on_incumbent, start_objective)
+            started = time.time()
+            stopped = self._run(args, log_path, watcher, options.stop, options.time_limit)
+            solve_time = time.time() - started
+            watcher.poll()
+
+            if os.path.exists(solution_path):
+                status, values, _, _, _, sol_status = solver.readsol_MPS(
+                    solution_path, problem, variables, variable_names, constraint_names
+                )
+                problem.assignVarsVals(values)
+                problem.assignStatus(status, sol_status)
+            elif stopped:
+                problem.assignStatus(pulp.LpStatusNotSolved, pulp.LpSolutionNoSolutionFound)
+            else:
+                raise pulp.PulpSolverError("CBC hat keine Lösung geschrieben")
+
+            return self._metrics(
+                problem, options, solve_time,
+                read_first_incumbent_time(log_path),
+                watcher.bound
+            )
+        finally:
+            solver.delete_tmp_files(mps_path, solution_path, start_path, log_path)
+
+    def solve_matrix(
+        self,
+        model: MatrixModel,
+        options: SolveOptions,
+        start: Optional[np.ndarray] = None
+    ) -> Tuple[Optional[np.ndarray], SolveMetrics]:
+        solver = pulp.PULP_CBC_CMD(
+            msg=0, threads=options.threads, timeLimit=options.time_limit, gapRel=options.gap
+        )
+        warm_start = options.warm_start and start is not None
+        start_objective = model.objective_value(start) if warm_start else None
+        mps_path, solution_path, start_path, log_path = solver.create_tmp_files(
+            'allocation', 'mps', 'sol', 'mst', 'log'
+        )
+        try:
+            write_mps(model, mps_path)
+            if warm_start:
+                write_start(start_path, start)
+            args = self._arguments(
+                solver, mps_path, model.maximize, options,
+                start_path if warm_start else None, solution_path
+            )
+
+            watcher = CbcLogWatcher(log_path, model.maximize, options.on_incumbent, start_objective)
+            started = time.time()
+            stopped = self._run(args, log_path, watcher, options.stop, options.time_limit)
+            solve_time = time.time() - started
+            watcher.poll()
+
+            solution, optimal, status = None, False, 'Not Solved'
+            if os.path.exists(solution_path):
+                solution, optimal, status = read_solution(solution_path, model.num_columns)
+            elif not stopped:
+                raise pulp.PulpSolverError("CBC hat keine Lösung geschrieben")
+
+            return solution, self._matrix_metrics(
+                model, solution, optimal, status, options, solve_time,
+                read_first_incumbent_time(log_path), watcher.bound
+            )
+        finally:
+            solver.delete_tmp_files(mps_path, solution_path, start_path, log_path)
+
+    @staticmethod
+    def _arguments(
+        solver: pulp.PULP_CBC_CMD,
+        mps_path: str,
+        maximize: bool,
+        options: SolveOptions,
+        start_path: Optional[str],
+        solution_path: str,
+        printing: List[str] = ()
+    ) -> List[str]:
+        """Command line of the CBC binary."""
+        args = [solver.path, mps_path]
+        if maximize:
+            args.append('-max')
+        if options.warm_start and start_path is not None:
+            args += ['-mips', start_path]
+        if options.time_limit is not None:
+            args += ['-sec', str(options.time_limit)]
+        if not options.cuts:
+            args += ['-cuts', 'off']
+        for option in solver.getOptions():
+            args += ('-' + option).split()
+        return args + ['-solve'] + list(printing) + ['-solution', solution_path]
+
+    def _run(
+        self,
+        args: List[str],
+        log_path: str,
+        watcher: CbcLogWatcher,
+        stop: Optional[threading.Event],
+        time_limit: Optional[float] = None
+    ) -> bool:
+        """Run CBC until it finishes.
+
+        Returns:
+            True if it was stopped on request or for overrunning the time limit
+        """
+        kwargs = {}
+        if os.name == 'nt':
+            # Keep a console window from flashing up in the GUI
+            kwargs['creationflags'] = subprocess.CREATE_NO_WINDOW
+        started = time.time()
+        stopped_at = None
+        with open(log_path, 'w') as log:
+            process = subprocess.Popen(
+                args, stdout=log, stderr=log, stdin=subprocess.DEVNULL, **kwargs
+            )
+            while True:
+                try:
+                    process.wait(self.POLL_INTERVAL)
+                    break
+                except subprocess.TimeoutExpired:
+                    pass
+                watcher.poll()
+                now = time.time()
+                overdue = time_limit is not None and now - started > time_limit + self.STOP_GRACE
+                if stopped_at is None and (overdue or stop is not None and stop.is_set()):
+                    stopped_at = now
+                    if os.name == 'nt':
+                        process.terminate()
+                    else:
+                        process.send_signal(signal.SIGINT)
+                elif stopped_at is not None and now - stopped_at > self.STOP_GRACE:
+                    process.kill()
+        stopped = stopped_at is not None
+        if process.returncode != 0 and not stopped:
+            raise pulp.PulpSolverError(f"CBC wurde mit Code {process.returncode} beendet")
+        return stopped
+
+
+if highspy is not None:
+    class _HighsWithStart(pulp.HiGHS):
+        """pulp's HiGHS interface, extended by a start solution."""
+
+        def __init__(self, warm_start: bool, **kwargs):
+            super().__init__(**kwargs)
+            self.warm_start = warm_start
+
+        def callSolver(self, lp):
+            if self.warm_start:
+                start = highspy.HighsSolution()
+                start.col_value = [var.varValue or 0 for var in lp.variables()]
+                start.value_valid = True
+                lp.solverModel.setSolution(start)
+            super().callSolver(lp)
+
+
+@register_solver
+class HighsBackend(SolverBackend):
+    """HiGHS through the optional highspy package."""
+
+    name = 'highs'
+    capabilities = SolverCapabilities(
+        threads=True, time_limit=True, warm_start=True, gap=True, matrix=True
+    )
+
+    @classmethod
+    def available(cls) -> bool:
+        return highspy is not None
+
+    def solve(self, problem: pulp.LpProblem, options: SolveOptions) -> SolveMetrics:
+        # HiGHS minimizes the negated objective of a maximization
+        sign = -1 if problem.sense == pulp.LpMaximize else 1
+        incumbents = []
+        callback_type = highspy.cb.HighsCallbackType
+
+        started = time.time()
+        problem.solve(_HighsWithStart(
+            warm_start=options.warm_start,
+            msg=False,
+            threads=options.threads,
+            timeLimit=options.time_limit,
+            gapRel=options.gap,
+            callbackTuple=(self._callback(options, sign, incumbents), None),
+            callbacksToActivate=[
+                callback_type.kCallbackMipImprovingSolution,
+                callback_type.kCallbackMipInterrupt
+            ]
+        ))
+        solve_time = time.time() - started
+
+        info = problem.solverModel.getInfo()
+        if info.primal_solution_status == 0:
+            # pulp reports interrupted runs as feasible even without a solution
+            problem.assignStatus(pulp.LpStatusNotSolved, pulp.LpSolutionNoSolutionFound)
+        return self._metrics(
+            problem, options, solve_time,
+            incumbents[0] if incumbents else None,
+            self._finite(sign * info.mip_dual_bound)
+        )
+
+    def solve_matrix(
+        self,
+        model: MatrixModel,
+        options: SolveOptions,
+        start: Optional[np.ndarray] = None
+    ) -> Tuple[Optional[np.ndarray], SolveMetrics]:
+        inf = highspy.kHighsInf
+        lp = highspy.HighsLp()
+        lp.num_col_ = model.num_columns
+        lp.num_row_ = model.num_rows
+        lp.sense_ = highspy.ObjSense.kMaximize if model.maximize else highspy.ObjSense.kMinimize
+        lp.col_cost_ = model.objective
+        lp.col_lower_ = model.column_lower
+        lp.col_upper_ = np.where(np.isinf(model.column_upper), inf, model.column_upper)
+        lp.row_lower_ = np.where(np.isinf(model.row_lower), -inf, model.row_lower)
+        lp.row_upper_ = np.where(np.isinf(model.row_upper), inf, model.row_upper)
+        lp.integrality_ = [highspy.HighsVarType.kInteger] * model.num_columns
+        starts, row_index, values = model.column_major()
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        lp.a_matrix_.num_col_ = model.num_columns
+        lp.a_matrix_.num_row_ = model.num_rows
+        lp.a_matrix_.start_ = starts
+        lp.a_matrix_.index_ = row_index
+        lp.a_matrix_.value_ = values
+
+        highs = highspy.Highs()
+        highs.setOptionValue('output_flag', False)
+        if options.threads:
+            highs.setOptionValue('threads', options.threads)
+        if options.time_limit is not None:
+            highs.setOptionValue('time_limit', float(options.time_limit))
+        if options.gap is not None:
+            highs.setOptionValue('mip_rel_gap', float(options.gap))
+        highs.passModel(lp)
+        if options.warm_start and start is not None:
+            solution = highspy.HighsSolution()
+            solution.col_value = start.tolist()
+            solution.value_valid = True
+            highs.setSolution(solution)
+
+        incumbents = []
+        callback_type = highspy.cb.HighsCallbackType
+        highs.setCallback(self._callback(options, 1, incumbents), None)
+        highs.startCallback(callback_type.kCallbackMipImprovingSolution)
+        highs.startCallback(callback_type.kCallbackMipInterrupt)
+
+        started = time.time()
+        highs.run()
+        solve_time = time.time() - started
+
+        info = highs.getInfo()
+        status = highs.getModelStatus()
+        solution = None
+        if info.primal_solution_status != 0:
+            solution = np.array(highs.getSolution().col_value)
+        if status == highspy.HighsModelStatus.kInfeasible:
+            status_text = 'Infeasible'
+        else:
+            status_text = 'Optimal' if solution is not None else 'Not Solved'
+        return solution, self._matrix_metrics(
+            model, solution, status == highspy.HighsModelStatus.kOptimal, status_text,
+            options, solve_time, incumbents[0] if incumbents else None,
+            self._finite(info.mip_dual_bound)
+        )
+
+    @staticmethod
+    def _callback(options: SolveOptions, sign: int, incumbents: List[float]) -> Callable:
+        """HiGHS callback that reports solutions and handles stop requests."""
+        callback_type = highspy.cb.HighsCallbackType
+
+        def on_callback(kind, message, data_out, data_in, user_data):
+            if kind == callback_type.kCallbackMipImprovingSolution:
+                incumbents.append(data_out.running_time)
+                if options.on_incumbent is not None:
+                    bound = HighsBackend._finite(sign * data_out.mip_dual_bound)
+                    options.on_incumbent(Incumbent(
+                        sign * data_out.objective_function_value, bound, data_out.running_time
+                    ))
+            elif options.stop is not None and options.stop.is_set():
+                data_in.user_interrupt = True
+
+        return on_callback
+
+    @staticmethod
+    def _finite(value: float) -> Optional[float]:
+        return value if abs(value) != float('inf') else None
+
+
+@register_solver
+class CpSatBackend(SolverBackend):
+    """OR-Tools CP-SAT through the optional ortools package.
+
+    CP-SAT needs integer variables and coefficients. Fractional objective
+    weights are scaled to integers.
+    """
+
+    name = 'cpsat'
+    capabilities = SolverCapabilities(threads=True, time_limit=True, warm_start=True, gap=True)
+
+    # Bound for variables without an upper bound
+    MAX_VALUE = 2 ** 31 - 1
+
+    @classmethod
+    def available(cls) -> bool:
+        return cp_model is not None
+
+    def solve(self, problem: pulp.LpProblem, options: SolveOptions) -> SolveMetrics:
+        model = cp_model.CpModel()
+        variables = problem.variables()
+        cp_vars = {}
+        for var in variables:
+            if var.cat != pulp.LpInteger:
+                raise ValueError(f"CP-SAT benötigt ganzzahlige Variablen ({var.name})")
+            cp_vars[var.name] = model.NewIntVar(
+                int(var.lowBound) if var.lowBound is not None else -self.MAX_VALUE,
+                int(var.upBound) if var.upBound is not None else self.MAX_VALUE,
+                var.name
+            )
+            if options.warm_start and var.varValue is not None:
+                model.AddHint(cp_vars[var.name], int(round(var.varValue)))
+
+        for constraint in problem.constraints.values():
+            items = list(constraint.items())
+            if any(coefficient != int(coefficient) for _, coefficient in items):
+                raise ValueError("CP-SAT benötigt ganzzahlige Koeffizienten")
+            expression = cp_model.LinearExpr.WeightedSum(
+                [cp_vars[var.name] for var, _ in items],
+                [int(coefficient) for _, coefficient in items]
+            )
+            rhs = -constraint.constant
+            if constraint.sense == pulp.LpConstraintLE:
+                model.Add(expression <= int(rhs))
+            elif constraint.sense == pulp.LpConstraintGE:
+                model.Add(expression >= int(rhs))
+            else:
+                model.Add(expression == int(rhs))
+
+        scale = self._objective_scale([coefficient for _, coefficient in problem.objective.items()])
+        objective = cp_model.LinearExpr.WeightedSum(
+            [cp_vars[var.name] for var in problem.objective],
+            [int(round(coefficient * scale)) for coefficient in problem.objective.values()]
+        )
+        if problem.sense == pulp.LpMaximize:
+            model.Maximize(objective)
+        else:
+            model.Minimize(objective)
+
+        solver = cp_model.CpSolver()
+        if options.threads:
+            solver.parameters.num_workers = options.threads
+        if options.time_limit:
+            solver.parameters.max_time_in_seconds = options.time_limit
+        if options.gap:
+            solver.parameters.relative_gap_limit = options.gap
+
+        incumbents = []
+        callback = _SolutionReporter(
+            incumbents, scale, problem.objective.constant, options.on_incumbent
+        )
+        finished = threading.Event()
+        if options.stop is not None:
+            threading.Thread(
+                target=self._stop_on_request, args=(solver, options.stop, finished), daemon=True
+            ).start()
+        started = time.time()
+        try:
+            status = solver.Solve(model, callback)
+        finally:
+            finished.set()
+        solve_time = time.time() - started
+
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            for var in variables:
+                var.varValue = solver.Value(cp_vars[var.name])
+            solution = pulp.LpSolutionOptimal if status == cp_model.OPTIMAL else pulp.LpSolutionIntegerFeasible
+            problem.assignStatus(pulp.LpStatusOptimal, solution)
+        elif status == cp_model.INFEASIBLE:
+            problem.assignStatus(pulp.LpStatusInfeasible, pulp.LpSolutionInfeasible)
+        else:
+            problem.assignStatus(pulp.LpStatusNotSolved, pulp.LpSolutionNoSolutionFound)
+
+        bound = None
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            bound = solver.BestObjectiveBound() / scale + problem.objective.constant
+        return self._metrics(
+            problem, options, solve_time, incumbents[0] if incumbents else None, bound
+        )
+
+    @staticmethod
+    def _stop_on_request(solver, stop: threading.Event, finished: threading.Event):
+        """Stop the search once a stop is requested, until the solve ends."""
+        while not finished.wait(0.1):
+            if stop.is_set():
+                solver.StopSearch()
+                return
+
+    @staticmethod
+    def _objective_scale(coefficients: List[float]) -> int:
+        """Smallest power of ten that makes all coefficients integer (up to 10^6)."""
+        scale = 1
+        while scale < 10 ** 6 and any(abs(c * scale - round(c * scale)) > 1e-9 for c in coefficients):
+            scale *= 10
+        return scale
+
+
+if cp_model is not None:
+    class _SolutionReporter(cp_model.CpSolverSolutionCallback):
+        """Records and reports every solution CP-SAT finds."""
+
+        def __init__(
+            self,
+            times: List[float],
+            scale: int,
+            offset: float,
+            on_incumbent: Optional[Callable[[Incumbent], None]]
+        ):
+            super().__init__()
+            self.times = times
+            self.scale = scale
+            self.offset = offset
+            self.on_incumbent = on_incumbent
+
+        def on_solution_callback(self):
+            self.times.append(self.WallTime())
+            if self.on_incumbent is not None:
+                self.on_incumbent(Incumbent(
+                    self.ObjectiveValue() / self.scale + self.offset,
+                    self.BestObjectiveBound() / self.scale + self.offset,
+                    self.WallTime()
+                ))
@@ -0,0 +1,239 @@
+"""
+Two-phase optimization for workshop allocation.
+First chooses the set of workshops of every student, then plans the days.
+"""
+from typing import Dict, List, Optional, Set
+import pulp
+
+from services.optimizer import WorkshopOptimizer, OptimizationResult
+from services.scheduling import schedule_days
+
+
+class TwoPhaseOptimizer(WorkshopOptimizer):
+    """Solves day-symmetric problems without a day index.
+
+    When all days are interchangeable, a student's satisfaction only depends
+    on which workshops they attend, not on which day. Phase one picks
+    num_days distinct workshops per student with at most capacity * num_days
+    participants per workshop. Phase two assigns
+    the days by edge colouring, which always meets the per-day capacity.
+    Both phases together are exact; the day index simply never reaches the
+    solver. Other problems, objectives other than 'weighted' and friend
+    groups, whose members need the same day for every workshop, are handed
+    to the full day-indexed model.
+    """
+
+    def optimize(self) -> OptimizationResult:
+        """
+        Run the optimization algorithm.
+
+        Returns:
+            OptimizationResult with assignments and statistics
+        """
+        if not self._is_day_symmetric() or self.objective_mode != 'weighted' or self.groups:
+            return super().optimize()
+
+        try:
+            self.cohorts = self._build_cohorts()
+            assignments = self._solve(
+                self._build_set_model, self._extract_schedules, self._set_initial_set_values
+            )
+            return self._make_result(assignments)
+
+        except Exception as e:
+            return OptimizationResult(
+                assignments={},
+                statistics={},
+                success=False,
+                message=f"Fehler bei der Optimierung: {str(e)}"
+            )
+
+    def _build_set_model(self, sparse: bool, dense_cohorts: Set[int]):
+        """Create the phase one problem over workshop sets.
+
+        Mirrors the day-indexed model with every day summed up: a cohort needs
+        num_days placements per member, at most one per member and workshop,
+        and each workshop offers its capacity per day. Workshops that never
+        take place get no variables.
+
+        Args:
+            sparse: Only create variables for wished workshops
+            dense_cohorts: Cohorts that get variables for all workshops anyway
+        """
+        self.problem = pulp.LpProblem("Workshop_Sets", pulp.LpMaximize)
+
+        # y[cohort][workshop] = number of cohort members attending workshop
+        self.variables = {}
+        self.fallback_variables = {}
+        self.fallback_seats = {}
+        for cohort_index, members in enumerate(self.cohorts):
+            is_sparse = sparse and cohort_index not in dense_cohorts
+            candidates = self._wished_workshops(members[0]) if is_sparse else self.workshops
+            size = len(members)
+            category = 'Binary' if size == 1 else 'Integer'
+            self.variables[cohort_index] = {
+                workshop: pulp.LpVariable(
+                    f"c{cohort_index}_w{workshop}", lowBound=0, upBound=size, cat=category
+                )
+                for workshop in candidates if self._offered_days(workshop)
+            }
+            if is_sparse:
+                # g[cohort] = number of non-wished placements of all members
+                self.fallback_variables[cohort_index] = pulp.LpVariable(
+                    f"f{cohort_index}", lowBound=0, upBound=size * self.num_days, cat='Integer'
+                )
+
+        if self.fallback_variables and self._is_limited():
+            for index, workshop in enumerate(self.workshops):
+                if self._offered_days(workshop):
+                    self.fallback_seats[workshop] = pulp.LpVariable(
+                        f"seats_w{index}", lowBound=0, cat='Integer'
+                    )
+
+        self.problem += pulp.lpSum([
+            weight * self.variables[cohort_index][workshop]
+            for cohort_index, members in enumerate(self.cohorts)
+            for workshop, weight in self._wished_workshops(members[0]).items()
+            if workshop in self.variables[cohort_index]
+        ]), "Total_Satisfaction"
+
+        # Each member attends num_days workshops
+        for cohort_index, members in enumerate(self.cohorts):
+            slots = list(self.variables[cohort_index].values())
+            if cohort_index in self.fallback_variables:
+                slots.append(self.fallback_variables[cohort_index])
+            self.problem += (
+                pulp.lpSum(slots) == len(members) * self.num_days,
+                f"num_workshops_c{cohort_index}"
+            )
+
+        if not self._is_limited():
+            return
+
+        # Capacity over all days
+        participants = {workshop: [] for workshop in self.workshops}
+        for cohort_vars in self.variables.values():
+            for workshop, var in cohort_vars.items():
+                participants[workshop].append(var)
+        for workshop in self.workshops:
+            capacity = self.capacities[workshop, 0]
+            if not capacity:
+                continue
+            seat_capacity = capacity * self.num_days
+            seats = participants[workshop]
+            if workshop in self.fallback_seats:
+                seats = seats + [self.fallback_seats[workshop]]
+            self.problem += (
+                pulp.lpSum(seats) <= seat_capacity,
+                f"max_capacity_w{workshop}"
+            )
+
+        if not self.fallback_seats:
+            return
+
+        # Fallback seats, restricted as in the day-indexed model
+        self.problem += (
+            pulp.lpSum(self.fallback_seats.values()) ==
+            pulp.lpSum(self.fallback_variables.values()),
+            "fallback_seats"
+        )
+        wishers = {workshop: [] for workshop in self.workshops}
+        fallback_students = 0
+        for cohort_index in self.fallback_variables:
+            fallback_students += len(self.cohorts[cohort_index])
+            for workshop in self.variables[cohort_index]:
+                wishers[workshop].append(cohort_index)
+
+        for index, workshop in enumerate(self.workshops):
+            if workshop not in self.fallback_seats:
+                continue
+            self.problem += (
+                pulp.lpSum([
+                    self.fallback_variables[cohort_index] for cohort_index in wishers[workshop]
+                ]) <= pulp.lpSum([
+                    seats for other, seats in self.fallback_seats.items() if other != workshop
+                ]),
+                f"fallback_wishers_w{index}"
+            )
+            self.problem += (
+                self.fallback_seats[workshop] <= fallback_students - sum(
+                    len(self.cohorts[cohort_index]) for cohort_index in wishers[workshop]
+                ),
+                f"fallback_once_w{index}"
+            )
+
+    def _set_initial_set_values(self, assignments: Dict[int, List[str]]):
+        """Set the variables of the phase one model to a known assignment."""
+        for cohort_index in range(len(self.cohorts)):
+            for var in self.variables[cohort_index].values():
+                var.setInitialValue(0)
+            if cohort_index in self.fallback_variables:
+                self.fallback_variables[cohort_index].setInitialValue(0)
+        for var in self.fallback_seats.values():
+            var.setInitialValue(0)
+
+        for cohort_index, members in enumerate(self.cohorts):
+            cohort_vars = self.variables[cohort_index]
+            for student in members:
+                for workshop in assignments[student['id']]:
+                    if workshop in cohort_vars:
+                        var = cohort_vars[workshop]
+                    else:
+                        var = self.fallback_variables[cohort_index]
+                        if workshop in self.fallback_seats:
+                            seats = self.fallback_seats[workshop]
+                            seats.setInitialValue(seats.varValue + 1)
+                    var.setInitialValue(var.varValue + 1)
+
+    def _extract_schedules(self) -> Optional[Dict[int, List[str]]]:
+        """Turn the phase one solution into day schedules.
+
+        Each cohort's placements are dealt round-robin to its members. Since
+        no workshop has more placements than members, nobody gets a workshop
+        twice. Fallback placements are seated on free workshops, then phase
+        two assigns the days.
+
+        Returns:
+            Assignments per student, or None if fallback placements could not
+            be seated (the affected cohorts are stored in _unseated_cohorts)
+        """
+        workshop_sets = {}
+        fallback_slots = []
+        fallback_cohorts = {}
+        for cohort_index, members in enumerate(self.cohorts):
+            placements = [
+                workshop
+                for workshop, var in self.variables[cohort_index].items()
+                for _ in range(int(round(var.varValue)))
+            ]
+            for member_index, student in enumerate(members):
+                chosen = placements[member_index::len(members)]
+                workshop_sets[student['id']] = chosen
+                for _ in range(self.num_days - len(chosen)):
+                    fallback_slots.append((student['id'], 0))
+                    fallback_cohorts[student['id']] = cohort_index
+
+        self._unseated_cohorts = set()
+        if fallback_slots:
+            # Seat fallback placements over all days; day 0 stands for all of them
+            load = {(workshop, 0): 0 for workshop in self.workshops}
+            for chosen in workshop_sets.values():
+                for workshop in chosen:
+                    load[workshop, 0] += 1
+            capacity = {
+                (workshop, 0): self.capacities[workshop, 0] and self.capacities[workshop, 0] * self.num_days
+                for workshop in self.workshops
+            }
+            taken = {student_id: set(chosen) for student_id, chosen in workshop_sets.items()}
+
+            seats = self._seat_fallback_students(fallback_slots, taken, load, capacity)
+            if seats is None:
+                self._unseated_cohorts = set(fallback_cohorts.values())
+                return None
+            for (student_id, _), workshop in zip(fallback_slots, seats):
+                workshop_sets[student_id].append(workshop)
+
+        schedules = schedule_days(workshop_sets, self.num_days)
+
+        # Keep the input order of the students
+        return {student['id']: schedules[student['id']] for student in self.students}
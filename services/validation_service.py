@@ -60,6 +60,17 @@ class ValidationService:
                 f"{missing_classes} Schüler haben keine Klasse angegeben"
             )
 
+        # Check for partner wishes that are not returned
+        partners = {s.id: s.partners for s in students}
+        one_sided = sum(
+            1 for s in students for partner in s.partners
+            if s.id not in partners.get(partner, [])
+        )
+        if one_sided > 0:
+            result.add_warning(
+                f"{one_sided} Partnerwünsche sind nicht gegenseitig und werden ignoriert"
+            )
+
         return result
 
     def validate_parameters(self, params: Dict) -> ValidationResult:
@@ -90,6 +101,18 @@ class ValidationService:
             elif max_participants > 50:
                 result.add_warning("Sehr große Gruppengröße (> 50)")
 
+        # Validate workshop_capacities
+        for workshop, setting in (params.get('workshop_capacities') or {}).items():
+            values = setting if isinstance(setting, (list, tuple)) else [setting]
+            if any(value is not None and (not isinstance(value, int) or value < 0)
+                   for value in values):
+                result.add_error(f"Kapazität von Workshop '{workshop}' muss eine Zahl ab 0 sein")
+
+        # Validate workshop_minimums
+        for workshop, minimum in (params.get('workshop_minimums') or {}).items():
+            if not isinstance(minimum, int) or minimum < 0:
+                result.add_error(f"Mindestgröße von Workshop '{workshop}' muss eine Zahl ab 0 sein")
+
         # Validate wish_weights
         wish_weights = params.get('wish_weights', {})
         if wish_weights:
@@ -140,6 +140,8 @@ class TestStudent:
         assert student.id == 1
         assert student.vorname == "Anna"
         assert student.full_name == "Anna Müller"
+        assert student.partners == []
+        assert Student.from_dict({**data, 'partners': [2]}).partners == [2]
 
     def test_to_dict(self):
         """Test converting student to dictionary."""
@@ -157,6 +159,7 @@ class TestStudent:
         assert data['id'] == 1
         assert data['vorname'] == "Anna"
         assert data['nachname'] == "Müller"
+        assert data['partners'] == []
 
 
 class TestOptimizationResult:
@@ -251,3 +254,12 @@ class TestWorkshop:
         """Test calculating utilization rate."""
         workshop = Workshop(name="Töpfern", max_participants=20, current_participants=15)
         assert workshop.get_utilization_rate() == 75.0
+
+    def test_day_capacities(self):
+        """Test capacities of single days and the setting they come from."""
+        workshop = Workshop.from_setting("Töpfern", [12, 0, None], default=20)
+        assert [workshop.capacity(day) for day in range(4)] == [12, 0, 20, 20]
+        assert workshop.is_offered(0) and not workshop.is_offered(1)
+        assert workshop.to_setting() == [12, 0]
+        assert Workshop.from_setting("Chor", None, default=20).capacity(2) is None
+        assert Workshop(name="Chor", max_participants=30).to_setting() == 30
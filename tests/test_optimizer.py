@@ -0,0 +1,1378 @@
+"""Tests for the workshop optimizer."""
+import itertools
+import random
+import threading
+import numpy as np
+import pytest
+from collections import Counter
+
+from services.decomposition import friend_groups
+from services.optimizer import WorkshopOptimizer
+from services.scheduling import color_bipartite_edges, schedule_days
+from services.two_phase import TwoPhaseOptimizer
+from services.min_cost_flow import FlowOptimizer, assign_workshop_sets
+from services.heuristic import HeuristicOptimizer
+from services.lagrangian import LagrangianOptimizer, day_relaxation
+from services.pareto import ParetoOptimizer
+from services.mechanisms import DeferredAcceptanceOptimizer, SerialDictatorshipOptimizer
+from services.matrix_model import MatrixModel
+from services.mps import read_solution
+from services.solvers import (
+    CbcLogWatcher, SolveOptions, available_solvers, get_solver, read_first_incumbent_time
+)
+
+
+WEIGHTS = {'wunsch1': 10, 'wunsch2': 5, 'wunsch3': 2, 'wunsch4': 1}
+
+
+def make_students(num_students, workshops, seed=0):
+    """Create students with four distinct wishes, skewed towards the first workshops."""
+    rng = random.Random(seed)
+    popularity = [1 / (i + 1) for i in range(len(workshops))]
+    students = []
+    for i in range(num_students):
+        wishes = []
+        while len(wishes) < 4:
+            workshop = rng.choices(workshops, popularity)[0]
+            if workshop not in wishes:
+                wishes.append(workshop)
+        students.append({
+            'id': i,
+            'vorname': f"Vorname{i}",
+            'nachname': f"Nachname{i}",
+            'klasse': f"{5 + i % 3}{'abc'[i % 2]}",
+            'wunsch1': wishes[0],
+            'wunsch2': wishes[1],
+            'wunsch3': wishes[2],
+            'wunsch4': wishes[3],
+        })
+    return students
+
+
+def total_score(students, assignments, weights=WEIGHTS):
+    """Weighted satisfaction of an assignment, as maximized by the optimizer."""
+    score = 0
+    for student in students:
+        for workshop in assignments[student['id']]:
+            score += sum(
+                weight for key, weight in weights.items()
+                if student.get(key) == workshop
+            )
+    return score
+
+
+def assert_valid(assignments, num_days, max_participants=None):
+    """Check the hard constraints of an assignment."""
+    for assigned in assignments.values():
+        assert len(assigned) == num_days
+        assert None not in assigned
+        assert len(set(assigned)) == num_days
+    if max_participants:
+        load = Counter(
+            (workshop, day)
+            for assigned in assignments.values()
+            for day, workshop in enumerate(assigned)
+        )
+        assert max(load.values()) <= max_participants
+
+
+class TestWorkshopOptimizer:
+    """Tests for WorkshopOptimizer."""
+
+    @pytest.fixture
+    def workshops(self):
+        return [f"Workshop {i}" for i in range(10)]
+
+    def test_basic_optimization(self, workshops):
+        """Test that every student gets distinct workshops."""
+        students = make_students(30, workshops)
+        result = WorkshopOptimizer(students, workshops, {'num_days': 3}).optimize()
+        assert result.success is True
+        assert_valid(result.assignments, 3)
+        # Without capacity limits everyone gets their first three wishes
+        assert result.statistics['wunsch1_count'] == 30
+        assert result.statistics['wunsch4_count'] == 0
+
+    @pytest.mark.parametrize("num_students,num_workshops,max_participants", [
+        (60, 8, 8),
+        (40, 4, 10),
+        (90, 10, 10),
+    ])
+    def test_sparse_matches_dense(self, workshops, num_students, num_workshops, max_participants):
+        """Test that the sparse model reaches the objective of the dense model."""
+        workshop_names = workshops[:num_workshops]
+        students = make_students(num_students, workshop_names)
+        results = {}
+        for sparse in (True, False):
+            config = {
+                'num_days': 3,
+                'max_participants_per_workshop': max_participants,
+                'sparse_model': sparse
+            }
+            result = WorkshopOptimizer(students, workshop_names, config).optimize()
+            assert result.success is True
+            assert_valid(result.assignments, 3, max_participants)
+            results[sparse] = result
+
+        assert (total_score(students, results[True].assignments) ==
+                total_score(students, results[False].assignments))
+
+    def test_sparse_model_is_smaller(self):
+        """Test that the sparse model only creates variables for wishes."""
+        workshops = [f"Workshop {i}" for i in range(30)]
+        students = make_students(50, workshops)
+        sizes = {}
+        for sparse in (True, False):
+            config = {'num_days': 3, 'max_participants_per_workshop': 20, 'sparse_model': sparse}
+            result = WorkshopOptimizer(students, workshops, config).optimize()
+            sizes[sparse] = result.statistics['model_size']['variables']
+        assert sizes[True] < sizes[False] / 2
+
+    def test_fallback_students_without_wishes(self, workshops):
+        """Test that students with too few valid wishes still get workshops."""
+        students = make_students(12, workshops)
+        for student in students[:4]:
+            student['wunsch2'] = student['wunsch3'] = student['wunsch4'] = None
+        result = WorkshopOptimizer(
+            students, workshops, {'num_days': 3, 'max_participants_per_workshop': 5}
+        ).optimize()
+        assert result.success is True
+        assert_valid(result.assignments, 3, 5)
+
+    def test_cohorts_match_individual_model(self, workshops):
+        """Test that aggregating identical wish profiles keeps the objective."""
+        students = make_students(40, workshops[:5])
+        for student in students[20:]:
+            student.update({key: students[0][key] for key in WEIGHTS})
+        results = {}
+        for aggregate in (True, False):
+            config = {
+                'num_days': 3,
+                'max_participants_per_workshop': 9,
+                'aggregate_cohorts': aggregate
+            }
+            result = WorkshopOptimizer(students, workshops[:5], config).optimize()
+            assert result.success is True
+            assert_valid(result.assignments, 3, 9)
+            results[aggregate] = result
+
+        assert results[True].statistics['model_size']['cohorts'] < 40
+        assert results[False].statistics['model_size']['cohorts'] == 40
+        assert (total_score(students, results[True].assignments) ==
+                total_score(students, results[False].assignments))
+
+    def test_warm_start(self, workshops):
+        """Test that warm start keeps the objective and reports solve times."""
+        students = make_students(60, workshops[:8])
+        results = {}
+        for warm_start in (True, False):
+            config = {'num_days': 3, 'max_participants_per_workshop': 8, 'warm_start': warm_start}
+            result = WorkshopOptimizer(students, workshops[:8], config).optimize()
+            assert result.success is True
+            solver = result.statistics['solver']
+            assert solver['warm_start'] is warm_start
+            assert solver['solve_time'] > 0
+            assert solver['time_to_first_incumbent'] is not None
+            results[warm_start] = result
+
+        assert (total_score(students, results[True].assignments) ==
+                total_score(students, results[False].assignments))
+
+    @pytest.mark.parametrize('solver', ['cbc', 'highs'])
+    @pytest.mark.parametrize('sparse,max_participants', [
+        (True, 8), (True, 7), (True, None), (False, 8)
+    ])
+    @pytest.mark.parametrize('classes', ['egal', 'ja', 'nein'])
+    def test_matrix_model_matches_pulp_model(
+        self, workshops, solver, sparse, max_participants, classes
+    ):
+        """Test that the array-built model is the same problem as the pulp model."""
+        if solver not in available_solvers():
+            pytest.skip(f"{solver} ist nicht installiert")
+        # Keeping classes together is a much harder problem
+        students = make_students(20 if classes == 'ja' else 40, workshops[:6])
+        for student in students[:3]:
+            student['wunsch3'] = student['wunsch4'] = None
+        results = {}
+        for matrix in (True, False):
+            config = {
+                'num_days': 3,
+                'max_participants_per_workshop': max_participants,
+                'sparse_model': sparse,
+                'matrix_model': matrix,
+                'solver': solver,
+                'keep_classes_together': classes
+            }
+            result = WorkshopOptimizer(students, workshops[:6], config).optimize()
+            assert result.success is True
+            assert_valid(result.assignments, 3, max_participants)
+            results[matrix] = result
+
+        assert (results[True].statistics['model_size'] ==
+                results[False].statistics['model_size'])
+        assert (results[True].statistics['solver']['objective'] ==
+                pytest.approx(results[False].statistics['solver']['objective']))
+
+    @pytest.mark.parametrize('max_participants', [None, 20, 8])
+    def test_presolve_keeps_objective(self, workshops, max_participants):
+        """Test that presolve pins students without changing the objective."""
+        students = make_students(40, workshops)
+        for student in students[:3]:
+            student['wunsch3'] = student['wunsch4'] = None
+        results = {}
+        for presolve in (True, False):
+            config = {
+                'num_days': 3,
+                'max_participants_per_workshop': max_participants,
+                'presolve': presolve
+            }
+            result = WorkshopOptimizer(students, workshops, config).optimize()
+            assert result.success is True
+            assert_valid(result.assignments, 3, max_participants)
+            results[presolve] = result
+
+        assert (total_score(students, results[True].assignments) ==
+                total_score(students, results[False].assignments))
+        assert (results[True].statistics['solver']['objective'] ==
+                pytest.approx(total_score(students, results[True].assignments)))
+        presolve = results[True].statistics['presolve']
+        if max_participants is None:
+            # Only the students with two wishes are left for the solver
+            assert presolve['pinned_students'] == 37
+            assert results[True].statistics['model_size']['cohorts'] == 3
+        assert (presolve['removed_variables'] > 0) == (presolve['pinned_students'] > 0)
+
+    @pytest.mark.parametrize('matrix_model', [True, False])
+    @pytest.mark.parametrize('with_wishes', [False, True])
+    def test_empty_objective(self, workshops, matrix_model, with_wishes):
+        """Test that a model without wish terms is solved, not reported as failed."""
+        students = make_students(20, workshops)
+        for student in students[10:] if with_wishes else students:
+            student.update({key: None for key in WEIGHTS})
+        # Without capacity limits presolve pins every student with wishes
+        config = {'num_days': 3, 'matrix_model': matrix_model}
+        result = WorkshopOptimizer(students, workshops, config).optimize()
+        assert result.success is True
+        assert_valid(result.assignments, 3)
+        assert result.statistics['solver']['objective'] == pytest.approx(
+            total_score(students, result.assignments)
+        )
+        if with_wishes:
+            assert result.statistics['presolve']['pinned_students'] == 10
+
+    @pytest.mark.parametrize('matrix_model', [True, False])
+    @pytest.mark.parametrize('max_participants', [None, 8])
+    def test_reoptimize_matches_new_solve(self, workshops, matrix_model, max_participants):
+        """Test that solving again with new weights reuses the model and keeps the optimum."""
+        students = make_students(40, workshops)
+        for student in students[:3]:
+            student['wunsch3'] = student['wunsch4'] = None
+        config = {
+            'num_days': 3,
+            'max_participants_per_workshop': max_participants,
+            'matrix_model': matrix_model
+        }
+        optimizer = WorkshopOptimizer(students, workshops, config)
+        assert optimizer.optimize().success is True
+        model = optimizer.matrix if matrix_model else optimizer.problem
+
+        # The pinned schedules stay best, then the fourth wish overtakes them
+        for wish_weights, reused in [
+            ({'wunsch1': 10, 'wunsch2': 9, 'wunsch3': 1, 'wunsch4': 0}, True),
+            ({'wunsch1': 1, 'wunsch2': 1, 'wunsch3': 1, 'wunsch4': 10}, max_participants is not None),
+        ]:
+            result = optimizer.reoptimize(wish_weights)
+            expected = WorkshopOptimizer(
+                students, workshops, {**config, 'wish_weights': wish_weights}
+            ).optimize()
+            assert result.success is True
+            assert_valid(result.assignments, 3, max_participants)
+            assert (total_score(students, result.assignments, wish_weights) ==
+                    total_score(students, expected.assignments, wish_weights))
+            assert result.statistics['solver']['objective'] == pytest.approx(
+                total_score(students, result.assignments, wish_weights)
+            )
+            assert ((optimizer.matrix if matrix_model else optimizer.problem) is model) == reused
+
+    def test_infeasible_capacity(self, workshops):
+        """Test that an infeasible problem is reported as failure."""
+        students = make_students(30, workshops)
+        result = WorkshopOptimizer(
+            students, workshops[:4], {'num_days': 3, 'max_participants_per_workshop': 5}
+        ).optimize()
+        assert result.success is False
+        assert result.assignments == {}
+
+    @pytest.mark.parametrize('max_participants', [8, None])
+    def test_class_term(self, workshops, max_participants):
+        """Test that 'ja' keeps classes in fewer groups and 'nein' spreads them."""
+        students = make_students(20, workshops[:6])
+        groups = {}
+        for mode in ('egal', 'ja', 'nein'):
+            config = {
+                'num_days': 3,
+                'max_participants_per_workshop': max_participants,
+                'keep_classes_together': mode,
+                'class_weight': 3
+            }
+            result = WorkshopOptimizer(students, workshops[:6], config).optimize()
+            assert result.success is True
+            assert_valid(result.assignments, 3, max_participants)
+            groups[mode] = len({
+                (student['klasse'], workshop, day)
+                for student in students
+                for day, workshop in enumerate(result.assignments[student['id']])
+            })
+        assert groups['ja'] < groups['egal'] < groups['nein']
+
+    @pytest.mark.parametrize('matrix_model', [True, False])
+    @pytest.mark.parametrize('mode', ['ja', 'nein'])
+    @pytest.mark.parametrize('seed', [0, 3])
+    def test_class_term_sparse_matches_dense(self, workshops, matrix_model, mode, seed):
+        """Test that the sparse model reaches the objective of the dense model with the class term."""
+        students = make_students(9, workshops[:6], seed)
+        # The class term leaves out classes of a single student
+        sizes = Counter(student['klasse'] for student in students)
+        objectives = {}
+        for sparse in (True, False):
+            config = {
+                'num_days': 3,
+                'max_participants_per_workshop': 2,
+                'keep_classes_together': mode,
+                'class_weight': 3,
+                'sparse_model': sparse,
+                'matrix_model': matrix_model
+            }
+            result = WorkshopOptimizer(students, workshops[:6], config).optimize()
+            assert result.success is True
+            assert_valid(result.assignments, 3, 2)
+            groups = len({
+                (student['klasse'], workshop, day)
+                for student in students if sizes[student['klasse']] > 1
+                for day, workshop in enumerate(result.assignments[student['id']])
+            })
+            objective = total_score(students, result.assignments) + (-3 if mode == 'ja' else 3) * groups
+            assert result.statistics['solver']['objective'] == pytest.approx(objective)
+            objectives[sparse] = objective
+        assert objectives[True] == objectives[False]
+
+
+class TestTwoPhaseOptimizer:
+    """Tests for the workshop set / day schedule engine."""
+
+    @pytest.mark.parametrize("num_students,num_workshops,max_participants", [
+        (60, 8, 8),
+        (90, 10, 10),
+        (200, 15, None),
+    ])
+    def test_matches_day_model(self, num_students, num_workshops, max_participants):
+        """Test that both phases together reach the objective of the full model."""
+        workshops = [f"Workshop {i}" for i in range(num_workshops)]
+        students = make_students(num_students, workshops)
+        config = {'num_days': 3, 'max_participants_per_workshop': max_participants}
+
+        full = WorkshopOptimizer(students, workshops, config).optimize()
+        two_phase = TwoPhaseOptimizer(students, workshops, config).optimize()
+        assert two_phase.success is True
+        assert_valid(two_phase.assignments, 3, max_participants)
+        assert (total_score(students, two_phase.assignments) ==
+                total_score(students, full.assignments))
+
+    def test_model_has_no_day_index(self):
+        """Test that phase one needs fewer variables than the day-indexed model."""
+        workshops = [f"Workshop {i}" for i in range(10)]
+        students = make_students(50, workshops)
+        config = {'num_days': 3, 'max_participants_per_workshop': 20}
+        full = WorkshopOptimizer(students, workshops, config).optimize()
+        two_phase = TwoPhaseOptimizer(students, workshops, config).optimize()
+        assert (two_phase.statistics['model_size']['variables'] <
+                full.statistics['model_size']['variables'] / 2)
+
+    def test_falls_back_without_day_symmetry(self):
+        """Test that class cohesion uses the full day-indexed model."""
+        workshops = [f"Workshop {i}" for i in range(6)]
+        students = make_students(20, workshops)
+        config = {'num_days': 3, 'keep_classes_together': 'ja'}
+        result = TwoPhaseOptimizer(students, workshops, config).optimize()
+        assert result.success is True
+        assert result.statistics['model_size']['variables'] > len(workshops) * 3
+
+    def test_maxmin_uses_day_model(self):
+        """Test that maxmin reaches the floor of the full model, not the weighted optimum."""
+        # The weighted optimum gives student 0 nothing; the floor is a second wish
+        wishes = [('A', 'B'), ('A', 'B'), ('B', 'C')]
+        students = [
+            {'id': i, 'vorname': 'V', 'nachname': 'N', 'klasse': '5a',
+             'wunsch1': first, 'wunsch2': second}
+            for i, (first, second) in enumerate(wishes)
+        ]
+        config = {
+            'num_days': 1, 'max_participants_per_workshop': 1, 'objective': 'maxmin',
+            'wish_weights': {'wunsch1': 10, 'wunsch2': 4}
+        }
+        full = WorkshopOptimizer(students, ['A', 'B', 'C'], config).optimize()
+        two_phase = TwoPhaseOptimizer(students, ['A', 'B', 'C'], config).optimize()
+        assert two_phase.success is True
+        assert two_phase.statistics['maxmin'] == full.statistics['maxmin']
+        assert two_phase.statistics['maxmin']['floor'] == 4
+
+    def test_lexicographic_uses_day_model(self):
+        """Test that lexicographic counts first wishes even if the weights favour second ones."""
+        wishes = [('A', 'B'), ('B', 'A')]
+        students = [
+            {'id': i, 'vorname': 'V', 'nachname': 'N', 'klasse': '5a',
+             'wunsch1': first, 'wunsch2': second}
+            for i, (first, second) in enumerate(wishes)
+        ]
+        config = {
+            'num_days': 1, 'max_participants_per_workshop': 1, 'objective': 'lexicographic',
+            'wish_weights': {'wunsch1': 1, 'wunsch2': 10}
+        }
+        result = TwoPhaseOptimizer(students, ['A', 'B'], config).optimize()
+        assert result.success is True
+        assert result.assignments == {0: ['A'], 1: ['B']}
+
+
+class TestFlowOptimizer:
+    """Tests for the min-cost flow engine."""
+
+    @pytest.mark.parametrize("num_students,num_workshops,num_days,max_participants", [
+        (60, 8, 3, 8),
+        (90, 10, 3, 10),
+        (80, 6, 1, 15),
+        (200, 15, 3, None),
+    ])
+    def test_matches_day_model(self, num_students, num_workshops, num_days, max_participants):
+        """Test that the flow solution reaches the objective of the full model."""
+        workshops = [f"Workshop {i}" for i in range(num_workshops)]
+        students = make_students(num_students, workshops)
+        config = {'num_days': num_days, 'max_participants_per_workshop': max_participants}
+
+        full = WorkshopOptimizer(students, workshops, config).optimize()
+        flow = FlowOptimizer(students, workshops, config).optimize()
+        assert flow.success is True
+        assert_valid(flow.assignments, num_days, max_participants)
+        assert (total_score(students, flow.assignments) ==
+                total_score(students, full.assignments))
+
+    def test_moves_students_for_later_wishes(self):
+        """Test that an earlier placement is revised when a seat is contested."""
+        # Student 0 is indifferent, student 1 only wants workshop 0
+        chosen = assign_workshop_sets([{0: 1, 1: 1}, {0: 5}], 2, 1, 1)
+        assert chosen == [[1], [0]]
+
+    def test_infeasible_capacity(self):
+        """Test that missing seats are reported as failure."""
+        workshops = [f"Workshop {i}" for i in range(4)]
+        students = make_students(30, workshops)
+        result = FlowOptimizer(
+            students, workshops, {'num_days': 3, 'max_participants_per_workshop': 5}
+        ).optimize()
+        assert result.success is False
+        assert result.assignments == {}
+
+
+class TestHeuristicOptimizer:
+    """Tests for the greedy and local search engine."""
+
+    @pytest.mark.parametrize("num_students,num_workshops,max_participants", [
+        (60, 8, 8),
+        (300, 12, 30),
+    ])
+    def test_close_to_optimum(self, num_students, num_workshops, max_participants):
+        """Test that the heuristic is valid and its bound covers the optimum."""
+        workshops = [f"Workshop {i}" for i in range(num_workshops)]
+        students = make_students(num_students, workshops)
+        config = {'num_days': 3, 'max_participants_per_workshop': max_participants}
+
+        optimum = total_score(students, FlowOptimizer(students, workshops, config).optimize().assignments)
+        result = HeuristicOptimizer(students, workshops, config).optimize()
+        assert result.success is True
+        assert_valid(result.assignments, 3, max_participants)
+        statistics = result.statistics
+        assert statistics['objective'] == total_score(students, result.assignments)
+        assert statistics['objective'] <= optimum <= statistics['upper_bound'] + 1e-6
+        assert statistics['gap'] < 0.02
+
+    def test_unlimited_capacity_is_optimal(self):
+        """Test that without capacity limits everyone gets their best wishes."""
+        workshops = [f"Workshop {i}" for i in range(10)]
+        students = make_students(50, workshops)
+        result = HeuristicOptimizer(students, workshops, {'num_days': 3}).optimize()
+        assert result.statistics['wunsch1_count'] == 50
+        assert result.statistics['gap'] == 0
+
+    def test_infeasible_capacity(self):
+        """Test that missing seats are reported as failure."""
+        workshops = [f"Workshop {i}" for i in range(4)]
+        students = make_students(30, workshops)
+        result = HeuristicOptimizer(
+            students, workshops, {'num_days': 3, 'max_participants_per_workshop': 5}
+        ).optimize()
+        assert result.success is False
+
+    @pytest.mark.parametrize('seed', [10, 18, 23])
+    def test_repairs_tight_instances(self, seed):
+        """Test that placed wishes move aside when the open slots do not fit around them."""
+        workshops = [f"Workshop {i}" for i in range(6)]
+        students = make_students(28, workshops, seed)
+        config = {'num_days': 3, 'max_participants_per_workshop': 5}
+        result = HeuristicOptimizer(students, workshops, config).optimize()
+        assert result.success is True
+        assert_valid(result.assignments, 3, 5)
+        assert result.statistics['objective'] == total_score(students, result.assignments)
+
+
+class TestLagrangianOptimizer:
+    """Tests for the engine based on the relaxed no-repeat rule."""
+
+    @pytest.mark.parametrize("num_students,num_workshops,max_participants", [
+        (60, 8, 8),
+        (200, 10, None),
+        (300, 12, 30),
+    ])
+    def test_bound_covers_optimum(self, num_students, num_workshops, max_participants):
+        """Test that the result is valid and the Lagrangian bound covers the optimum."""
+        workshops = [f"Workshop {i}" for i in range(num_workshops)]
+        students = make_students(num_students, workshops)
+        config = {'num_days': 3, 'max_participants_per_workshop': max_participants}
+
+        optimum = total_score(students, FlowOptimizer(students, workshops, config).optimize().assignments)
+        result = LagrangianOptimizer(students, workshops, config).optimize()
+        assert result.success is True
+        assert_valid(result.assignments, 3, max_participants)
+        statistics = result.statistics
+        assert statistics['objective'] <= optimum <= statistics['upper_bound'] + 1e-6
+        assert optimum <= statistics['lagrangian']['bound'] + 1e-6
+        assert statistics['lagrangian']['bound'] < 1.02 * optimum
+        assert statistics['gap'] < 0.02
+
+    def test_relaxation_without_seats(self):
+        """Test that without seat limits the bound is the sum of the best wishes."""
+        wish_columns = np.array([[0, 1, 2, 3], [1, 0, -1, -1]])
+        wish_weights = np.array([[10.0, 5.0, 2.0, 1.0], [10.0, 5.0, 0.0, 0.0]])
+        bound, _, _, _ = day_relaxation(
+            wish_columns, wish_weights, np.array([3, 2]), 6, 3, None, iterations=300
+        )
+        assert bound == pytest.approx(3 * 17 + 2 * 15, rel=1e-3)
+
+    def test_infeasible_capacity(self):
+        """Test that missing seats are reported as failure."""
+        workshops = [f"Workshop {i}" for i in range(4)]
+        students = make_students(30, workshops)
+        result = LagrangianOptimizer(
+            students, workshops, {'num_days': 3, 'max_participants_per_workshop': 5}
+        ).optimize()
+        assert result.success is False
+
+    @pytest.mark.parametrize('seed', [3, 8, 9])
+    def test_tight_instances(self, seed):
+        """Test that the priced placement is repaired or replaced on nearly full days."""
+        workshops = [f"Workshop {i}" for i in range(6)]
+        students = make_students(28, workshops, seed)
+        config = {'num_days': 3, 'max_participants_per_workshop': 5}
+        result = LagrangianOptimizer(students, workshops, config).optimize()
+        assert result.success is True
+        assert_valid(result.assignments, 3, 5)
+        assert result.statistics['objective'] <= result.statistics['lagrangian']['bound'] + 1e-6
+
+        class WithoutChains(LagrangianOptimizer):
+            def _free_seat(self, student, day):
+                return False
+
+        # Without moving placed students, the priced order gets stuck
+        result = WithoutChains(students, workshops, config).optimize()
+        assert result.success is True
+        assert_valid(result.assignments, 3, 5)
+        assert result.statistics['lagrangian']['fallback'] is True
+
+
+class TestParetoOptimizer:
+    """Tests for the frontier between satisfaction and students without a wish."""
+
+    @staticmethod
+    def _student(student_id, *wishes):
+        student = {'id': student_id, 'vorname': f"V{student_id}", 'nachname': f"N{student_id}",
+                   'klasse': "5a"}
+        student.update({f'wunsch{i + 1}': wish for i, wish in enumerate(wishes)})
+        return student
+
+    def test_frontier(self):
+        """Test every trade-off of a small instance with cohorts of two."""
+        # Workshop X does not exist, so the last two students only wish A, and barely
+        students = [
+            self._student(0, "A", "B"), self._student(1, "A", "B"),
+            self._student(2, "X", None, None, "A"), self._student(3, "X", None, None, "A"),
+        ]
+        result = ParetoOptimizer(
+            students, ["A", "B", "C", "D"], {'num_days': 1, 'max_participants_per_workshop': 2}
+        ).optimize()
+        assert result.success is True
+        frontier = result.statistics['pareto']
+        assert [(point['objective'], point['unsatisfied']) for point in frontier] == [
+            (20, 2), (16, 1), (12, 0)
+        ]
+        assert result.assignments == frontier[0]['assignments']
+        for point in frontier:
+            assert_valid(point['assignments'], 1, 2)
+            assert total_score(students, point['assignments']) == point['objective']
+
+    def test_optimum_without_trade_off(self):
+        """Test that the frontier is the optimum alone when nobody has to go without a wish."""
+        workshops = [f"Workshop {i}" for i in range(8)]
+        students = make_students(40, workshops)
+        config = {'num_days': 3, 'max_participants_per_workshop': 8}
+        result = ParetoOptimizer(students, workshops, config).optimize()
+        optimum = WorkshopOptimizer(students, workshops, config).optimize()
+        assert result.success is True
+        assert_valid(result.assignments, 3, 8)
+        assert total_score(students, result.assignments) == total_score(students, optimum.assignments)
+        assert len(result.statistics['pareto']) == 1
+        assert result.statistics['pareto'][0]['unsatisfied'] == 0
+
+
+class TestLexicographic:
+    """Tests for the lexicographic objective of WorkshopOptimizer."""
+
+    @staticmethod
+    def _best_counts(students, workshops, num_days, max_participants):
+        """Wish counts of the rank-maximal assignment, by enumeration."""
+        best = None
+        schedules = list(itertools.permutations(workshops, num_days))
+        for combination in itertools.product(schedules, repeat=len(students)):
+            load = Counter(
+                (workshop, day) for schedule in combination for day, workshop in enumerate(schedule)
+            )
+            if max_participants and max(load.values()) > max_participants:
+                continue
+            counts = [
+                sum(student[f'wunsch{rank}'] in schedule
+                    for student, schedule in zip(students, combination))
+                for rank in range(1, 4)
+            ]
+            best = counts if best is None else max(best, counts)
+        return best
+
+    @pytest.mark.parametrize("num_days,num_students", [(1, 7), (2, 4)])
+    @pytest.mark.parametrize("matrix_model", [True, False])
+    def test_rank_maximal(self, num_days, num_students, matrix_model):
+        workshops = ['A', 'B', 'C']
+        for seed in range(4):
+            rng = random.Random(seed)
+            students = []
+            for i in range(num_students):
+                wishes = rng.sample(workshops, 3)
+                students.append({
+                    'id': i, 'vorname': 'V', 'nachname': 'N', 'klasse': '5a',
+                    'wunsch1': wishes[0], 'wunsch2': wishes[1], 'wunsch3': wishes[2]
+                })
+            max_participants = 3 if num_days == 1 else 2
+            # Weights that prefer a second wish over a first one
+            config = {
+                'num_days': num_days, 'max_participants_per_workshop': max_participants,
+                'objective': 'lexicographic', 'matrix_model': matrix_model,
+                'wish_weights': {'wunsch1': 1, 'wunsch2': 10, 'wunsch3': 5}
+            }
+            result = FlowOptimizer(students, workshops, config).optimize()
+            assert result.success
+            assert_valid(result.assignments, num_days, max_participants)
+            counts = [result.statistics[f'wunsch{rank}_count'] for rank in range(1, 4)]
+            assert counts == self._best_counts(students, workshops, num_days, max_participants)
+
+    def test_stages(self):
+        workshops = [f"Workshop {i}" for i in range(8)]
+        students = make_students(60, workshops)
+        config = {'num_days': 3, 'max_participants_per_workshop': 9, 'objective': 'lexicographic'}
+        result = WorkshopOptimizer(students, workshops, config).optimize()
+        assert result.success
+        stages = result.statistics['lexicographic']
+        assert [stage['wish'] for stage in stages] == ['wunsch1', 'wunsch2', 'wunsch3', 'wunsch4']
+        for stage in stages:
+            assert stage['count'] == result.statistics[f"{stage['wish']}_count"]
+        assert result.statistics['solver']['objective'] == total_score(students, result.assignments)
+
+        # The class term is optimized after all wish counts
+        mixed = WorkshopOptimizer(
+            students, workshops, {**config, 'keep_classes_together': 'nein'}
+        ).optimize()
+        assert mixed.success
+        assert [stage['count'] for stage in mixed.statistics['lexicographic']] == [
+            stage['count'] for stage in stages
+        ]
+
+
+class TestMaxMin:
+    """Tests for the maxmin objective of WorkshopOptimizer."""
+
+    @staticmethod
+    def _best(students, workshops, num_days, max_participants):
+        """Lowest score and total of the best assignment, by enumeration."""
+        best = None
+        schedules = list(itertools.permutations(workshops, num_days))
+        for combination in itertools.product(schedules, repeat=len(students)):
+            load = Counter(
+                (workshop, day) for schedule in combination for day, workshop in enumerate(schedule)
+            )
+            if max_participants and max(load.values()) > max_participants:
+                continue
+            scores = [
+                total_score([student], {student['id']: list(schedule)})
+                for student, schedule in zip(students, combination)
+            ]
+            best = max(best or (min(scores), sum(scores)), (min(scores), sum(scores)))
+        return best
+
+    @pytest.mark.parametrize("matrix_model", [True, False])
+    def test_floor(self, matrix_model):
+        workshops = [f"Workshop {i}" for i in range(4)]
+        config = {
+            'num_days': 2, 'max_participants_per_workshop': 2, 'objective': 'maxmin',
+            'matrix_model': matrix_model
+        }
+        for seed in range(4):
+            students = make_students(4, workshops, seed=seed)
+            result = WorkshopOptimizer(students, workshops, config).optimize()
+            assert result.success
+            assert_valid(result.assignments, 2, 2)
+            floor = result.statistics['maxmin']['floor']
+            assert (floor, result.statistics['solver']['objective']) == self._best(
+                students, workshops, 2, 2
+            )
+            assert floor == min(
+                total_score([student], result.assignments) for student in students
+            )
+
+    def test_floor_bound(self):
+        # Everybody wishes A first, which only six of them can attend
+        workshops = ['A', 'B', 'C', 'D']
+        students = [
+            {'id': i, 'vorname': 'V', 'nachname': 'N', 'klasse': '5a', 'wunsch1': 'A',
+             'wunsch2': workshops[1 + i % 3], 'wunsch3': workshops[1 + (i + 1) % 3]}
+            for i in range(8)
+        ]
+        config = {'num_days': 2, 'max_participants_per_workshop': 3, 'objective': 'maxmin'}
+        optimizer = WorkshopOptimizer(students, workshops, config)
+        optimizer.cohorts = optimizer._build_cohorts()
+        assert len(optimizer.cohorts) == 8
+        # A floor of 10 or more needs A for all eight students
+        assert optimizer._floor_bound() == 7
+
+        result = WorkshopOptimizer(students, workshops, config).optimize()
+        assert result.success
+        assert result.statistics['maxmin'] == {'floor': 7, 'at_floor': 2}
+
+
+class TestWorkshopCapacities:
+    """Tests for capacities per workshop and day (workshop_capacities)."""
+
+    WORKSHOPS = [f"Workshop {i}" for i in range(4)]
+    # Workshop 0 only runs on day 1, Workshop 3 only on day 2
+    CAPACITIES = {'Workshop 0': [2, 0], 'Workshop 1': 1, 'Workshop 3': [0, None]}
+
+    @classmethod
+    def _capacity(cls, workshop, day, default=2):
+        setting = cls.CAPACITIES.get(workshop, default)
+        if isinstance(setting, list):
+            return default if setting[day] is None else setting[day]
+        return setting
+
+    @classmethod
+    def _best(cls, students):
+        """Best total score under the capacities, by enumeration."""
+        best = None
+        schedules = list(itertools.permutations(cls.WORKSHOPS, 2))
+        for combination in itertools.product(schedules, repeat=len(students)):
+            load = Counter(
+                (workshop, day) for schedule in combination for day, workshop in enumerate(schedule)
+            )
+            if any(count > cls._capacity(*key) for key, count in load.items()):
+                continue
+            score = total_score(students, {
+                student['id']: list(schedule) for student, schedule in zip(students, combination)
+            })
+            best = score if best is None else max(best, score)
+        return best
+
+    @pytest.mark.parametrize("matrix_model,sparse_model", [
+        (True, True), (True, False), (False, True), (False, False)
+    ])
+    def test_matches_enumeration(self, matrix_model, sparse_model):
+        config = {
+            'num_days': 2, 'max_participants_per_workshop': 2,
+            'workshop_capacities': self.CAPACITIES, 'matrix_model': matrix_model,
+            'sparse_model': sparse_model
+        }
+        for seed in range(3):
+            students = make_students(4, self.WORKSHOPS, seed=seed)
+            result = WorkshopOptimizer(students, self.WORKSHOPS, config).optimize()
+            assert result.success
+            assert_valid(result.assignments, 2)
+            load = Counter(
+                (workshop, day)
+                for assigned in result.assignments.values() for day, workshop in enumerate(assigned)
+            )
+            assert all(count <= self._capacity(*key) for key, count in load.items())
+            assert total_score(students, result.assignments) == self._best(students)
+
+    def test_unavailable_days_have_no_columns(self):
+        students = make_students(4, self.WORKSHOPS, seed=0)
+        sizes = []
+        for capacities in ({}, self.CAPACITIES):
+            config = {
+                'num_days': 2, 'max_participants_per_workshop': 2, 'sparse_model': False,
+                'presolve': False, 'warm_start': False, 'workshop_capacities': capacities
+            }
+            optimizer = WorkshopOptimizer(students, self.WORKSHOPS, config)
+            assert optimizer.optimize().success
+            matrix = optimizer.matrix
+            assert matrix.offered[matrix.pair_workshop[matrix.x_pair], matrix.x_day].all()
+            sizes.append((matrix.num_columns, matrix.num_rows))
+        # Two workshop-days less: one x column per student each, and their capacity rows
+        assert sizes[1] == (sizes[0][0] - 8, sizes[0][1] - 2)
+
+    def test_day_symmetric_capacities(self):
+        students = make_students(30, self.WORKSHOPS + ['Workshop 4'], seed=1)
+        workshops = self.WORKSHOPS + ['Workshop 4']
+        config = {
+            'num_days': 3, 'max_participants_per_workshop': 8,
+            'workshop_capacities': {'Workshop 0': 4, 'Workshop 2': 12}
+        }
+        assert FlowOptimizer(students, workshops, config)._is_day_symmetric()
+        flow = FlowOptimizer(students, workshops, config).optimize()
+        mip = WorkshopOptimizer(students, workshops, config).optimize()
+        assert flow.success and mip.success
+        assert total_score(students, flow.assignments) == total_score(students, mip.assignments)
+        load = Counter(
+            (workshop, day)
+            for assigned in flow.assignments.values() for day, workshop in enumerate(assigned)
+        )
+        assert max(load['Workshop 0', day] for day in range(3)) <= 4
+
+        config['workshop_capacities'] = {'Workshop 0': [4, 0, 4]}
+        assert not FlowOptimizer(students, workshops, config)._is_day_symmetric()
+
+    def test_heuristic_respects_capacities(self):
+        students = make_students(4, self.WORKSHOPS, seed=2)
+        # Greedy engines need some spare seats to fill the days without a wish
+        config = {
+            'num_days': 2, 'max_participants_per_workshop': 3,
+            'workshop_capacities': self.CAPACITIES
+        }
+        for engine in (HeuristicOptimizer, SerialDictatorshipOptimizer):
+            result = engine(students, self.WORKSHOPS, config).optimize()
+            assert result.success
+            for assigned in result.assignments.values():
+                assert assigned[1] != 'Workshop 0' and assigned[0] != 'Workshop 3'
+
+
+class TestWorkshopMinimums:
+    """Tests for minimum sizes that cancel workshop-days (workshop_minimums)."""
+
+    WORKSHOPS = [f"Workshop {i}" for i in range(4)]
+    MINIMUMS = {'Workshop 0': 3, 'Workshop 2': 2}
+
+    @staticmethod
+    def _loads(assignments):
+        return Counter(
+            (workshop, day)
+            for assigned in assignments.values() for day, workshop in enumerate(assigned)
+        )
+
+    def _assert_minimums(self, assignments, minimums):
+        for (workshop, _), count in self._loads(assignments).items():
+            assert count >= minimums.get(workshop, 0)
+
+    def _best(self, students):
+        """Best total score with capacity 3 and the minimum sizes, by enumeration."""
+        best = None
+        schedules = list(itertools.permutations(self.WORKSHOPS, 2))
+        for combination in itertools.product(schedules, repeat=len(students)):
+            assignments = {
+                student['id']: list(schedule) for student, schedule in zip(students, combination)
+            }
+            load = self._loads(assignments)
+            if max(load.values()) > 3 or any(
+                    count < self.MINIMUMS.get(workshop, 0) for (workshop, _), count in load.items()):
+                continue
+            score = total_score(students, assignments)
+            best = score if best is None else max(best, score)
+        return best
+
+    @pytest.mark.parametrize("matrix_model,sparse_model", [
+        (True, True), (True, False), (False, True), (False, False)
+    ])
+    def test_matches_enumeration(self, matrix_model, sparse_model):
+        config = {
+            'num_days': 2, 'max_participants_per_workshop': 3,
+            'workshop_minimums': self.MINIMUMS, 'matrix_model': matrix_model,
+            'sparse_model': sparse_model
+        }
+        for seed in range(3):
+            students = make_students(4, self.WORKSHOPS, seed=seed)
+            result = WorkshopOptimizer(students, self.WORKSHOPS, config).optimize()
+            assert result.success
+            assert_valid(result.assignments, 2, 3)
+            self._assert_minimums(result.assignments, self.MINIMUMS)
+            assert total_score(students, result.assignments) == self._best(students)
+
+    def test_cancelled_workshop_is_reported(self):
+        """Two students wish a workshop that needs three; they move to their next wishes."""
+        students = make_students(12, self.WORKSHOPS, seed=0)
+        for student in students:
+            if student['wunsch1'] == 'Workshop 3':
+                student['wunsch1'] = 'Workshop 0'
+        for student in students[:2]:
+            student['wunsch1'] = 'Workshop 3'
+        config = {'num_days': 3, 'max_participants_per_workshop': 12}
+        optimum = WorkshopOptimizer(students, self.WORKSHOPS, config).optimize()
+        assert 'cancelled_workshops' not in optimum.statistics
+
+        config['workshop_minimums'] = {'Workshop 3': 3}
+        optimizer = WorkshopOptimizer(students, self.WORKSHOPS, config)
+        result = optimizer.optimize()
+        assert result.success
+        assert_valid(result.assignments, 3)
+        self._assert_minimums(result.assignments, config['workshop_minimums'])
+        assert total_score(students, result.assignments) <= total_score(students, optimum.assignments)
+        cancelled = result.statistics['cancelled_workshops']
+        assert {'Workshop': 'Workshop 3', 'Tag': 1} in cancelled
+        assert optimizer.presolve_info['pinned_students'] == 0
+
+    def test_flow_hands_minimums_to_the_model(self):
+        students = make_students(20, self.WORKSHOPS, seed=4)
+        config = {
+            'num_days': 3, 'max_participants_per_workshop': 10,
+            'workshop_minimums': {'Workshop 3': 6}
+        }
+        assert not FlowOptimizer(students, self.WORKSHOPS, config)._is_day_symmetric()
+        flow = FlowOptimizer(students, self.WORKSHOPS, config).optimize()
+        mip = WorkshopOptimizer(students, self.WORKSHOPS, config).optimize()
+        assert flow.success and mip.success
+        self._assert_minimums(flow.assignments, config['workshop_minimums'])
+        assert total_score(students, flow.assignments) == total_score(students, mip.assignments)
+
+    def test_greedy_engines_cancel_small_workshops(self):
+        workshops = self.WORKSHOPS + ['Workshop 4', 'Workshop 5']
+        students = make_students(20, workshops, seed=5)
+        minimums = {'Workshop 2': 6, 'Workshop 3': 6}
+        config = {'num_days': 3, 'max_participants_per_workshop': 10, 'workshop_minimums': minimums}
+        for engine in (HeuristicOptimizer, LagrangianOptimizer, SerialDictatorshipOptimizer,
+                       DeferredAcceptanceOptimizer):
+            result = engine(students, workshops, config).optimize()
+            assert result.success
+            assert_valid(result.assignments, 3, 10)
+            self._assert_minimums(result.assignments, minimums)
+
+
+class TestFriendGroups:
+    """Tests for friend groups that attend the same workshops (keep_partners_together)."""
+
+    WORKSHOPS = [f"Workshop {i}" for i in range(4)]
+
+    @staticmethod
+    def _students(num_students, seed):
+        """Students 0 and 1 name each other, student 2 names student 0 alone."""
+        students = make_students(num_students, TestFriendGroups.WORKSHOPS, seed=seed)
+        students[0]['partners'] = [1]
+        students[1]['partners'] = [0]
+        students[2]['partners'] = [0]
+        return students
+
+    def _best(self, students):
+        """Best total score with capacity 3 and students 0 and 1 together, by enumeration."""
+        best = None
+        schedules = list(itertools.permutations(self.WORKSHOPS, 2))
+        for combination in itertools.product(schedules, repeat=len(students) - 1):
+            combination = (combination[0],) + combination
+            assignments = {
+                student['id']: list(schedule) for student, schedule in zip(students, combination)
+            }
+            load = Counter(
+                (workshop, day)
+                for assigned in assignments.values() for day, workshop in enumerate(assigned)
+            )
+            if max(load.values()) <= 3:
+                score = total_score(students, assignments)
+                best = score if best is None else max(best, score)
+        return best
+
+    def test_friend_groups(self):
+        students = [{'id': i, 'partners': []} for i in range(6)]
+        students[0]['partners'] = [1]
+        students[1]['partners'] = [0, 2]
+        students[2]['partners'] = [1]
+        students[3]['partners'] = [4]
+        students[5]['partners'] = [5]
+        groups = friend_groups(students)
+        assert [[student['id'] for student in members] for members in groups] == [[0, 1, 2]]
+
+    @pytest.mark.parametrize("matrix_model,sparse_model", [
+        (True, True), (True, False), (False, True), (False, False)
+    ])
+    def test_matches_enumeration(self, matrix_model, sparse_model):
+        config = {
+            'num_days': 2, 'max_participants_per_workshop': 3,
+            'matrix_model': matrix_model, 'sparse_model': sparse_model
+        }
+        for seed in range(3):
+            students = self._students(5, seed)
+            result = WorkshopOptimizer(students, self.WORKSHOPS, config).optimize()
+            assert result.success
+            assert_valid(result.assignments, 2, 3)
+            assert result.assignments[0] == result.assignments[1]
+            assert result.statistics['split_friend_groups'] == 0
+            assert total_score(students, result.assignments) == self._best(students)
+
+    def test_group_is_one_cohort(self):
+        """Every group adds one cohort; its members are not in any other."""
+        students = make_students(40, self.WORKSHOPS, seed=1)
+        for first in range(0, 20, 2):
+            students[first]['partners'] = [first + 1]
+            students[first + 1]['partners'] = [first]
+        optimizer = WorkshopOptimizer(students, self.WORKSHOPS, {'num_days': 3})
+        result = optimizer.optimize()
+        assert result.success
+        groups = [members for members in optimizer.cohorts if 'group' in members[0]]
+        assert len(groups) == 10 and all(len(members) == 1 for members in groups)
+        assert sum(len(members) for members in optimizer.cohorts) == 30
+        for first in range(0, 20, 2):
+            assert result.assignments[first] == result.assignments[first + 1]
+
+    @pytest.mark.parametrize("objective", ['lexicographic', 'maxmin'])
+    def test_objectives_keep_groups_together(self, objective):
+        students = self._students(12, seed=3)
+        config = {'num_days': 3, 'max_participants_per_workshop': 9, 'objective': objective}
+        result = WorkshopOptimizer(students, self.WORKSHOPS, config).optimize()
+        assert result.success
+        assert_valid(result.assignments, 3, 9)
+        assert result.assignments[0] == result.assignments[1]
+
+    def test_engines_hand_groups_to_the_model(self):
+        students = self._students(12, seed=2)
+        config = {'num_days': 3, 'max_participants_per_workshop': 9}
+        mip = WorkshopOptimizer(students, self.WORKSHOPS, config).optimize()
+        for engine in (FlowOptimizer, TwoPhaseOptimizer, ParetoOptimizer):
+            result = engine(students, self.WORKSHOPS, config).optimize()
+            assert result.success
+            assert result.assignments[0] == result.assignments[1]
+            assert total_score(students, result.assignments) == total_score(students, mip.assignments)
+
+    def test_keep_partners_together_off(self):
+        students = self._students(12, seed=2)
+        config = {'num_days': 3, 'keep_partners_together': False}
+        optimizer = WorkshopOptimizer(students, self.WORKSHOPS, config)
+        assert optimizer.groups == []
+        result = optimizer.optimize()
+        assert result.success
+        assert 'split_friend_groups' not in result.statistics
+
+
+class TestMechanisms:
+    """Tests for the deferred acceptance and serial dictatorship engines."""
+
+    @pytest.mark.parametrize("engine", [DeferredAcceptanceOptimizer, SerialDictatorshipOptimizer])
+    @pytest.mark.parametrize("max_participants", [None, 12])
+    def test_valid(self, engine, max_participants):
+        workshops = [f"Workshop {i}" for i in range(10)]
+        students = make_students(100, workshops)
+        config = {'num_days': 3, 'max_participants_per_workshop': max_participants}
+        result = engine(students, workshops, config).optimize()
+        assert result.success
+        assert_valid(result.assignments, 3, max_participants)
+        orders = result.statistics['mechanism']['orders']
+        assert all(sorted(order) == list(range(100)) for order in orders)
+
+        # The lottery is drawn from the seed
+        again = engine(students, workshops, config).optimize()
+        assert again.assignments == result.assignments
+
+    def test_serial_dictatorship_serves_in_order(self):
+        workshops = ['A', 'B', 'C', 'D']
+        students = [
+            {'id': i, 'vorname': 'V', 'nachname': 'N', 'klasse': '5a',
+             'wunsch1': 'A', 'wunsch2': 'B', 'wunsch3': 'C', 'wunsch4': 'D'}
+            for i in range(3)
+        ]
+        config = {
+            'num_days': 2, 'max_participants_per_workshop': 1, 'tie_breaking': 'priority'
+        }
+        result = SerialDictatorshipOptimizer(students, workshops, config).optimize()
+        assert result.success
+        assert sorted(result.assignments[0]) == ['A', 'B']
+        assert sorted(result.assignments[1]) == ['A', 'B']
+        assert sorted(result.assignments[2]) == ['C', 'D']
+
+    def test_serial_dictatorship_moves_own_wishes(self):
+        """A later wish that only fits on the day of an earlier one moves that one."""
+        workshops = ['A', 'B', 'C', 'D']
+        students = [
+            {'id': 0, 'vorname': 'V', 'nachname': 'N', 'klasse': '5a',
+             'wunsch1': 'A', 'wunsch2': 'C', 'wunsch3': None, 'wunsch4': None},
+            {'id': 1, 'vorname': 'V', 'nachname': 'N', 'klasse': '5a',
+             'wunsch1': 'B', 'wunsch2': 'A', 'wunsch3': None, 'wunsch4': None},
+        ]
+        config = {
+            'num_days': 2, 'max_participants_per_workshop': 1, 'tie_breaking': 'priority'
+        }
+        result = SerialDictatorshipOptimizer(students, workshops, config).optimize()
+        assert result.success
+        assert_valid(result.assignments, 2, 1)
+        assert sorted(result.assignments[0]) == ['A', 'C']
+        assert sorted(result.assignments[1]) == ['A', 'B']
+
+    def test_deferred_acceptance_rounds(self):
+        workshops = ['A', 'B', 'C', 'D']
+        students = [
+            {'id': i, 'vorname': 'V', 'nachname': 'N', 'klasse': '5a',
+             'wunsch1': 'A', 'wunsch2': 'B', 'wunsch3': 'C', 'wunsch4': None}
+            for i in range(3)
+        ]
+        config = {
+            'num_days': 3, 'max_participants_per_workshop': 1, 'tie_breaking': 'priority'
+        }
+        result = DeferredAcceptanceOptimizer(students, workshops, config).optimize()
+        assert result.success
+        assert result.assignments == {0: ['A', 'B', 'C'], 1: ['B', 'A', 'D'], 2: ['C', 'D', 'A']}
+        assert len(result.statistics['mechanism']['orders']) == 3
+
+    @pytest.mark.parametrize("engine", [DeferredAcceptanceOptimizer, SerialDictatorshipOptimizer])
+    def test_infeasible_capacity(self, engine):
+        workshops = ['A', 'B']
+        students = make_students(5, workshops + ['C', 'D', 'E'])
+        result = engine(students, workshops, {
+            'num_days': 2, 'max_participants_per_workshop': 2
+        }).optimize()
+        assert not result.success
+
+
+class TestScheduleDays:
+    """Tests for the day planning of workshop sets."""
+
+    def test_days_are_balanced(self):
+        """Test that every workshop gets the most even day distribution."""
+        workshops = [f"Workshop {i}" for i in range(5)]
+        rng = random.Random(2)
+        workshop_sets = {i: rng.sample(workshops, 3) for i in range(40)}
+
+        schedules = schedule_days(workshop_sets, 3)
+        totals = Counter(w for chosen in workshop_sets.values() for w in chosen)
+        load = Counter(
+            (workshop, day)
+            for schedule in schedules.values()
+            for day, workshop in enumerate(schedule)
+        )
+        for student_id, chosen in workshop_sets.items():
+            assert sorted(schedules[student_id]) == sorted(chosen)
+        for (workshop, _), count in load.items():
+            assert count <= -(-totals[workshop] // 3)
+
+
+class TestColorBipartiteEdges:
+    """Tests for the edge colouring used to split cohorts."""
+
+    def test_colors_are_proper(self):
+        """Test that no node has two edges of the same colour."""
+        rng = random.Random(1)
+        edges = []
+        for day in range(4):
+            # Every day node gets exactly five edges, workshop nodes at most five
+            workshops = rng.sample(range(5), 5)
+            edges.extend((workshop, day) for workshop in workshops)
+        rng.shuffle(edges)
+
+        colors = color_bipartite_edges(edges, 5)
+        left = Counter((edge[0], color) for edge, color in zip(edges, colors))
+        right = Counter((edge[1], color) for edge, color in zip(edges, colors))
+        assert max(left.values()) == 1
+        assert max(right.values()) == 1
+
+    def test_parallel_edges(self):
+        """Test that parallel edges get different colours."""
+        colors = color_bipartite_edges([('a', 0), ('a', 0), ('b', 0)], 3)
+        assert sorted(colors) == [0, 1, 2]
+
+    def test_too_few_colors(self):
+        """Test that an overloaded node is rejected."""
+        with pytest.raises(ValueError):
+            color_bipartite_edges([('a', 0), ('a', 1)], 1)
+
+
+class TestSolvers:
+    """Tests for the solver backends."""
+
+    @pytest.fixture
+    def workshops(self):
+        return [f"Workshop {i}" for i in range(6)]
+
+    @pytest.mark.parametrize('solver', ['cbc', 'highs', 'cpsat'])
+    def test_backends_agree(self, workshops, solver):
+        """Test that every installed backend finds the optimal objective."""
+        if solver not in available_solvers():
+            pytest.skip(f"{solver} ist nicht installiert")
+        students = make_students(40, workshops)
+        scores = {}
+        for name in ('cbc', solver):
+            config = {'num_days': 3, 'max_participants_per_workshop': 8, 'solver': name}
+            result = WorkshopOptimizer(students, workshops, config).optimize()
+            assert result.success is True
+            assert_valid(result.assignments, 3, 8)
+            assert result.statistics['solver']['solver'] == name
+            scores[name] = total_score(students, result.assignments)
+
+        assert scores[solver] == scores['cbc']
+
+    def test_auto_uses_cbc(self):
+        """Test that 'auto' picks CBC, which is always installed."""
+        assert get_solver('auto').name == 'cbc'
+
+    def test_unknown_solver(self):
+        """Test that an unknown solver name is rejected."""
+        with pytest.raises(ValueError):
+            get_solver('gurobi')
+
+    def test_unknown_solver_fails_optimization(self, workshops):
+        """Test that an unknown solver is reported as failure."""
+        students = make_students(10, workshops)
+        config = {'num_days': 3, 'solver': 'gurobi', 'warm_start': False}
+        result = WorkshopOptimizer(students, workshops, config).optimize()
+        assert result.success is False
+        assert "Unbekannter Solver" in result.message
+
+    def test_read_first_incumbent_time(self, tmp_path):
+        """Test that the first integer solution is found in a CBC log."""
+        log = tmp_path / "cbc.log"
+        log.write_text(
+            "Continuous objective value is 8652 - 0.12 seconds\n"
+            "Cbc0012I Integer solution of -8620 found by feasibility pump after "
+            "0 iterations and 0 nodes (0.24 seconds)\n"
+            "Cbc0012I Integer solution of -8652 found by DiveCoefficient after "
+            "0 iterations and 0 nodes (0.27 seconds)\n"
+        )
+        assert read_first_incumbent_time(str(log)) == 0.24
+
+        log.write_text(
+            "Continuous objective value is 8652 - 0.12 seconds\n"
+            "Cbc0045I MIPStart provided solution with cost 8620\n"
+        )
+        assert read_first_incumbent_time(str(log)) == 0.12
+
+    def test_cbc_log_watcher(self, tmp_path):
+        """Test that improved solutions are read from a growing CBC log."""
+        log = tmp_path / "cbc.log"
+        log.write_text("Continuous objective value is 8652 - 0.12 seconds\nCbc0012I Integer")
+        incumbents = []
+        watcher = CbcLogWatcher(str(log), True, incumbents.append, best=8600)
+        watcher.poll()
+        assert incumbents == []
+
+        with open(log, 'a') as f:
+            f.write(
+                " solution of -8620 found by feasibility pump after "
+                "0 iterations and 0 nodes (0.24 seconds)\n"
+                "Cbc0012I Integer solution of 8600 found by Reduced search after "
+                "0 iterations and 0 nodes (0.25 seconds)\n"
+                "Cbc0010I After 100 nodes, 5 on tree, -8620 best solution, "
+                "best possible -8640 (0.50 seconds)\n"
+                "Cbc0004I Integer solution of -8630 found after 120 iterations "
+                "and 150 nodes (0.61 seconds)\n"
+            )
+        watcher.poll()
+        assert [(i.objective, i.bound, i.elapsed) for i in incumbents] == [
+            (8620, 8652, 0.24), (8630, 8640, 0.61)
+        ]
+
+    def test_matrix_model_round_trip(self):
+        """Test that free MPS output with ranges and bounds solves as written."""
+        model = MatrixModel(
+            objective=np.array([3.0, 2.0, 0.5, 1.0]),
+            column_lower=np.array([0.0, 1.0, -np.inf, 0.0]),
+            column_upper=np.array([4.0, 5.0, 2.0, np.inf]),
+            rows=np.array([0, 0, 1, 1, 1, 2]),
+            columns=np.array([0, 1, 0, 2, 3, 3]),
+            values=np.array([1.0, 1.0, 1.0, 1.0, 1.0, 1.0]),
+            row_lower=np.array([-np.inf, 2.0, -np.inf]),
+            row_upper=np.array([5.5, 4.0, 3.0])
+        )
+        solution, metrics = get_solver('cbc').solve_matrix(model, SolveOptions(None, None, None))
+        assert metrics.optimal is True
+        assert solution.tolist() == [4, 1, -3, 3]
+        assert metrics.objective == 15.5
+
+    def test_matrix_presolve(self):
+        """Test that presolve drops singleton, forcing and redundant rows."""
+        model = MatrixModel(
+            objective=np.array([1.0, 5.0, 5.0, 2.0]),
+            column_lower=np.zeros(4),
+            column_upper=np.full(4, 4.0),
+            rows=np.array([0, 1, 1, 2, 2, 3, 3]),
+            columns=np.array([0, 1, 2, 0, 3, 0, 3]),
+            values=np.array([1.0, 1.0, 1.0, 1.0, 1.0, 1.0, 2.0]),
+            row_lower=np.full(4, -np.inf),
+            row_upper=np.array([2.0, 0.0, 10.0, 7.0])
+        )
+        reduced, reduction = model.presolve()
+        assert reduction.columns.tolist() == [0, 3]
+        assert reduction.rows.tolist() == [3]
+        assert reduced.column_upper.tolist() == [2, 4]
+
+        solver = get_solver('cbc')
+        solution, metrics = solver.solve_matrix(reduced, SolveOptions())
+        full_solution = reduction.expand(solution)
+        assert full_solution[[1, 2]].tolist() == [0, 0]
+        assert model.objective_value(full_solution) == metrics.objective + reduction.offset == 7
+
+    def test_read_solution(self, tmp_path):
+        """Test reading CBC solution files, including infeasibility markers."""
+        solution = tmp_path / "model.sol"
+        solution.write_text(
+            "Stopped on time - objective value 12.00000000\n"
+            "      0 C0                     2                       3\n"
+            "**    3 C3                     1                       0\n"
+        )
+        values, optimal, status = read_solution(str(solution), 5)
+        assert values.tolist() == [2, 0, 0, 1, 0]
+        assert (optimal, status) == (False, 'Optimal')
+
+        solution.write_text("Optimal - objective value 0.00000000\n")
+        values, optimal, status = read_solution(str(solution), 2)
+        assert values.tolist() == [0, 0]
+        assert optimal is True
+
+        solution.write_text("Infeasible - objective value 0.00000000\n")
+        assert read_solution(str(solution), 2) == (None, False, 'Infeasible')
+
+        # Stopped before any integer solution, CBC writes the relaxation
+        solution.write_text(
+            "Stopped on time (no integer solution - continuous used) - objective value 7.5\n"
+            "      0 C0                     0.5                     0\n"
+        )
+        assert read_solution(str(solution), 2) == (None, False, 'Not Solved')
+
+    def test_incumbents_are_streamed(self, workshops):
+        """Test that the start solution and all improvements are reported."""
+        students = make_students(60, workshops)
+        optimizer = WorkshopOptimizer(
+            students, workshops, {'num_days': 3, 'max_participants_per_workshop': 12}
+        )
+        incumbents = []
+        optimizer.on_incumbent = incumbents.append
+        result = optimizer.optimize()
+
+        assert result.success is True
+        assert incumbents[0].bound is None  # Heuristic start
+        objectives = [incumbent.objective for incumbent in incumbents]
+        assert objectives == sorted(objectives)
+        assert objectives[-1] == total_score(students, result.assignments)
+
+    def test_stop_keeps_best_solution(self, workshops):
+        """Test that a stopped solve still returns a valid assignment."""
+        students = make_students(60, workshops)
+        optimizer = WorkshopOptimizer(
+            students, workshops, {'num_days': 3, 'max_participants_per_workshop': 12}
+        )
+        optimizer.stop_event = threading.Event()
+        optimizer.stop_event.set()
+        result = optimizer.optimize()
+
+        assert result.success is True
+        assert_valid(result.assignments, 3, 12)
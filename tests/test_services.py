@@ -1,8 +1,20 @@
 """Tests for service layer."""
+import os
+import threading
+import numpy as np
 import pytest
 from pathlib import Path
 from models import Student, OptimizationResult
-from services import ValidationService, ConfigService
+import pandas as pd
+from services import ValidationService, ConfigService, OptimizationService, DataService
+from services.optimization_service import parameter_grid
+from services.decomposition import split_components
+from services.min_cost_flow import FlowOptimizer
+from services.optimizer import WorkshopOptimizer
+from services.pareto import ParetoOptimizer
+from services.mechanisms import DeferredAcceptanceOptimizer
+from services.lottery import LotterySampler, sample_serial_dictatorship
+from services.result_cache import ResultCache, result_key
 
 
 class TestValidationService:
@@ -106,6 +118,30 @@ class TestValidationService:
         result = validation_service.validate_parameters(params)
         assert result.valid is False
 
+    def test_validate_students_one_sided_partners(self, validation_service):
+        """Test warning about partner wishes that are not returned."""
+        students = [
+            Student(id=i, vorname=f"V{i}", nachname=f"N{i}", klasse="5a", wunsch1="A",
+                    wunsch2="B", wunsch3="C", wunsch4="D", partners=partners)
+            for i, partners in enumerate([[1], [0], [0]])
+        ]
+        result = validation_service.validate_students(students)
+        assert result.warnings == ["1 Partnerwünsche sind nicht gegenseitig und werden ignoriert"]
+
+    def test_validate_parameters_invalid_capacity(self, validation_service):
+        """Test detecting negative capacities of single workshops."""
+        params = {'workshop_capacities': {'Töpfern': [12, -1], 'Chor': None}}
+        result = validation_service.validate_parameters(params)
+        assert result.valid is False
+        assert len(result.errors) == 1
+
+    def test_validate_parameters_invalid_minimum(self, validation_service):
+        """Test detecting minimum sizes that are no whole numbers."""
+        params = {'workshop_minimums': {'Töpfern': 2.5, 'Chor': 8}}
+        result = validation_service.validate_parameters(params)
+        assert result.valid is False
+        assert len(result.errors) == 1
+
     def test_validate_feasibility_feasible(self, validation_service):
         """Test feasibility check for valid problem."""
         result = validation_service.validate_feasibility(
@@ -163,3 +199,444 @@ class TestConfigService:
         })
         assert config_service.get('num_days') == 5
         assert config_service.get('num_workshops') == 15
+
+
+class TestOptimizationService:
+    """Tests for OptimizationService."""
+
+    @pytest.fixture
+    def optimization_service(self):
+        return OptimizationService()
+
+    def test_select_engine(self, optimization_service):
+        """Test that the engine is chosen from the config."""
+        assert optimization_service._select_engine({}) is FlowOptimizer
+        assert optimization_service._select_engine({'engine': 'mip'}) is WorkshopOptimizer
+        assert optimization_service._select_engine(
+            {'engine': 'deferred_acceptance'}
+        ) is DeferredAcceptanceOptimizer
+
+    def test_available_solvers(self, optimization_service):
+        """Test that CBC is always offered as solver."""
+        assert 'cbc' in optimization_service.get_available_solvers()
+
+    def test_optimize_with_flow_engine(self, optimization_service):
+        """Test a complete run through the service."""
+        students = [
+            Student(id=i, vorname=f"V{i}", nachname=f"N{i}", klasse="5a",
+                    wunsch1="A", wunsch2="B", wunsch3="C", wunsch4="D")
+            for i in range(6)
+        ]
+        result = optimization_service.optimize(
+            students, ["A", "B", "C", "D"],
+            {'num_days': 2, 'max_participants_per_workshop': 3, 'engine': 'flow'}
+        )
+        assert result.success is True
+        # Three seats per day are enough for everyone to attend A and B
+        assert result.statistics['wunsch1_count'] == 6
+        assert result.statistics['wunsch2_count'] == 6
+
+    def test_optimize_streams_incumbents(self, optimization_service):
+        """Test that the service passes improved solutions to the caller."""
+        students = [
+            Student(id=i, vorname=f"V{i}", nachname=f"N{i}", klasse="5a",
+                    wunsch1="A", wunsch2="B", wunsch3="C", wunsch4="D")
+            for i in range(6)
+        ]
+        incumbents = []
+        result = optimization_service.optimize(
+            students, ["A", "B", "C", "D"],
+            {'num_days': 2, 'max_participants_per_workshop': 3, 'engine': 'mip'},
+            time_limit=60, mip_gap=0.01, on_incumbent=incumbents.append
+        )
+        assert result.success is True
+        assert incumbents
+        assert optimization_service.optimizer.time_limit == 60
+        assert optimization_service.optimizer.mip_gap == 0.01
+
+    def test_weight_change_reuses_optimizer(self, optimization_service):
+        """Test that a run with other wish weights solves the previous model again."""
+        students, workshops = self._two_schools(24)
+        config = {'num_days': 2, 'max_participants_per_workshop': 4, 'engine': 'mip'}
+        assert optimization_service.optimize(students, workshops, config).success is True
+        optimizer = optimization_service.optimizer
+
+        weights = {'wunsch1': 1, 'wunsch2': 1, 'wunsch3': 10, 'wunsch4': 1}
+        result = optimization_service.optimize(students, workshops, {**config, 'wish_weights': weights})
+        assert optimization_service.optimizer is optimizer
+        expected = OptimizationService().optimize(
+            students, workshops, {**config, 'wish_weights': weights, 'decompose': False}
+        )
+        assert result.statistics['solver']['objective'] == pytest.approx(
+            expected.statistics['solver']['objective']
+        )
+
+        # Any other change builds a new model
+        optimization_service.optimize(students, workshops, {**config, 'num_days': 1})
+        assert optimization_service.optimizer is not optimizer
+
+    def test_parameter_grid(self):
+        """Test that the grid contains every combination on top of the base config."""
+        configs = parameter_grid(
+            {'num_days': 2, 'engine': 'flow'},
+            {'max_participants_per_workshop': [3, 4], 'keep_classes_together': ['ja', 'egal']}
+        )
+        assert len(configs) == 4
+        assert configs[1] == {
+            'num_days': 2, 'engine': 'flow',
+            'max_participants_per_workshop': 3, 'keep_classes_together': 'egal'
+        }
+
+    def test_sweep(self, optimization_service):
+        """Test that a sweep streams every result and compares the configurations."""
+        students, workshops = self._two_schools(12)
+        configs = parameter_grid(
+            {'num_days': 2, 'engine': 'flow', 'decompose': False},
+            {'max_participants_per_workshop': [2, 3, 4]}
+        )
+        finished = {}
+        rows = optimization_service.sweep(
+            students, workshops, configs, time_limit=30,
+            on_result=lambda index, result: finished.setdefault(index, result)
+        )
+        assert sorted(finished) == [0, 1, 2]
+        assert [row['Konfiguration'] for row in rows] == [
+            f"max_participants_per_workshop={capacity}" for capacity in (2, 3, 4)
+        ]
+        for row, config in zip(rows, configs):
+            expected = OptimizationService().optimize(students, workshops, config)
+            assert row['Erfolgreich'] is expected.success
+            assert row['1. Wunsch'] == expected.statistics['wunsch1_count']
+            assert row['Zufriedenheitsrate'] == round(expected.get_satisfaction_rate(), 1)
+        assert rows[0]['Zufriedenheitsrate'] <= rows[2]['Zufriedenheitsrate']
+
+    @staticmethod
+    def _two_schools(num_students):
+        """Students of two schools that only wish workshops of their own school."""
+        pools = [["A", "B", "C", "D"], ["E", "F", "G", "H"]]
+        return [
+            Student(id=i, vorname=f"V{i}", nachname=f"N{i}", klasse=f"{5 + i % 2}a",
+                    wunsch1=pools[i % 2][i % 4], wunsch2=pools[i % 2][(i + 1) % 4],
+                    wunsch3=pools[i % 2][(i + 2) % 4], wunsch4=pools[i % 2][(i + 3) % 4])
+            for i in range(num_students)
+        ], pools[0] + pools[1]
+
+    def test_split_components(self):
+        """Test that disjoint workshop pools split only with enough spare seats."""
+        students, workshops = self._two_schools(12)
+        student_dicts = [student.to_dict() for student in students]
+        components = split_components(student_dicts, workshops, 2, 4)
+        assert [len(component_students) for component_students, _ in components] == [6, 6]
+        assert [component_workshops for _, component_workshops in components] == [
+            ["A", "B", "C", "D"], ["E", "F", "G", "H"]
+        ]
+        # With two seats per workshop a school cannot always take its students back
+        assert len(split_components(student_dicts, workshops, 2, 2)) == 1
+
+    def test_pareto_is_not_split(self, optimization_service):
+        """Test that the frontier is always computed for the whole problem."""
+        students, workshops = self._two_schools(12)
+        student_dicts = [student.to_dict() for student in students]
+        config = {'num_days': 2, 'max_participants_per_workshop': 4}
+        assert len(optimization_service._split(WorkshopOptimizer, student_dicts, workshops, config)) == 2
+        assert len(optimization_service._split(ParetoOptimizer, student_dicts, workshops, config)) == 1
+
+    def test_flow_is_not_split(self, optimization_service):
+        """Test that the flow engine solves the whole problem in one flow."""
+        students, workshops = self._two_schools(12)
+        student_dicts = [student.to_dict() for student in students]
+        config = {'num_days': 2, 'max_participants_per_workshop': 4}
+        assert len(optimization_service._split(FlowOptimizer, student_dicts, workshops, config)) == 1
+
+    def test_maxmin_is_not_split(self, optimization_service):
+        """Test that the lowest score is always optimized for the whole problem."""
+        students, workshops = self._two_schools(12)
+        student_dicts = [student.to_dict() for student in students]
+        config = {'num_days': 2, 'max_participants_per_workshop': 4, 'objective': 'maxmin'}
+        assert len(optimization_service._split(WorkshopOptimizer, student_dicts, workshops, config)) == 1
+
+    def test_workshop_capacities_are_not_split(self, optimization_service):
+        """Test that capacities of single workshops keep the problem whole."""
+        students, workshops = self._two_schools(12)
+        student_dicts = [student.to_dict() for student in students]
+        config = {
+            'num_days': 2, 'max_participants_per_workshop': 4,
+            'workshop_capacities': {'A': [4, 0]}
+        }
+        assert len(optimization_service._split(WorkshopOptimizer, student_dicts, workshops, config)) == 1
+        config = {'num_days': 2, 'max_participants_per_workshop': 4, 'workshop_minimums': {'A': 3}}
+        assert len(optimization_service._split(WorkshopOptimizer, student_dicts, workshops, config)) == 1
+
+    def test_friend_groups_are_not_split(self, optimization_service):
+        """Test that friend groups keep the problem whole unless they are switched off."""
+        students, workshops = self._two_schools(12)
+        students[0].partners, students[1].partners = [1], [0]
+        student_dicts = [student.to_dict() for student in students]
+        config = {'num_days': 2, 'max_participants_per_workshop': 4}
+        assert len(optimization_service._split(WorkshopOptimizer, student_dicts, workshops, config)) == 1
+        config['keep_partners_together'] = False
+        assert len(optimization_service._split(WorkshopOptimizer, student_dicts, workshops, config)) == 2
+
+    def test_optimize_decomposed(self, optimization_service):
+        """Test that solving the components separately keeps the optimum."""
+        students, workshops = self._two_schools(24)
+        results = {}
+        for decompose in (True, False):
+            config = {
+                'num_days': 2, 'max_participants_per_workshop': 6, 'engine': 'mip',
+                'decompose': decompose
+            }
+            results[decompose] = optimization_service.optimize(students, workshops, config)
+            assert results[decompose].success is True
+
+        assert len(results[True].statistics['components']) == 2
+        assert 'components' not in results[False].statistics
+        for key in ('wunsch1_count', 'wunsch2_count', 'other_count'):
+            assert results[True].statistics[key] == results[False].statistics[key]
+        assert results[True].statistics['solver']['objective'] == pytest.approx(
+            results[False].statistics['solver']['objective']
+        )
+
+
+    @pytest.mark.parametrize('engine', ['heuristic', 'lagrangian'])
+    def test_merge_heuristic_statistics(self, optimization_service, engine):
+        """Test that objective, bound and gap of heuristic components add up."""
+        students, workshops = self._two_schools(24)
+        config = {'num_days': 2, 'max_participants_per_workshop': 6, 'engine': engine}
+        result = optimization_service.optimize(students, workshops, config)
+        assert result.success is True
+        statistics = result.statistics
+        assert len(statistics['components']) == 2
+        weights = optimization_service.optimizer.wish_weights
+        assert statistics['objective'] == sum(
+            weights[f'wunsch{rank}']
+            for student in students
+            for rank, wish in enumerate(student.wishes, start=1)
+            if wish in result.assignments[student.id]
+        )
+        assert statistics['upper_bound'] >= statistics['objective']
+        assert statistics['gap'] == pytest.approx(
+            (statistics['upper_bound'] - statistics['objective']) / statistics['upper_bound']
+        )
+        if engine == 'lagrangian':
+            assert statistics['lagrangian']['bound'] >= statistics['objective']
+
+
+class TestResultCache:
+    """Tests for the on-disk result cache."""
+
+    @staticmethod
+    def _students(names="N"):
+        return [
+            Student(id=i, vorname=f"V{i}", nachname=f"{names}{i}", klasse="5a",
+                    wunsch1="A", wunsch2="B", wunsch3="C", wunsch4="D")
+            for i in range(6)
+        ]
+
+    def test_result_key(self):
+        """Test that the key ignores names but not order or parameters."""
+        students = [student.to_dict() for student in self._students()]
+        renamed = [student.to_dict() for student in self._students("X")]
+        config = {'num_days': 2, 'wish_weights': {'wunsch1': 10}}
+        key = result_key(students, ["A", "B"], config)
+        assert result_key(renamed, ["A", "B"], config) == key
+        # The order is the priority of tie_breaking='priority'
+        assert result_key(students[::-1], ["A", "B"], config) != key
+        assert result_key(students, ["A", "B"], {**config, 'num_days': 3}) != key
+        assert result_key(students, ["A", "B"], {**config, 'wish_weights': {'wunsch1': 9}}) != key
+        assert result_key(students, ["A", "B"], {**config, 'lagrangian_iterations': 5}) != key
+        assert result_key(students, ["A", "C"], config) != key
+        students[0]['partners'] = [1]
+        assert result_key(students, ["A", "B"], config) != key
+
+    def test_optimize_uses_cache(self, tmp_path):
+        """Test that an identical run is answered from the cache."""
+        cache = ResultCache(str(tmp_path))
+        config = {'num_days': 2, 'max_participants_per_workshop': 3, 'engine': 'flow'}
+        first = OptimizationService(cache).optimize(self._students(), ["A", "B", "C", "D"], config)
+        assert first.statistics['cache']['hit'] is False
+
+        # A new service, as after restarting the app
+        service = OptimizationService(ResultCache(str(tmp_path)))
+        second = service.optimize(self._students("X"), ["A", "B", "C", "D"], config)
+        assert second.statistics['cache']['hit'] is True
+        assert second.assignments == first.assignments
+        assert service.get_cache_metrics()['hits'] == 1
+
+        changed = service.optimize(
+            self._students(), ["A", "B", "C", "D"], {**config, 'num_days': 1}
+        )
+        assert changed.statistics['cache']['hit'] is False
+        assert service.get_cache_metrics()['misses'] == 1
+
+    def test_unproven_results_are_not_cached(self, tmp_path, monkeypatch):
+        """Test that a run ending on time_limit or mip_gap is not stored."""
+        class UnprovenOptimizer(WorkshopOptimizer):
+            def optimize(self):
+                result = super().optimize()
+                result.statistics['solver']['optimal'] = False
+                return result
+
+        monkeypatch.setitem(OptimizationService.ENGINES, 'mip', UnprovenOptimizer)
+        service = OptimizationService(ResultCache(str(tmp_path)))
+        config = {'num_days': 2, 'max_participants_per_workshop': 3, 'engine': 'mip'}
+        result = service.optimize(self._students(), ["A", "B", "C", "D"], config)
+        assert result.success is True
+        assert service.get_cache_metrics()['stores'] == 0
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        """Test that the oldest unused result is deleted beyond the size limit."""
+        result = OptimizationResult(
+            success=True, assignments={i: ["A", "B"] for i in range(50)}, statistics={}, message=""
+        )
+        cache = ResultCache(str(tmp_path), max_bytes=10 ** 9)
+        cache.put("first", result)
+        cache.put("second", result)
+        size = (tmp_path / "first.pickle").stat().st_size
+        os.utime(tmp_path / "first.pickle", (0, 0))
+        os.utime(tmp_path / "second.pickle", (1, 1))
+        assert cache.get("first") is not None  # Now the most recently used
+
+        cache.max_bytes = 2 * size
+        cache.put("third", result)
+        assert cache.get("second") is None
+        assert cache.get("first") is not None
+        assert cache.get("third") is not None
+        assert cache.metrics['evictions'] == 1
+
+    def test_unreadable_entry_is_a_miss(self, tmp_path):
+        """Test that a damaged file is dropped instead of raising."""
+        (tmp_path / "broken.pickle").write_bytes(b"not a pickle")
+        cache = ResultCache(str(tmp_path))
+        assert cache.get("broken") is None
+        assert not (tmp_path / "broken.pickle").exists()
+        assert cache.metrics['misses'] == 1
+
+
+class TestLotterySampler:
+    """Tests for the lottery sampler."""
+
+    @staticmethod
+    def _students(count, wishes):
+        return [
+            Student(id=i, vorname=f"V{i}", nachname=f"N{i}", klasse="5a",
+                    wunsch1=wishes[0], wunsch2=wishes[1], wunsch3=wishes[2], wunsch4=wishes[3])
+            for i in range(count)
+        ]
+
+    def test_probabilities(self):
+        """Three students compete for one seat in A and one in B on a single day."""
+        students = self._students(3, ["A", "B", "", ""])
+        sampler = LotterySampler(1, 1, draws=3000, seed=1, confidence_z=3.3)
+        report = sampler.run(students, ["A", "B", "C"])
+        assert report.draws == 3000
+        for rank in range(2):
+            assert report.wish_probability[:, rank] == pytest.approx([1 / 3] * 3, abs=0.04)
+            lower, upper = report.wish_interval[0][:, rank], report.wish_interval[1][:, rank]
+            assert (lower <= 1 / 3).all() and (upper >= 1 / 3).all()
+        assert report.wish_probability[:, 2:].sum() == 0
+        assert report.workshop_probability[:, 0] == pytest.approx(report.wish_probability[:, 0])
+        assert report.workshop_probability[:, 2].sum() == 0
+
+    def test_unlimited_capacity(self):
+        students = self._students(5, ["A", "B", "C", "D"])
+        report = LotterySampler(3, None, draws=10).run(students, ["A", "B", "C", "D"])
+        assert (report.wish_probability[:, :3] == 1).all()
+        assert (report.wish_probability[:, 3] == 0).all()
+        assert len(report.to_rows()) == 5
+
+    @pytest.mark.parametrize('wishes,expected', [
+        (["", "B", "C", "D"], [0, 1, 1, 1]),
+        (["X", "B", "C", "D"], [0, 1, 1, 1]),
+        (["B", "B", "C", "D"], [1, 0, 1, 1]),
+    ])
+    def test_wish_ranks_keep_gaps(self, wishes, expected):
+        """Empty, unknown or repeated wishes leave their rank at zero."""
+        students = self._students(1, wishes)
+        report = LotterySampler(3, None, draws=10).run(students, ["A", "B", "C", "D"])
+        assert report.wish_probability[0].tolist() == expected
+        row = report.to_rows()[0]
+        assert [row[f'Wunsch {rank}'] for rank in range(1, 5)] == expected
+
+    def test_kernel_moves_own_wishes(self):
+        """A second wish that only fits on the day of the first moves the first."""
+        # Student 0 fills A on day 0, student 1 then needs day 1 for A
+        wishes = np.array([[0, -1, -1, -1], [1, 0, -1, -1]])
+        counts = sample_serial_dictatorship(
+            wishes, 2, 2, 1, draws=200, rng=np.random.default_rng(0)
+        )
+        assert (counts[:, 0] == 200).all()
+        assert counts[1, 1] == 200
+
+    def test_workshop_capacities(self):
+        """A workshop that does not take place is never granted."""
+        students = self._students(4, ["A", "B", "C", "D"])
+        sampler = LotterySampler(2, 4, draws=10, workshop_capacities={"A": 0, "B": [0, 2]})
+        report = sampler.run(students, ["A", "B", "C", "D"])
+        assert (report.workshop_probability[:, 0] == 0).all()
+        assert report.workshop_probability[:, 1].sum() == pytest.approx(2)
+        assert (report.wish_probability[:, 2] == 1).all()
+
+    def test_stop(self):
+        stop_event = threading.Event()
+        stop_event.set()
+        students = self._students(50, ["A", "B", "C", "D"])
+        report = LotterySampler(2, 20, draws=20000, max_workers=1).run(
+            students, ["A", "B", "C", "D"], stop_event
+        )
+        assert report.draws < 20000
+
+    def test_rejects_minimums(self):
+        """The samples do not cancel workshop-days, so minimums are refused."""
+        students = self._students(4, ["A", "B", "C", "D"])
+        config = {'num_days': 2, 'workshop_minimums': {"A": 3}}
+        with pytest.raises(ValueError):
+            OptimizationService().lottery(students, ["A", "B", "C", "D"], config, draws=10)
+
+
+class TestDataService:
+    """Tests for the Excel import."""
+
+    def test_import_workshop_sheet(self, tmp_path):
+        """Test reading capacities from the optional workshop sheet."""
+        path = tmp_path / "schueler.xlsx"
+        students = pd.DataFrame({
+            'Vorname': ["Anna", "Ben"], 'Nachname': ["Müller", "Schmidt"], 'Klasse': ["5a", "5b"],
+            'Wunsch1': ["Töpfern", "Chor"], 'Wunsch2': ["Chor", "Töpfern"],
+            'Wunsch3': ["Theater", "Theater"], 'Wunsch4': ["Sport", "Sport"]
+        })
+        workshops = pd.DataFrame({
+            'Workshop': ["Töpfern", "Chor", "Zirkus", "Sport"],
+            'Max_Teilnehmer': [12, None, 8, None],
+            'Min_Teilnehmer': [6, None, None, 2],
+            'Tag 1': [None, 0, None, None],
+            'Tag 2': [None, 25, None, -3]
+        })
+        with pd.ExcelWriter(path) as writer:
+            students.to_excel(writer, sheet_name="Schüler", index=False)
+            workshops.to_excel(writer, sheet_name="Workshops", index=False)
+
+        result = DataService().import_excel(str(path))
+        assert result.success
+        assert "Zirkus" in result.workshops
+        assert result.workshop_capacities == {"Töpfern": 12, "Chor": [0, 25], "Zirkus": 8}
+        assert result.workshop_minimums == {"Töpfern": 6, "Sport": 2}
+        assert any("Ungültige Kapazität" in warning for warning in result.warnings)
+
+    def test_import_partners(self, tmp_path):
+        """Test resolving the names of the partner column into student ids."""
+        path = tmp_path / "schueler.xlsx"
+        pd.DataFrame({
+            'Vorname': ["Anna", "Ben", "Cem", "Dana"],
+            'Nachname': ["Müller", "Schmidt", "Yilmaz", "Wolf"],
+            'Klasse': ["5a", "5b", "5a", "5b"],
+            'Wunsch1': ["Töpfern"] * 4, 'Wunsch2': ["Chor"] * 4,
+            'Wunsch3': ["Theater"] * 4, 'Wunsch4': ["Sport"] * 4,
+            'Partner': ["ben  schmidt; Cem Yilmaz", "Anna Müller", None, "Eva Klein"]
+        }).to_excel(path, index=False)
+
+        result = DataService().import_excel(str(path))
+        assert result.success
+        assert [student.partners for student in result.students] == [[1, 2], [0], [], []]
+        assert "Zeile 2: Partnerwunsch 'Cem Yilmaz' ist nicht gegenseitig" in result.warnings
+        assert "Zeile 5: Partner 'Eva Klein' nicht gefunden" in result.warnings
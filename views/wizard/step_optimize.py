@@ -62,6 +62,26 @@ class StepOptimize(WizardStepBase):
         )
         self.details_text.pack(pady=10)
 
+        # Best solution so far, updated while the solver runs
+        self.incumbent_text = ttk.Label(
+            status_frame,
+            text="",
+            font=("Segoe UI", 10, "bold"),
+            bootstyle="info"
+        )
+        self.incumbent_text.pack(pady=(0, 10))
+
+        # Stops the solver and keeps its best solution
+        self.accept_button = ttk.Button(
+            status_frame,
+            text="Aktuelle Lösung übernehmen",
+            command=self._handle_accept,
+            bootstyle="warning-outline",
+            width=30,
+            state=DISABLED
+        )
+        self.accept_button.pack(pady=(0, 10))
+
         # Log frame (for detailed output)
         log_frame = ttk.LabelFrame(
             status_frame,
@@ -113,6 +133,8 @@ class StepOptimize(WizardStepBase):
         self.status_icon_label.config(text="⏳")
         self.status_text.config(text="Optimierung läuft...", bootstyle="info")
         self.details_text.config(text="Bitte warten...")
+        self.incumbent_text.config(text="")
+        self.accept_button.config(state=DISABLED)
 
         # Start progress bar
         self.progress.start()
@@ -140,8 +162,10 @@ class StepOptimize(WizardStepBase):
             self._log("Starte Solver...")
             self._log("")
 
-            # Run optimization
-            result = self.controller.run_optimization()
+            # Run optimization; improved solutions are shown as they come
+            result = self.controller.run_optimization(
+                on_incumbent=lambda incumbent: self.after(0, self._on_incumbent, incumbent)
+            )
 
             # Update UI (must use after() for thread safety)
             self.after(0, self._on_optimization_complete, result)
@@ -149,6 +173,31 @@ class StepOptimize(WizardStepBase):
         except Exception as e:
             self.after(0, self._on_optimization_error, str(e))
 
+    def _on_incumbent(self, incumbent):
+        """Show an improved solution (on main thread).
+
+        Args:
+            incumbent: Incumbent with objective, bound and elapsed time
+        """
+        text = f"Beste Lösung: {incumbent.objective:.0f}"
+        if incumbent.bound is not None:
+            text += f" | Schranke: {incumbent.bound:.0f}"
+            if incumbent.bound > 0:
+                gap = max(incumbent.bound - incumbent.objective, 0) / incumbent.bound
+                text += f" | Lücke: {gap * 100:.2f}%"
+        text += f" | {incumbent.elapsed:.1f}s"
+        self.incumbent_text.config(text=text)
+        self._log(f"Neue Lösung: {text}")
+
+        if self.controller.is_optimizing():
+            self.accept_button.config(state=NORMAL)
+
+    def _handle_accept(self):
+        """Stop the optimization and keep the best solution so far."""
+        self.accept_button.config(state=DISABLED)
+        self.controller.accept_current_solution()
+        self._log("Beste Lösung wird übernommen...")
+
     def _on_optimization_complete(self, result):
         """Handle optimization completion (on main thread).
 
@@ -157,6 +206,7 @@ class StepOptimize(WizardStepBase):
         """
         # Stop progress bar
         self.progress.stop()
+        self.accept_button.config(state=DISABLED)
 
         if result.success:
             # Success
@@ -175,6 +225,7 @@ class StepOptimize(WizardStepBase):
 
             # Log results
             self._log("✅ ERFOLGREICH")
+            self._log(result.message)
             self._log("")
             self._log(f"Ausführungszeit: {result.execution_time:.2f} Sekunden")
             self._log("")
@@ -210,6 +261,7 @@ class StepOptimize(WizardStepBase):
         """
         # Stop progress bar
         self.progress.stop()
+        self.accept_button.config(state=DISABLED)
 
         # Update UI
         self.status_icon_label.config(text="❌")
@@ -237,7 +237,8 @@ Die Optimierung maximiert die Gesamtzufriedenheit aller Schüler."""
 
     def on_exit(self) -> bool:
         """Save parameters when exiting."""
-        params = self._collect_parameters()
+        # Keep settings that have no field in this form (e.g. the engine)
+        params = {**self.controller.get_parameters(), **self._collect_parameters()}
         self.controller.state.parameters = params
         return True
 
@@ -98,6 +98,11 @@ class StepResults(WizardStepBase):
             bootstyle="secondary"
         ).pack()
 
+        # --- Pareto frontier ---
+        frontier = result.statistics.get('pareto', [])
+        if len(frontier) > 1:
+            self._create_frontier_selector(frontier, result.statistics.get('pareto_selected', 0))
+
         # --- Statistics Cards ---
         cards_frame = ttk.Frame(self.results_frame)
         cards_frame.pack(fill=X, pady=20)
@@ -170,6 +175,41 @@ class StepResults(WizardStepBase):
         notebook.add(classes_tab, text="Klassen")
         self._create_class_distribution(classes_tab)
 
+    def _create_frontier_selector(self, frontier, selected):
+        """Create a selector for the points of the Pareto frontier.
+
+        Args:
+            frontier: Frontier points from the optimum to the fairest
+            selected: Index of the displayed point
+        """
+        frame = ttk.LabelFrame(
+            self.results_frame,
+            text="⚖️ Zufriedenheit oder Fairness",
+            padding=10
+        )
+        frame.pack(fill=X, pady=(0, 10))
+
+        labels = [
+            f"{point['objective']:.0f} Punkte, {point['unsatisfied']} Schüler ohne Wunsch"
+            for point in frontier
+        ]
+        selector = ttk.Combobox(frame, values=labels, state="readonly", width=50)
+        selector.current(selected)
+        selector.pack(side=LEFT)
+        selector.bind("<<ComboboxSelected>>", lambda e: self._handle_frontier_point(selector.current()))
+
+        ttk.Label(
+            frame,
+            text="Weniger Punkte, dafür weniger Schüler ganz ohne Wunsch",
+            font=("Segoe UI", 9),
+            bootstyle="secondary"
+        ).pack(side=LEFT, padx=10)
+
+    def _handle_frontier_point(self, index):
+        """Show another point of the Pareto frontier."""
+        self.controller.select_frontier_point(index)
+        self._display_results()
+
     def _create_workshop_overview(self, parent):
         """Create workshop overview table.
 